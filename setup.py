@@ -17,5 +17,17 @@ setup(
         'tenacity>8,<9',
         'requests<3'
     ],
+    extras_require={
+        'analytics': ['numpy>=1.20'],
+        'arrow': ['numpy>=1.20', 'pyarrow>=7'],
+        'multichannel': ['numpy>=1.20'],
+        'silence-gate': ['numpy>=1.20'],
+        'tracing': ['opentelemetry-api>=1.0'],
+    },
+    entry_points={
+        'console_scripts': [
+            'verbit-stream=verbit.cli:main',
+        ],
+    },
     zip_safe=False
 )
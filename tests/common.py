@@ -18,3 +18,32 @@ RESPONSES = {k: _load_json_resource(k) for k in RESOURCE_KEYS}
 
 def mock_get_auth_token(_self, *_args, **_kwargs):
     return "fake-auth-token"
+
+
+# Response builders:
+def timed_items(*timed_words, speaker_id='s1'):
+    """Response items of (value, start, end) words, of which ',' and '.' are punctuation."""
+    return [dict(value=value, start=start, end=end, kind='punct' if value in ',.' else 'text', speaker_id=speaker_id)
+            for value, start, end in timed_words]
+
+
+def spaced_items(values, start=0.0, speaker_id='s1'):
+    """Response items of words half a second apart, each lasting 0.4 seconds."""
+    return timed_items(*((value, start + i * 0.5, start + i * 0.5 + 0.4) for i, value in enumerate(values)), speaker_id=speaker_id)
+
+
+def make_response(items, resp_type='transcript', is_final=True, is_end_of_stream=False, service_type='transcription',
+                  language_code='en-US', start=None, start_pts_offset=None, start_epoch=None):
+    """A response of `items`, spanning them (or starting at `start`)."""
+    if start is None:
+        start = items[0]['start'] if items else 0.0
+    end = items[-1]['end'] if items else start
+    body = {'id': 'x', 'type': resp_type, 'service_type': service_type, 'language_code': language_code,
+            'is_final': is_final, 'is_end_of_stream': is_end_of_stream, 'start': start, 'end': end,
+            'speakers': [{'id': speaker_id, 'label': None} for speaker_id in dict.fromkeys(item['speaker_id'] for item in items)],
+            'alternatives': [{'transcript': ' '.join(item['value'] for item in items), 'start': start, 'end': end, 'items': items}]}
+    if start_pts_offset is not None:
+        body['start_pts'] = start + start_pts_offset
+    if start_epoch is not None:
+        body['start_epoch'] = start_epoch
+    return {'response': body}
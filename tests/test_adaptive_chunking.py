@@ -0,0 +1,133 @@
+# Adaptive media chunking tests:
+import unittest
+
+from threading import Event
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig, _MediaPump
+from verbit.stand_in_server import StandInServer, TranscribingSession
+from verbit.loadtest import synthetic_media
+from verbit.adaptive_chunking import AdaptiveChunker, AdaptiveChunkingConfig
+
+
+class TestAdaptiveChunker(unittest.TestCase):
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveChunker(AdaptiveChunkingConfig(min_frame_seconds=0.2, initial_frame_seconds=0.1))
+
+    def test_frame_bytes(self):
+        chunker = AdaptiveChunker(AdaptiveChunkingConfig(initial_frame_seconds=0.1))
+        self.assertEqual(3200, chunker.frame_bytes(32000, 2))
+
+        # whole sample frames, at least one
+        self.assertEqual(0, chunker.frame_bytes(1000, 6) % 6)
+        self.assertEqual(4, chunker.frame_bytes(1, 4))
+
+    def test_increase_before_responses(self):
+        chunker = AdaptiveChunker(AdaptiveChunkingConfig(target_latency_seconds=1.0, initial_frame_seconds=0.1, max_frame_seconds=0.2))
+        for i in range(10):
+            chunker.on_frame_sent(sent_at=float(i), blocked_seconds=0.001)
+        metrics = chunker.metrics
+        self.assertAlmostEqual(0.2, metrics.frame_seconds)
+        self.assertGreaterEqual(metrics.increases, 5)
+        self.assertEqual(10, metrics.frames)
+
+    def test_adjusted_once_per_frame_before_responses(self):
+        chunker = AdaptiveChunker(AdaptiveChunkingConfig(target_latency_seconds=1.0, initial_frame_seconds=0.1, max_frame_seconds=0.5))
+
+        # frames sent in a burst (e.g. catching up) are adjusted for once a frame's duration passed
+        for i in range(100):
+            chunker.on_frame_sent(sent_at=i * 0.01, blocked_seconds=0.001)
+        metrics = chunker.metrics
+        self.assertEqual(100, metrics.frames)
+        self.assertLessEqual(metrics.increases, 9)
+        self.assertLess(metrics.frame_seconds, 0.3)
+
+    def test_decrease_on_latency(self):
+        chunker = AdaptiveChunker(AdaptiveChunkingConfig(target_latency_seconds=1.0, initial_frame_seconds=0.4, smoothing=1.0))
+        chunker.on_frame_sent(sent_at=10.0, blocked_seconds=0.0)
+        chunker.on_frame_sent(sent_at=10.4, blocked_seconds=0.0)
+        decreases = chunker.metrics.decreases
+
+        chunker.on_response(sent_at=10.4, received_at=11.4)
+        metrics = chunker.metrics
+        self.assertAlmostEqual(1.0, metrics.latency_seconds)
+        self.assertEqual(decreases + 1, metrics.decreases)
+        frame_seconds = metrics.frame_seconds
+
+        # responses to frames sent before the adjustment don't adjust again
+        chunker.on_response(sent_at=10.4, received_at=11.5)
+        self.assertEqual(frame_seconds, chunker.frame_seconds)
+
+    def test_rtt(self):
+        chunker = AdaptiveChunker(AdaptiveChunkingConfig(target_latency_seconds=0.5, initial_frame_seconds=0.3, smoothing=1.0))
+        chunker.on_rtt(0.6)
+        chunker.on_frame_sent(sent_at=0.0, blocked_seconds=0.0)
+        metrics = chunker.metrics
+        self.assertAlmostEqual(0.6, metrics.rtt_seconds)
+        self.assertEqual(1, metrics.decreases)
+
+
+class TestMediaPumpFrames(unittest.TestCase):
+
+    def test_get_frame(self):
+        pump = _MediaPump(iter([b'abc', b'defgh', b'ij']))
+        stop_event = Event()
+        self.assertEqual(b'abcd', pump.get_frame(stop_event, 4))
+        self.assertEqual(b'efgh', pump.get_frame(stop_event, 4))
+        self.assertEqual(b'ij', pump.get_frame(stop_event, 4))
+        self.assertIsNone(pump.get_frame(stop_event, 4))
+
+    def test_more_chunks_than_buffered(self):
+        chunks = [bytes([i]) for i in range(3 * _MediaPump.MAX_BUFFERED_CHUNKS)]
+        pump = _MediaPump(iter(chunks))
+        self.assertEqual(b''.join(chunks), pump.get_frame(Event(), len(chunks)))
+
+    def test_error(self):
+        def media_generator():
+            yield b'ab'
+            raise IOError('capture failed')
+
+        pump = _MediaPump(media_generator())
+        self.assertEqual(b'ab', pump.get_frame(Event(), 4))
+        with self.assertRaises(IOError):
+            pump.get_frame(Event(), 4)
+
+
+class _FrameRecordingSession(TranscribingSession):
+
+    frames = []
+
+    def on_binary(self, connection, data: bytes):
+        self.frames.append(len(data))
+        super().on_binary(connection, data)
+
+
+class TestAdaptiveChunkingClient(unittest.TestCase):
+
+    def test_stream(self):
+        media_config = MediaConfig()
+        media = synthetic_media(media_config, 3.0, chunk_seconds=0.01)
+
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.adaptive_chunking = AdaptiveChunker(AdaptiveChunkingConfig(initial_frame_seconds=0.1, max_frame_seconds=0.2))
+        _FrameRecordingSession.frames = []
+
+        with StandInServer(session_factory=_FrameRecordingSession) as server:
+            responses = list(client.start_stream(ws_url=server.url, media_generator=iter(media), media_config=media_config))
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+
+        # the generator's 10 ms chunks were coalesced into sample-aligned frames, within bounds
+        frames = _FrameRecordingSession.frames
+        self.assertEqual(sum(map(len, media)), sum(frames))
+        self.assertEqual(3200, frames[0])
+        self.assertTrue(all(size % 2 == 0 and size <= 6400 for size in frames))
+        self.assertLess(len(frames), len(media))
+
+        metrics = client.adaptive_chunking.metrics
+        self.assertEqual(len(frames), metrics.frames)
+        self.assertIsNotNone(metrics.latency_seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
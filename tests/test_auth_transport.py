@@ -0,0 +1,121 @@
+# Auth transport and startup tests:
+import sys
+import json
+import socket
+import time
+import unittest
+import subprocess
+
+from threading import Thread
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer, TranscribingSession
+from verbit.loadtest import synthetic_media
+from verbit.auth_transport import HttpClientAuth
+from verbit.startup_benchmark import HEAVY_MODULES, _AuthHandler, benchmark
+
+
+class _AuthServer:
+
+    def __init__(self, handler=_AuthHandler):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}{_AuthHandler.PATH}'
+
+    def __enter__(self) -> '_AuthServer':
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TestHttpClientAuth(unittest.TestCase):
+
+    def test_keep_alive(self):
+        transport = HttpClientAuth(timeout=5.0)
+        with _AuthServer() as server:
+            for _ in range(3):
+                self.assertEqual({'token': 'stand-in'}, transport.post_json(server.url, {'data': {'api_key': 'key'}}))
+            transport.close()
+        self.assertEqual(1, transport.connections_opened)
+
+    def test_stale_connection(self):
+        # the server closes every kept-alive connection once it responded, without saying so
+        class Handler(_AuthHandler):
+            def do_POST(self):
+                super().do_POST()
+                self.close_connection = True
+
+        transport = HttpClientAuth(timeout=5.0)
+        with _AuthServer(Handler) as server:
+            for _ in range(3):
+                self.assertEqual({'token': 'stand-in'}, transport.post_json(server.url, {'data': {'api_key': 'key'}}))
+            transport.close()
+        self.assertEqual(3, transport.connections_opened)
+
+    def test_timeout_not_retried(self):
+        requests = []
+
+        class Handler(_AuthHandler):
+            def do_POST(self):
+                requests.append(self.path)
+                if len(requests) > 1:
+                    time.sleep(1.0)
+                super().do_POST()
+
+        transport = HttpClientAuth(timeout=0.2)
+        with _AuthServer(Handler) as server:
+            transport.post_json(server.url, {})
+            with self.assertRaises(socket.timeout):
+                transport.post_json(server.url, {})
+            transport.close()
+        self.assertEqual(2, len(requests))
+
+    def test_error_status(self):
+        transport = HttpClientAuth(timeout=5.0)
+        with _AuthServer() as server:
+            with self.assertRaises(HTTPError) as context:
+                transport.post_json(server.url + '/unknown', {})
+            transport.close()
+        self.assertEqual(404, context.exception.code)
+
+    def test_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            HttpClientAuth().post_json('ftp://localhost/auth', {})
+
+    def test_client_auth(self):
+        headers = []
+
+        class Session(TranscribingSession):
+            def on_open(self, connection):
+                headers.append(connection.headers)
+
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.auth_transport = HttpClientAuth(timeout=5.0)
+        with _AuthServer() as auth_server, StandInServer(session_factory=Session) as server:
+            client._auth_endpoint = auth_server.url
+            media = iter(synthetic_media(MediaConfig(), 1.0))
+            responses = list(client.start_stream(ws_url=f'{server.url}?token=session', media_generator=media))
+
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+        self.assertIn('Bearer stand-in', headers[0].values())
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_lazy_imports(self):
+        script = f'import sys, verbit.streaming_client; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])'
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual([], json.loads(output.replace("'", '"')))
+
+    def test_benchmark(self):
+        result = benchmark('http.client', runs=1)
+        self.assertGreater(result.first_response_seconds, result.import_seconds)
+        self.assertNotIn('requests', result.heavy_modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# Client-side caption segmentation tests:
+import io
+import unittest
+
+from verbit.caption_segmenter import CaptionSegmenter, CaptionWindowPolicy
+from verbit.caption_writers import SrtWriter
+
+from tests.common import timed_items, spaced_items, make_response
+
+
+# an utterance of 8 words, half a second each
+UTTERANCE = spaced_items([f'w{i}' for i in range(8)])
+
+
+class TestCaptionSegmenter(unittest.TestCase):
+
+    def _values(self, captions):
+        return [[item['value'] for item in c['response']['alternatives'][0]['items']] for c in captions]
+
+    def test_final_only_policy(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(window_seconds=2.0, stable_revisions=None))
+
+        self.assertEqual([], segmenter.feed(make_response(UTTERANCE[:5], is_final=False)))
+        self.assertEqual([], segmenter.feed(make_response(UTTERANCE[:6], is_final=False)))
+        captions = segmenter.feed(make_response(UTTERANCE, start_pts_offset=100.0))
+
+        self.assertEqual([['w0', 'w1', 'w2', 'w3'], ['w4', 'w5', 'w6', 'w7']], self._values(captions))
+        first = captions[0]['response']
+        self.assertEqual(('captions', True, 0.0, 1.9), (first['type'], first['is_final'], first['start'], first['end']))
+        self.assertEqual('w0 w1 w2 w3', first['alternatives'][0]['transcript'])
+
+        # time references are shifted to each window's start
+        self.assertEqual(102.0, captions[1]['response']['start_pts'])
+
+    def test_stable_windows_emitted_before_final(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(window_seconds=1.0, stable_revisions=2))
+
+        # the first window is complete, but not yet stable
+        self.assertEqual([], segmenter.feed(make_response(UTTERANCE[:3], is_final=False)))
+
+        # unchanged in two revisions
+        captions = segmenter.feed(make_response(UTTERANCE[:4], is_final=False))
+        self.assertEqual([['w0', 'w1']], self._values(captions))
+
+        # a revised (unstable) window is held back
+        revised = UTTERANCE[:2] + timed_items(('W2', 1.0, 1.4), ('w3', 1.5, 1.9), ('w4', 2.0, 2.4))
+        self.assertEqual([], segmenter.feed(make_response(revised, is_final=False)))
+
+        # the final response only contributes words after the committed window
+        captions = segmenter.feed(make_response(UTTERANCE))
+        self.assertEqual([['w2', 'w3'], ['w4', 'w5'], ['w6', 'w7']], self._values(captions))
+
+    def test_silence_starts_new_window(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(window_seconds=10.0, max_gap_seconds=1.0))
+        items = timed_items(('hello', 0.0, 0.4), (',', 0.4, 0.4), ('again', 2.0, 2.4), ('.', 2.4, 2.4))
+
+        captions = segmenter.feed(make_response(items, is_end_of_stream=True))
+
+        self.assertEqual([['hello', ','], ['again', '.']], self._values(captions))
+        self.assertEqual('hello,', captions[0]['response']['alternatives'][0]['transcript'])
+        self.assertEqual([False, True], [c['response']['is_end_of_stream'] for c in captions])
+
+    def test_end_of_stream_without_captions(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(stable_revisions=None))
+        self.assertEqual(1, len(segmenter.feed(make_response(UTTERANCE[:2]))))
+
+        # the final response of the stream has no uncommitted words: an empty captions response ends the stream
+        captions = segmenter.feed(make_response(UTTERANCE[:2], is_end_of_stream=True))
+        self.assertEqual([[]], self._values(captions))
+        self.assertTrue(captions[0]['response']['is_end_of_stream'])
+        self.assertEqual((0.9, 0.9), (captions[0]['response']['start'], captions[0]['response']['end']))
+
+        # as does one with no alternatives
+        response = make_response([], is_end_of_stream=True)
+        response['response']['alternatives'] = []
+        captions = segmenter.feed(response)
+        self.assertEqual(['captions'], [c['response']['type'] for c in captions])
+        self.assertTrue(captions[0]['response']['is_end_of_stream'])
+
+    def test_streams_are_segmented_separately(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(stable_revisions=None))
+
+        english = segmenter.feed(make_response(UTTERANCE[:2]))
+        french = segmenter.feed(make_response(timed_items(('bonjour', 0.0, 0.5)), language_code='fr-FR', service_type='translation'))
+
+        self.assertEqual([['w0', 'w1']], self._values(english))
+        self.assertEqual([['bonjour']], self._values(french))
+        self.assertEqual('fr-FR', french[0]['response']['language_code'])
+
+    def test_tee_feeds_caption_writer(self):
+        segmenter = CaptionSegmenter(CaptionWindowPolicy(window_seconds=2.0))
+        responses = [make_response(UTTERANCE[:4], is_final=False), make_response(UTTERANCE, is_end_of_stream=True)]
+
+        teed = list(segmenter.tee(responses))
+        self.assertEqual(['transcript', 'transcript', 'captions', 'captions'], [r['response']['type'] for r in teed])
+
+        output = io.StringIO()
+        SrtWriter(output).write_responses(teed)
+        self.assertIn('w0 w1 w2 w3', output.getvalue())
+        self.assertIn('w4 w5 w6 w7', output.getvalue())
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            CaptionSegmenter(CaptionWindowPolicy(stable_revisions=0))
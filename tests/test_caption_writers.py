@@ -0,0 +1,147 @@
+# Caption writers tests:
+import io
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from verbit.caption_writers import SrtWriter, WebVttWriter, TtmlWriter, SegmentationRules, segment_items, wrap_lines
+
+from tests.common import timed_items, spaced_items, make_response
+
+
+class _FlushCountingIO(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+RESPONSES = [
+    make_response(timed_items(('Welcome', 0.2, 0.71), ('friends', 0.71, 1.25), (',', 1.25, 1.25)), resp_type='captions'),
+    make_response(timed_items(('we', 2.03, 2.2), ('are', 2.2, 2.4), ('glad', 2.4, 2.9), ('to', 2.9, 3.0),
+                              ('see', 3.0, 3.3), ('you', 3.3, 3.5), ('&', 3.5, 3.6), ('yours', 3.6, 5.03)),
+                  resp_type='captions', is_end_of_stream=True),
+]
+
+
+class TestCaptionWriters(unittest.TestCase):
+
+    def test_wrap_lines(self):
+        self.assertEqual(['one two', 'three'], wrap_lines(['one', 'two', 'three'], 8))
+        self.assertEqual(['extraordinary', 'a'], wrap_lines(['extraordinary', 'a'], 8))
+
+    def test_segmentation_rules(self):
+        rules = SegmentationRules(max_line_length=10, max_lines=1, max_duration=2.0)
+        items = spaced_items([f'w{i}' for i in range(10)])
+
+        cues = list(segment_items(items, rules))
+
+        for cue in cues:
+            self.assertEqual(1, len(cue.lines))
+            self.assertLessEqual(len(cue.lines[0]), 10)
+            self.assertLessEqual(cue.end - cue.start, 2.0)
+        self.assertEqual(' '.join(f'w{i}' for i in range(10)), ' '.join(cue.lines[0] for cue in cues))
+
+    def test_srt(self):
+        output = io.StringIO()
+        SrtWriter(output, SegmentationRules(max_line_length=12, max_lines=2)).write_responses(RESPONSES)
+
+        self.assertEqual('1\n'
+                         '00:00:00,200 --> 00:00:01,250\n'
+                         'Welcome\n'
+                         'friends,\n'
+                         '\n'
+                         '2\n'
+                         '00:00:02,030 --> 00:00:03,600\n'
+                         'we are glad\n'
+                         'to see you &\n'
+                         '\n'
+                         '3\n'
+                         '00:00:03,600 --> 00:00:05,030\n'
+                         'yours\n'
+                         '\n', output.getvalue())
+
+    def test_cues_extended_for_cps_up_to_next_cue(self):
+        output = io.StringIO()
+        rules = SegmentationRules(max_line_length=40, max_lines=1, min_duration=0.0, max_cps=10.0)
+        writer = SrtWriter(output, rules)
+
+        # 20 characters in 0.5 seconds, followed by another cue a second later
+        writer.write_response(make_response(timed_items(('abcdefghij', 0.0, 0.25), ('abcdefghi', 0.25, 0.5)), resp_type='captions'))
+        writer.write_response(make_response(timed_items(('next', 1.5, 2.0)), resp_type='captions'))
+        writer.close()
+
+        self.assertIn('00:00:00,000 --> 00:00:01,500\n', output.getvalue())
+        self.assertEqual(2, writer.cues_written)
+
+    def test_start_pts_time_base(self):
+        output = io.StringIO()
+        response = make_response(timed_items(('Welcome', 0.2, 0.71)), resp_type='captions', start_pts_offset=4000.0)
+        WebVttWriter(output, time_base='start_pts').write_responses([response])
+
+        self.assertTrue(output.getvalue().startswith('WEBVTT\n\n1\n01:06:40.200 --> 01:06:41.200\nWelcome\n'))
+
+    def test_webvtt_escapes(self):
+        output = io.StringIO()
+        WebVttWriter(output).write_responses(RESPONSES)
+        self.assertIn('&amp; yours', output.getvalue())
+
+    def test_ttml(self):
+        output = io.StringIO()
+        TtmlWriter(output).write_responses(RESPONSES)
+
+        root = ElementTree.fromstring(output.getvalue())
+        paragraphs = root.findall('.//{http://www.w3.org/ns/ttml}p')
+        self.assertEqual('en-US', root.get('{http://www.w3.org/XML/1998/namespace}lang'))
+        self.assertEqual('00:00:00.200', paragraphs[0].get('begin'))
+        self.assertEqual(len(paragraphs), 2)
+
+    def test_ttml_language_of_single_cue(self):
+        # the only cue is written on close(), with no response to take the language from
+        output = io.StringIO()
+        TtmlWriter(output).write_responses([make_response(timed_items(('bonjour', 0.0, 1.0)), resp_type='captions',
+                                                          language_code='fr-FR')])
+
+        root = ElementTree.fromstring(output.getvalue())
+        self.assertEqual('fr-FR', root.get('{http://www.w3.org/XML/1998/namespace}lang'))
+        self.assertEqual(1, len(root.findall('.//{http://www.w3.org/ns/ttml}p')))
+
+    def test_only_final_captions_are_written(self):
+        output = io.StringIO()
+        writer = SrtWriter(output)
+        writer.write_response(make_response(timed_items(('partial', 0.0, 1.0)), is_final=False))
+        writer.write_response(make_response(timed_items(('final', 0.0, 1.0))))
+        writer.close()
+
+        self.assertEqual('', output.getvalue())
+
+    def test_tee_passes_responses_through(self):
+        output = io.StringIO()
+        self.assertEqual(RESPONSES, list(SrtWriter(output).tee(iter(RESPONSES))))
+        self.assertTrue(output.getvalue())
+
+    def test_flushes(self):
+        responses = [make_response(timed_items(word), resp_type='captions') for word in (('one', 0.0, 1.0), ('two', 2.0, 3.0))]
+
+        # by default, the output is only flushed at the end of stream (or on flush() or close())
+        output = _FlushCountingIO()
+        writer = SrtWriter(output)
+        for response in responses:
+            writer.write_response(response)
+        self.assertEqual((0, 1), (output.flushes, writer.cues_written))
+        writer.write_response(make_response(timed_items(('three', 4.0, 5.0)), resp_type='captions', is_end_of_stream=True))
+        self.assertEqual((1, 3), (output.flushes, writer.cues_written))
+
+        # or after each response whose cues were written
+        output = _FlushCountingIO()
+        writer = SrtWriter(output, flush_each_response=True)
+        for response in responses:
+            writer.write_response(response)
+        self.assertEqual((1, 1), (output.flushes, writer.cues_written))
+
+    def test_invalid_time_base(self):
+        with self.assertRaises(ValueError):
+            SrtWriter(io.StringIO(), time_base='start_epoch')
@@ -0,0 +1,88 @@
+# Channel fan-out tests:
+import struct
+import unittest
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit import channel_fanout
+
+if channel_fanout.np is not None:
+    from verbit.channel_fanout import ChannelFanout, deinterleave
+
+
+def _interleaved(frames: int, num_channels: int) -> bytes:
+    """16-bit samples, whose value is: channel * 1000 + frame index."""
+    return b''.join(struct.pack('<h', channel * 1000 + i) for i in range(frames) for channel in range(num_channels))
+
+
+def _samples(data: bytes) -> list:
+    return list(struct.unpack(f'<{len(data) // 2}h', data))
+
+
+@unittest.skipIf(channel_fanout.np is None, 'NumPy is not installed')
+class TestChannelFanout(unittest.TestCase):
+
+    def test_deinterleave(self):
+        view = deinterleave(_interleaved(4, 3), num_channels=3, sample_width=2)
+        self.assertEqual((3, 4, 2), view.shape)
+        self.assertEqual([2000, 2001, 2002, 2003], _samples(view[2].tobytes()))
+
+        # a view, not a copy
+        self.assertFalse(view.flags.owndata)
+
+    def test_media_generators(self):
+        data = _interleaved(100, 3)
+
+        # chunks split mid-frame
+        chunks = [data[i:i + 97] for i in range(0, len(data), 97)]
+        fanout = ChannelFanout(iter(chunks), MediaConfig(num_channels=3), channels=[0, 2], labels=['left', 'right'])
+        self.assertEqual(1, fanout.channel_media_config.num_channels)
+
+        left = b''.join(fanout.media_generator(0))
+        right = b''.join(fanout.media_generator(1))
+        self.assertEqual(list(range(100)), _samples(left))
+        self.assertEqual(list(range(2000, 2100)), _samples(right))
+        self.assertEqual(len(data), fanout.metrics.source_bytes)
+
+    def test_source_error(self):
+        def media_generator():
+            yield _interleaved(10, 2)
+            raise IOError('capture failed')
+
+        fanout = ChannelFanout(media_generator(), MediaConfig(num_channels=2))
+        channel = fanout.media_generator(1)
+        self.assertEqual(list(range(1000, 1010)), _samples(next(channel)))
+        with self.assertRaises(IOError):
+            next(channel)
+
+    def test_invalid_channels(self):
+        with self.assertRaises(ValueError):
+            ChannelFanout(iter([]), MediaConfig(num_channels=2), channels=[2])
+        with self.assertRaises(ValueError):
+            ChannelFanout(iter([]), MediaConfig(num_channels=2), labels=['a'])
+
+    def test_start_streams(self):
+        media_config = MediaConfig(num_channels=2)
+        chunks = synthetic_media(media_config, 2.0)
+
+        fanout = ChannelFanout(iter(chunks), media_config, labels=['host', 'guest'])
+        clients = [WebSocketStreamingClient(customer_token='stand-in') for _ in fanout.labels]
+        with StandInServer() as server:
+            responses = list(fanout.start_streams(clients, [server.url] * 2))
+
+        # each channel's session transcribed its 2 seconds of media, and ended
+        for label in fanout.labels:
+            channel_responses = [response for response_label, response in responses if response_label == label]
+            self.assertTrue(channel_responses[-1]['response']['is_end_of_stream'])
+            self.assertAlmostEqual(2.0, channel_responses[-1]['response']['end'])
+
+    def test_benchmark(self):
+        result = channel_fanout.benchmark(num_channels=2, media_seconds=1.0)
+        self.assertEqual(2, result.channels)
+        self.assertAlmostEqual(1.0, result.media_seconds)
+        self.assertGreater(result.responses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
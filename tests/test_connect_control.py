@@ -0,0 +1,161 @@
+# Connect attempts coordination tests:
+import time
+import unittest
+import threading
+import urllib.error
+import websocket
+from unittest.mock import patch
+
+from tenacity import RetryError
+
+from verbit.streaming_client import WebSocketStreamingClient
+from verbit.connect_control import ConnectionGovernor, ConnectPriority, ConnectThrottledError, CircuitState
+
+from tests.common import mock_get_auth_token
+
+
+class _FailingAuth:
+    """An auth transport whose requests fail with `error`."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def post_json(self, url, payload):
+        raise self.error
+
+
+class TestConnectionGovernor(unittest.TestCase):
+
+    def test_burst_then_rate_limited(self):
+        governor = ConnectionGovernor(rate=50.0, burst=3)
+
+        # the burst is admitted at once
+        started_at = time.monotonic()
+        for _ in range(3):
+            governor.acquire()
+        self.assertLess(time.monotonic() - started_at, 0.01)
+
+        # further attempts wait for tokens to refill
+        for _ in range(5):
+            governor.acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 5 / 50.0 * 0.9)
+
+        metrics = governor.metrics
+        self.assertEqual(8, metrics.admitted)
+        self.assertGreaterEqual(metrics.throttled, 4)
+
+    def test_not_throttled_without_waiting(self):
+        governor = ConnectionGovernor(rate=50.0, burst=3)
+        for _ in range(3):
+            governor.acquire()
+
+        metrics = governor.metrics
+        self.assertEqual((3, 0, 0.0), (metrics.admitted, metrics.throttled, metrics.total_wait_seconds))
+
+    def test_timeout_raises(self):
+        governor = ConnectionGovernor(rate=0.1, burst=1)
+        governor.acquire()
+
+        with self.assertRaises(ConnectThrottledError):
+            governor.acquire(timeout=0.01)
+
+        self.assertEqual(1, governor.metrics.rejected)
+
+    def test_live_before_batch(self):
+        governor = ConnectionGovernor(rate=10.0, burst=1)
+        governor.acquire()
+
+        admitted = []
+
+        def connect(priority, name):
+            governor.acquire(priority)
+            admitted.append(name)
+
+        # a batch attempt is waiting first, then a live attempt arrives
+        threads = []
+        for waiting, priority, name in ((1, ConnectPriority.Batch, 'batch'), (2, ConnectPriority.Live, 'live')):
+            threads.append(threading.Thread(target=connect, args=(priority, name)))
+            threads[-1].start()
+            while governor.metrics.waiting < waiting:
+                time.sleep(0.001)
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['live', 'batch'], admitted)
+
+    def test_circuit_opens_and_probes(self):
+        governor = ConnectionGovernor(rate=1000.0, burst=10, failure_threshold=2, reset_timeout=0.05)
+
+        for _ in range(2):
+            governor.acquire()
+            governor.record_failure()
+        self.assertEqual(CircuitState.OPEN, governor.metrics.circuit_state)
+
+        # blocked while open
+        with self.assertRaises(ConnectThrottledError):
+            governor.acquire(timeout=0.01)
+
+        # probing attempt is admitted after the reset timeout, and closes the circuit on success
+        governor.acquire(timeout=1.0)
+        self.assertEqual(CircuitState.HALF_OPEN, governor.metrics.circuit_state)
+        governor.record_success()
+
+        metrics = governor.metrics
+        self.assertEqual(CircuitState.CLOSED, metrics.circuit_state)
+        self.assertEqual(1, metrics.circuit_opens)
+
+    def test_failed_probe_reopens_circuit(self):
+        governor = ConnectionGovernor(rate=1000.0, burst=10, failure_threshold=1, reset_timeout=0.02)
+
+        governor.acquire()
+        governor.record_failure()
+        governor.acquire(timeout=1.0)
+        governor.record_failure()
+
+        self.assertEqual(CircuitState.OPEN, governor.metrics.circuit_state)
+        self.assertEqual(2, governor.metrics.circuit_opens)
+
+    def test_shared_governor(self):
+        self.assertIs(ConnectionGovernor.shared(), ConnectionGovernor.shared())
+
+    @patch('verbit.streaming_client.WebSocketStreamingClient._get_auth_token', mock_get_auth_token)
+    def test_client_connect_failures_open_circuit(self):
+        governor = ConnectionGovernor(rate=1000.0, burst=10, failure_threshold=1, reset_timeout=60.0)
+        client = WebSocketStreamingClient(customer_token='ABCD')
+        client.connect_governor = governor
+        client.max_connection_retry_seconds = 1.0
+
+        def mock_connect_fail(_self, *_args, **_kwargs):
+            raise websocket.WebSocketException("Connection rejected by mocking")
+
+        with patch('verbit.streaming_client.WebSocket.connect', mock_connect_fail):
+            with self.assertRaises(RetryError):
+                client.start_stream(ws_url='fake-ws-url', media_generator=iter([b'\x00\x00']))
+
+        # the circuit opened after the first failure, and further attempts were not admitted
+        metrics = governor.metrics
+        self.assertEqual(1, metrics.failures)
+        self.assertEqual(CircuitState.OPEN, metrics.circuit_state)
+        self.assertGreaterEqual(metrics.rejected, 1)
+
+    def test_client_auth_failures_open_circuit(self):
+        governor = ConnectionGovernor(rate=1000.0, burst=10, failure_threshold=1, reset_timeout=60.0)
+        client = WebSocketStreamingClient(customer_token='ABCD')
+        client.connect_governor = governor
+
+        # the auth service rejecting the request is not a failure of the service
+        client.auth_transport = _FailingAuth(urllib.error.HTTPError('https://auth', 401, 'Unauthorized', None, None))
+        with self.assertRaises(urllib.error.HTTPError):
+            client._request_auth_token()
+        self.assertEqual((1, 0, CircuitState.CLOSED), (governor.metrics.successes, governor.metrics.failures, governor.metrics.circuit_state))
+
+        # an auth outage is
+        client.auth_transport = _FailingAuth(ConnectionRefusedError('Auth service is down'))
+        with self.assertRaises(ConnectionRefusedError):
+            client._request_auth_token()
+        self.assertEqual((1, CircuitState.OPEN), (governor.metrics.failures, governor.metrics.circuit_state))
+
+
+if __name__ == '__main__':
+    unittest.main()
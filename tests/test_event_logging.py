@@ -0,0 +1,135 @@
+# Event logging tests:
+import time
+import logging
+import unittest
+
+from threading import Event
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit.event_logging import LogEvent, EventLogger, NonBlockingHandler
+
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    @property
+    def messages(self) -> list:
+        return [record.getMessage() for record in self.records]
+
+
+def _logger(name: str, level: int = logging.DEBUG) -> (logging.Logger, _ListHandler):
+    logger = logging.getLogger(f'test_event_logging.{name}')
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = _ListHandler()
+    logger.handlers = [handler]
+    return logger, handler
+
+
+class TestEventLogger(unittest.TestCase):
+
+    def test_plain_logger(self):
+        logger, handler = _logger('plain')
+        logger.debug(LogEvent('event_sent', 'Sending event: event={event!r}', event='EOS'))
+        self.assertEqual(["Sending event: event='EOS'"], handler.messages)
+
+    def test_key_values(self):
+        logger, handler = _logger('key_values')
+        events = EventLogger(logger, session_id='order-1')
+        events.info(LogEvent('connected', 'Connected to {url}', url='wss://host/ws?a=1', attempt=2, payload=b'ab cd'))
+        events.warning('Media stream already finished!')
+
+        self.assertEqual(['connected url="wss://host/ws?a=1" attempt=2 payload="ab cd" session_id=order-1',
+                          'message="Media stream already finished!" session_id=order-1'], handler.messages)
+        record = handler.records[0]
+        self.assertEqual(('connected', 'order-1', 2), (record.event, record.session_id, record.fields['attempt']))
+        self.assertIsNone(handler.records[1].event)
+
+    def test_rate_limit(self):
+        logger, handler = _logger('rate_limit')
+        events = EventLogger(logger, rate_limits={'ping_received': 20.0})
+        for _ in range(5):
+            events.debug(LogEvent('ping_received', 'Ping', payload='abcd'))
+            events.debug(LogEvent('other', 'Other'))
+        time.sleep(0.1)
+        events.debug(LogEvent('ping_received', 'Ping', payload='abcd'))
+
+        self.assertEqual(['ping_received payload=abcd'] + ['other'] * 5 + ['ping_received payload=abcd suppressed=4'],
+                         [handler.messages[0]] + handler.messages[1:6] + [handler.messages[-1]])
+        self.assertEqual(4, events.suppressed)
+
+    def test_disabled_level(self):
+        logger, handler = _logger('disabled', level=logging.INFO)
+        events = EventLogger(logger)
+        events.debug(LogEvent('event_sent', 'Sending'))
+        self.assertEqual([], handler.records)
+
+
+class TestNonBlockingHandler(unittest.TestCase):
+
+    def test_order(self):
+        logger, target = _logger('order')
+        handler = NonBlockingHandler(target)
+        logger.handlers = [handler]
+        for i in range(100):
+            logger.info('message %d', i)
+        handler.close()
+        self.assertEqual([f'message {i}' for i in range(100)], target.messages)
+
+    def test_drop_when_full(self):
+        release = Event()
+
+        class BlockedHandler(_ListHandler):
+            def emit(self, record):
+                release.wait()
+                super().emit(record)
+
+        logger, _ = _logger('full')
+        target = BlockedHandler()
+        handler = NonBlockingHandler(target, max_queued=4)
+        logger.handlers = [handler]
+
+        started_at = time.monotonic()
+        for i in range(20):
+            logger.info('message %d', i)
+        self.assertLess(time.monotonic() - started_at, 1.0)
+
+        release.set()
+        handler.close()
+        self.assertEqual(20, len(target.records) + handler.dropped)
+        self.assertGreaterEqual(handler.dropped, 15)
+
+
+class TestClientEvents(unittest.TestCase):
+
+    def test_default_logger(self):
+        root_handlers = list(logging.getLogger().handlers)
+        client = WebSocketStreamingClient(customer_token='stand-in')
+
+        self.assertEqual(logging.INFO, client._logger.level)
+        self.assertFalse(client._logger.isEnabledFor(logging.DEBUG))
+        self.assertEqual(root_handlers, logging.getLogger().handlers)
+
+    def test_stream(self):
+        logger, handler = _logger('client')
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.set_logger(EventLogger(logger, session_id='order-1'))
+        with StandInServer() as server:
+            responses = list(client.start_stream(ws_url=server.url, media_generator=iter(synthetic_media(MediaConfig(), 1.0))))
+
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+        sent = [record for record in handler.records if record.event == 'event_sent']
+        self.assertEqual('EOS', sent[0].fields['event'])
+        self.assertTrue(all(record.session_id == 'order-1' for record in handler.records))
+
+
+if __name__ == '__main__':
+    unittest.main()
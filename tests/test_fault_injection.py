@@ -0,0 +1,46 @@
+# Recovery from injected network faults tests:
+import unittest
+
+from verbit.fault_injection import measure_recovery, Fault
+
+
+class TestFaultRecovery(unittest.TestCase):
+
+    def _measure(self, fault, media_seconds=2.0):
+        result = measure_recovery(fault, media_seconds=media_seconds, fault_at_seconds=0.5, fault_duration_seconds=0.5, socket_timeout=1.0)
+        self.assertIsNone(result.error)
+        self.assertIsNotNone(result.time_to_recover_seconds)
+        return result
+
+    def test_degradations_lose_no_audio(self):
+        for fault in (Fault.LATENCY, Fault.JITTER, Fault.BANDWIDTH):
+            with self.subTest(fault=fault):
+                result = self._measure(fault)
+                self.assertEqual(1, result.connections)
+                self.assertEqual(0.0, result.audio_lost_seconds)
+                self.assertLess(result.time_to_recover_seconds, 1.0)
+
+    def test_reset(self):
+        result = self._measure(Fault.RESET)
+        self.assertGreaterEqual(result.connections, 2)
+        self.assertLess(result.time_to_recover_seconds, 1.0)
+        self.assertLessEqual(result.audio_lost_seconds, 0.5)
+
+    def test_going_away(self):
+        result = self._measure(Fault.GOING_AWAY)
+        self.assertGreaterEqual(result.connections, 2)
+        self.assertLess(result.time_to_recover_seconds, 1.0)
+        self.assertLessEqual(result.audio_lost_seconds, 0.5)
+
+    def test_half_open_detected_by_socket_timeout(self):
+        # injected as the next response is received, and detected a socket timeout later: with media to recover
+        result = self._measure(Fault.HALF_OPEN, media_seconds=3.0)
+        self.assertGreaterEqual(result.connections, 2)
+
+        # detected once the socket timed out
+        self.assertGreaterEqual(result.time_to_recover_seconds, 1.0)
+        self.assertLess(result.time_to_recover_seconds, 3.0)
+
+    def test_unknown_fault(self):
+        with self.assertRaises(ValueError):
+            measure_recovery('meteor')
@@ -0,0 +1,87 @@
+# Columnar item accumulation tests:
+import os
+import math
+import tempfile
+import unittest
+
+from verbit.item_columns import ItemColumns, KIND_PUNCT, np
+
+from tests.common import spaced_items, make_response
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class TestItemColumns(unittest.TestCase):
+
+    def _columns(self):
+        columns = ItemColumns(initial_capacity=2)
+        responses = [make_response(spaced_items(['hello', 'world', '.']), start_pts_offset=10.0, start_epoch=1000.0),
+                     make_response(spaced_items(['ignored'], 1.0), is_final=False, start_pts_offset=10.0),
+                     make_response(spaced_items(['hello', 'again'], 2.0, speaker_id='s2'), start_pts_offset=10.0)]
+        self.assertEqual(responses, list(columns.tee(responses, session_id='a')))
+        columns.add_response(make_response(spaced_items(['hola']), language_code='es-ES', start_pts_offset=10.0), session_id='b')
+        return columns
+
+    def test_accumulate(self):
+        columns = self._columns()
+        items = columns.items
+
+        self.assertEqual(6, len(columns))
+        self.assertEqual(['hello', 'world', '.', 'hello', 'again', 'hola'], columns.decode('value', items['value']).tolist())
+        self.assertEqual(['hello', 'world', '.', 'again', 'hola'], columns.values)
+        self.assertEqual([0, 0, 0, 0, 0, 1], items['session'].tolist())
+        self.assertEqual(['s1', 's1', 's1', 's2', 's2', 's1'], columns.decode('speaker', items['speaker']).tolist())
+        self.assertEqual([('transcription', 'en-US'), ('transcription', 'es-ES')], columns.languages)
+        self.assertEqual([KIND_PUNCT], items['kind'][items['kind'] != 0].tolist())
+        self.assertEqual([10.0, 10.5, 11.0, 12.0, 12.5, 10.0], items['start_pts'].tolist())
+        self.assertEqual([1000.0, 1000.5], items['start_epoch'][:2].tolist())
+        self.assertTrue(math.isnan(items['start_epoch'][3]))
+
+        # vectorized aggregation: speaker turns of session 'a'
+        speakers = items['speaker'][items['session'] == 0]
+        self.assertEqual(1, int(np.count_nonzero(speakers[1:] != speakers[:-1])))
+
+    def test_views(self):
+        columns = self._columns()
+        view = columns[1:3]
+        self.assertTrue(np.shares_memory(view, columns.items))
+        view['end'] += 1.0
+        self.assertEqual([1.9, 2.4], columns.items['end'][1:3].tolist())
+
+        # a view taken before growth still refers to the items accumulated by then
+        columns.add_responses([make_response(spaced_items(['more'] * 100, 10.0), start_pts_offset=10.0)])
+        self.assertEqual(2, len(view))
+        self.assertEqual(106, len(columns))
+        self.assertEqual(columns.items['value'][-1], columns.values.index('more'))
+
+    def test_save_and_load(self):
+        columns = self._columns()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'items.npz')
+            columns.save(path)
+            loaded = ItemColumns.load(path)
+
+        for field in loaded.items.dtype.names:
+            self.assertTrue(np.array_equal(columns.items[field], loaded.items[field], equal_nan=field == 'start_epoch'), field)
+        self.assertEqual((columns.values, columns.speakers, columns.sessions, columns.languages),
+                         (loaded.values, loaded.speakers, loaded.sessions, loaded.languages))
+
+        loaded.add_response(make_response(spaced_items(['again'], 20.0), start_pts_offset=10.0), session_id='a')
+        self.assertEqual((7, 0, columns.values.index('again')), (len(loaded), loaded.items['session'][-1], loaded.items['value'][-1]))
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        table = self._columns().to_arrow()
+        self.assertEqual(6, table.num_rows)
+        self.assertEqual(['hello', 'world', '.', 'hello', 'again', 'hola'], table.column('value').to_pylist())
+        self.assertEqual(['a'] * 5 + ['b'], table.column('session_id').to_pylist())
+        self.assertEqual('es-ES', table.column('language_code').to_pylist()[-1])
+        self.assertEqual('punct', table.column('kind').to_pylist()[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
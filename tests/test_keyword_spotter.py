@@ -0,0 +1,87 @@
+# Keyword spotting tests:
+import unittest
+
+from verbit.keyword_spotter import KeywordAutomaton, KeywordSpotter, normalize_word
+
+from tests.common import timed_items, make_response
+
+
+class TestKeywordAutomaton(unittest.TestCase):
+
+    def _spot(self, automaton, text):
+        node, found = automaton.ROOT, []
+        for word in text.split():
+            node, indices = automaton.step(node, normalize_word(word))
+            found.extend(automaton.keywords[i] for i in indices)
+        return found
+
+    def test_overlapping_keywords(self):
+        automaton = KeywordAutomaton(['new york', 'york city', 'new york city hall', 'city', 'New York', '...'])
+        self.assertEqual(['new york', 'york city', 'city'], self._spot(automaton, 'in new york city'))
+        self.assertEqual(['new york', 'york city', 'city'], self._spot(automaton, 'new york city tour'))
+        self.assertEqual(['new york', 'york city', 'city', 'new york city hall'], self._spot(automaton, 'new york city hall'))
+        self.assertEqual(['new york'], self._spot(automaton, 'new new york'))
+        self.assertEqual(['new york'], self._spot(automaton, 'NEW, York!'))
+
+        # duplicate and empty keywords are dropped
+        self.assertEqual(['new york', 'york city', 'new york city hall', 'city'], automaton.keywords)
+        self.assertEqual(4, automaton.max_length)
+
+
+class TestKeywordSpotter(unittest.TestCase):
+
+    def _events(self, events):
+        return [(event.kind, event.match.keyword, event.match.start, event.match.is_final) for event in events]
+
+    def test_partial_revisions(self):
+        spotter = KeywordSpotter(['speech recognition', 'verbit'])
+
+        # spotted once, over revisions of an utterance
+        self.assertEqual([('spotted', 'verbit', 0.0, False)],
+                         self._events(spotter.feed(make_response(timed_items(('Verbit', 0.0, 0.4), ('speech', 0.5, 0.9)), is_final=False))))
+        self.assertEqual([('spotted', 'speech recognition', 0.5, False)],
+                         self._events(spotter.feed(make_response(timed_items(('Verbit,', 0.0, 0.4), ('speech', 0.5, 0.9), ('recognition', 1.0, 1.6)), is_final=False))))
+
+        # a revision without the phrase retracts it, and the final response confirms what remains
+        self.assertEqual([('retracted', 'speech recognition', 0.5, False)],
+                         self._events(spotter.feed(make_response(timed_items(('Verbit', 0.0, 0.4), ('speeches', 0.5, 1.0), ('rock', 1.1, 1.6)), is_final=False))))
+        events = spotter.feed(make_response(timed_items(('Verbit', 0.0, 0.42), ('speeches', 0.5, 1.0), ('rock', 1.1, 1.6), ('.', 1.6, 1.6)), start_pts_offset=100.0))
+        self.assertEqual([('confirmed', 'verbit', 0.0, True)], self._events(events))
+        self.assertEqual(0.42, events[0].match.end)
+        self.assertEqual(100.0, events[0].match.start_pts)
+
+    def test_final_only(self):
+        spotter = KeywordSpotter(['verbit'], partials=False)
+        self.assertEqual([], spotter.feed(make_response(timed_items(('verbit', 0.0, 0.4)), is_final=False)))
+        self.assertEqual([('spotted', 'verbit', 0.0, True)],
+                         self._events(spotter.feed(make_response(timed_items(('verbit', 0.0, 0.4))))))
+
+    def test_phrase_spanning_utterances(self):
+        spotter = KeywordSpotter(KeywordAutomaton(['thank you very much']))
+        spotter.feed(make_response(timed_items(('thank', 0.0, 0.3), ('you', 0.3, 0.5))))
+        self.assertEqual([('spotted', 'thank you very much', 0.0, False)],
+                         self._events(spotter.feed(make_response(timed_items(('very', 2.0, 2.3), ('much', 2.3, 2.6)), is_final=False))))
+        self.assertEqual([('confirmed', 'thank you very much', 0.0, True)],
+                         self._events(spotter.feed(make_response(timed_items(('very', 2.0, 2.3), ('much', 2.3, 2.6))))))
+
+    def test_streams_are_separate(self):
+        spotter = KeywordSpotter(['hola'])
+        self.assertEqual([('spotted', 'hola', 0.0, False)], self._events(spotter.feed(make_response(timed_items(('hola', 0.0, 0.4)), is_final=False))))
+        events = spotter.feed(make_response(timed_items(('hola', 0.0, 0.4)), service_type='translation', language_code='es-ES', is_final=False))
+        self.assertEqual([('spotted', 'hola', 0.0, False)], self._events(events))
+        self.assertEqual('es-ES', events[0].match.language_code)
+
+        # the transcription stream's partial isn't retracted by the translation's
+        self.assertEqual([('retracted', 'hola', 0.0, False)],
+                         self._events(spotter.feed(make_response(timed_items(('hello', 0.0, 0.4)), service_type='translation', language_code='es-ES', is_final=False))))
+
+    def test_repeated_keyword(self):
+        spotter = KeywordSpotter(['no'])
+        self.assertEqual([('spotted', 'no', 0.0, False), ('spotted', 'no', 0.3, False)],
+                         self._events(spotter.feed(make_response(timed_items(('no', 0.0, 0.3), ('no', 0.3, 0.6)), is_final=False))))
+        self.assertEqual([('confirmed', 'no', 0.0, True), ('confirmed', 'no', 0.3, True)],
+                         self._events(spotter.spot([make_response(timed_items(('no', 0.0, 0.3), ('no', 0.3, 0.6)))])))
+
+
+if __name__ == '__main__':
+    unittest.main()
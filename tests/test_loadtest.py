@@ -0,0 +1,57 @@
+# Load generator tests:
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from verbit.cli import main
+from verbit.loadtest import percentile, synthetic_media, run_load_test
+from verbit.streaming_client import MediaConfig
+from verbit.stand_in_server import StandInServer
+
+
+class TestLoadTest(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertEqual(100, percentile(values, 100))
+        self.assertEqual(7, percentile([7], 99))
+        self.assertIsNone(percentile([], 50))
+
+    def test_synthetic_media(self):
+        chunks = synthetic_media(MediaConfig(num_channels=2), duration_seconds=1.0, chunk_seconds=0.1)
+        self.assertEqual(10, len(chunks))
+        self.assertEqual(1600 * 2 * 2, len(chunks[0]))
+
+    def test_run_load_test(self):
+        media_config = MediaConfig()
+        chunks = synthetic_media(media_config, duration_seconds=1.0)
+
+        with StandInServer() as server:
+            report = run_load_test(sessions=4, ws_url=server.url, media_config=media_config, chunks=chunks, rate=4.0, ramp_up_seconds=0.1)
+
+        self.assertEqual(0, report.failed, report.errors)
+        self.assertEqual(4, server.accepted)
+        self.assertAlmostEqual(4.0, report.media_seconds)
+
+        # responses every half second of media, and the EOS response
+        self.assertEqual(4 * 3, report.responses)
+        for val in (report.connect_p50, report.first_response_p50, report.latency_p50, report.latency_p99):
+            self.assertIsNotNone(val)
+            self.assertGreaterEqual(val, 0.0)
+        self.assertLessEqual(report.latency_p50, report.latency_p99)
+        self.assertLessEqual(0.0, report.receive_cpu_p50)
+        self.assertLessEqual(report.receive_cpu_p50, report.receive_cpu_p99)
+        self.assertIn('receive CPU:', report.format())
+
+    def test_cli_with_local_stand_in(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = main(['loadtest', '--sessions', '2', '--duration', '0.5', '--rate', '0', '--json'])
+
+        self.assertEqual(0, exit_code)
+        report = json.loads(output.getvalue())
+        self.assertEqual(2, report['sessions'])
+        self.assertEqual(0, report['failed'])
@@ -0,0 +1,95 @@
+# Media spool tests:
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from verbit.media_spool import MediaSpool
+
+
+class TestMediaSpool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = MediaSpool(directory=self.directory, segment_bytes=64, max_bytes=256)
+        self.addCleanup(self.spool.close)
+
+    def test_chunks_drain_in_order_across_segments(self):
+        spool = MediaSpool(directory=self.directory, segment_bytes=64, max_bytes=1024)
+        self.addCleanup(spool.close)
+
+        chunks = [bytes([i]) * 20 for i in range(10)]
+        for chunk in chunks:
+            spool.append(chunk)
+        spool.finish()
+
+        self.assertEqual(5, spool.metrics.segments)
+        self.assertEqual(chunks, list(spool._drain_generator(bytes_per_second=10 ** 9)))
+
+        # fully drained segments are removed, except for the one being written
+        self.assertEqual(1, len(os.listdir(self.directory)))
+        self.assertEqual(0, spool.metrics.depth_bytes)
+
+    def test_size_bound_drops_oldest(self):
+        for i in range(100):
+            self.spool.append(bytes([i]) * 20)
+        self.spool.finish()
+
+        metrics = self.spool.metrics
+        self.assertLessEqual(metrics.segments, 4)
+        self.assertGreater(metrics.dropped_bytes, 0)
+
+        # the newest media is kept
+        drained = list(self.spool._drain_generator(bytes_per_second=10 ** 9))
+        self.assertEqual(bytes([99]) * 20, drained[-1])
+
+    def test_expired_media_is_dropped(self):
+        spool = MediaSpool(directory=self.directory, segment_bytes=64, max_bytes=256, ttl_seconds=60)
+        self.addCleanup(spool.close)
+
+        with patch('verbit.media_spool.time.monotonic', return_value=0.0):
+            spool.append(b'old')
+        with patch('verbit.media_spool.time.monotonic', return_value=100.0):
+            spool.append(b'new')
+            spool.finish()
+            self.assertEqual([b'new'], list(spool._drain_generator(bytes_per_second=10 ** 9)))
+
+        self.assertEqual(3, spool.metrics.expired_bytes)
+
+    def test_write_through_catches_up_at_controlled_rate(self):
+
+        spool = MediaSpool(directory=self.directory, segment_bytes=1024, max_bytes=16 * 1024)
+        self.addCleanup(spool.close)
+
+        # an outage: 10 chunks of 0.01 seconds each are spooled before draining starts
+        chunks = [b'\x00' * 320 for _ in range(10)]
+        drain = spool.write_through(iter(chunks), bytes_per_second=32000)
+        while spool.metrics.spooled_bytes < 3200:
+            time.sleep(0.001)
+
+        started_at = time.monotonic()
+        self.assertEqual(chunks, list(drain))
+        elapsed = time.monotonic() - started_at
+
+        # 0.1 seconds of media, drained at 1.25 times realtime (only chunks following a spooled chunk are delayed)
+        self.assertGreaterEqual(elapsed, 0.08 / MediaSpool.DEFAULT_CATCH_UP_RATE * 0.9)
+        self.assertGreater(spool.metrics.drain_rate, 0.0)
+
+    def test_write_through_propagates_media_errors(self):
+        ex = RuntimeError('Testing error propagation')
+
+        def evil_media_gen():
+            yield b'fake'
+            raise ex
+
+        drain = self.spool.write_through(evil_media_gen(), bytes_per_second=32000)
+        self.assertEqual(b'fake', next(drain))
+        with self.assertRaises(RuntimeError):
+            next(drain)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            MediaSpool(directory=self.directory, segment_bytes=64, max_bytes=100)
+        with self.assertRaises(ValueError):
+            MediaSpool(directory=self.directory, catch_up_rate=0.5)
@@ -0,0 +1,132 @@
+# Media timeline tests:
+import unittest
+
+from threading import Event
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig, _MediaPump
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit.media_timeline import MediaTimeline, MediaChunk
+
+
+class _Connection:
+    pass
+
+
+class TestMediaTimeline(unittest.TestCase):
+
+    def test_locate(self):
+        timeline = MediaTimeline(bytes_per_second=100)
+        self.assertIsNone(timeline.locate(0.0))
+
+        timeline.start_connection()
+        timeline.record(50, sent_at=1.0)
+        timeline.record(50, sent_at=2.0)
+        self.assertEqual(100, timeline.sent_bytes)
+        self.assertEqual(1.0, timeline.sent_seconds)
+
+        self.assertEqual(1.0, timeline.locate(0.2).sent_at)
+        self.assertEqual(2.0, timeline.locate(0.7).sent_at)
+
+        # a frame boundary is located in the frame ending there
+        self.assertEqual(1.0, timeline.locate(0.5).sent_at)
+        self.assertEqual(2.0, timeline.locate(1.0).sent_at)
+
+        # media not sent yet
+        self.assertIsNone(timeline.locate(1.1))
+
+    def test_connections(self):
+        timeline = MediaTimeline(bytes_per_second=100)
+        first, second = _Connection(), _Connection()
+
+        timeline.start_connection(first)
+        timeline.record(100, sent_at=1.0)
+        timeline.start_connection(second)
+        timeline.record(100, sent_at=2.0)
+        self.assertEqual(1.0, timeline.connection_offset_seconds)
+
+        # times are relative to the start of their connection
+        position = timeline.locate(0.5)
+        self.assertEqual(1.5, position.stream_seconds)
+        self.assertEqual(2.0, position.sent_at)
+        self.assertEqual(1.0, timeline.locate(0.5, connection=first).sent_at)
+        self.assertEqual(2.0, timeline.locate_response({'response': {'end': 0.5}}, connection=second).sent_at)
+        self.assertIsNone(timeline.locate_response({'response': {}}))
+
+    def test_connection_stream_seconds(self):
+        timeline = MediaTimeline(bytes_per_second=100)
+        first, second = _Connection(), _Connection()
+        self.assertEqual(0.0, timeline.connection_stream_seconds())
+
+        timeline.start_connection(first)
+        timeline.record(100, sent_at=1.0)
+        timeline.skip(300)
+        timeline.start_connection(second)
+        timeline.record(100, sent_at=2.0)
+
+        # the skipped media is part of the stream, not of the sent media
+        self.assertEqual(0.0, timeline.connection_stream_seconds(first))
+        self.assertEqual(4.0, timeline.connection_stream_seconds(second))
+        self.assertEqual(4.0, timeline.connection_stream_seconds())
+
+    def test_pts(self):
+        timeline = MediaTimeline(bytes_per_second=100)
+        timeline.record(100, sent_at=1.0)
+        self.assertIsNone(timeline.locate(0.5).pts)
+
+        # untagged frames after a tagged one are extrapolated
+        timeline.record(100, sent_at=2.0, pts=50.0)
+        timeline.record(100, sent_at=3.0)
+        self.assertAlmostEqual(50.5, timeline.locate(1.5).pts)
+        self.assertAlmostEqual(51.25, timeline.locate(2.25).pts)
+
+    def test_bounded(self):
+        timeline = MediaTimeline(bytes_per_second=100, max_frames=4)
+        for i in range(20):
+            timeline.record(10, sent_at=float(i))
+        self.assertLessEqual(len(timeline), 8)
+        self.assertEqual(200, timeline.sent_bytes)
+        self.assertIsNone(timeline.locate(0.05))
+        self.assertEqual(19.0, timeline.locate(2.0).sent_at)
+
+
+class TestMediaChunk(unittest.TestCase):
+
+    def test_chunk(self):
+        chunk = MediaChunk(b'abcd', pts=12.5)
+        self.assertEqual(b'abcd', chunk)
+        self.assertEqual(12.5, chunk.pts)
+        self.assertNotIsInstance(chunk[2:], MediaChunk)
+
+    def test_pump_keeps_pts(self):
+        pump = _MediaPump(iter([MediaChunk(b'ab', pts=1.0), MediaChunk(b'cd', pts=2.0)]))
+        frame = pump.get_frame(Event(), 4)
+        self.assertEqual(b'abcd', frame)
+        self.assertEqual(1.0, frame.pts)
+
+
+class TestMediaTimelineClient(unittest.TestCase):
+
+    def test_stream(self):
+        media_config = MediaConfig()
+        media = synthetic_media(media_config, 2.0)
+        bytes_per_second = media_config.sample_rate * media_config.sample_width
+        chunks = [MediaChunk(chunk, pts=100.0 + i * len(media[0]) / bytes_per_second) for i, chunk in enumerate(media)]
+
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        with StandInServer() as server:
+            responses = list(client.start_stream(ws_url=server.url, media_generator=iter(chunks), media_config=media_config))
+
+        timeline = client.media_timeline
+        self.assertEqual(sum(map(len, media)), timeline.sent_bytes)
+        self.assertEqual(len(media), len(timeline))
+
+        # each response's end maps to the local time its media was sent, and to its source PTS
+        for response in responses:
+            position = timeline.locate_response(response)
+            self.assertIsNotNone(position)
+            self.assertAlmostEqual(100.0 + response['response']['end'], position.pts)
+
+
+if __name__ == '__main__':
+    unittest.main()
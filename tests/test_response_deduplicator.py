@@ -0,0 +1,101 @@
+# Response de-duplication tests:
+import json
+import unittest
+from unittest.mock import patch
+
+from verbit.response_deduplicator import ResponseDeduplicator
+
+from tests.common import RESPONSES
+
+
+def _response(resp_id, start, end, is_final=False, resp_type='transcript', is_end_of_stream=False):
+    return {'response': {'id': resp_id, 'type': resp_type, 'start': start, 'end': end,
+                         'is_final': is_final, 'is_end_of_stream': is_end_of_stream}}
+
+
+class TestResponseDeduplicator(unittest.TestCase):
+
+    def test_drops_duplicated_ids(self):
+        dedup = ResponseDeduplicator()
+        responses = [json.loads(RESPONSES[k].decode('utf-8')) for k in ('happy_json_resp0', 'happy_json_resp0', 'happy_json_resp1')]
+
+        accepted = list(dedup.filter(responses))
+
+        self.assertEqual([responses[0], responses[2]], accepted)
+        self.assertEqual(1, dedup.duplicates_dropped)
+
+    def test_drops_responses_before_last_final(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 2.0)))
+        self.assertTrue(dedup.accept(_response('b', 0.0, 3.0, is_final=True)))
+
+        # a partial of the already finalized utterance, e.g. re-sent after reconnection
+        self.assertFalse(dedup.accept(_response('c', 0.0, 2.5)))
+
+        # next utterance
+        self.assertTrue(dedup.accept(_response('d', 3.0, 3.5)))
+        self.assertEqual(1, dedup.out_of_order_dropped)
+
+    def test_drops_reordered_partials(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 2.0)))
+        self.assertFalse(dedup.accept(_response('b', 0.0, 1.0)))
+        self.assertTrue(dedup.accept(_response('c', 0.0, 2.5)))
+
+    def test_reset_ordering(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 3.0, is_final=True)))
+        dedup.reset_ordering()
+
+        # a new connection's responses start at zero, its duplicated ids are still dropped
+        self.assertTrue(dedup.accept(_response('b', 0.0, 0.5)))
+        self.assertFalse(dedup.accept(_response('a', 0.0, 3.0, is_final=True)))
+        self.assertEqual((1, 0), (dedup.duplicates_dropped, dedup.out_of_order_dropped))
+
+    def test_offset_seconds(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 3.0, is_final=True)))
+
+        # a new connection's responses, which started at stream time 2.5 (i.e. partly re-transcribed)
+        self.assertFalse(dedup.accept(_response('b', 0.0, 0.4), offset_seconds=2.5))
+        self.assertTrue(dedup.accept(_response('c', 0.0, 1.0), offset_seconds=2.5))
+        self.assertEqual(1, dedup.out_of_order_dropped)
+
+    def test_ordering_is_per_type(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 5.0, is_final=True, resp_type='captions')))
+        self.assertTrue(dedup.accept(_response('b', 0.0, 2.0, resp_type='transcript')))
+
+    def test_end_of_stream_is_never_dropped(self):
+        dedup = ResponseDeduplicator()
+
+        self.assertTrue(dedup.accept(_response('a', 0.0, 5.0, is_final=True, is_end_of_stream=True)))
+        self.assertTrue(dedup.accept(_response('a', 0.0, 5.0, is_final=True, is_end_of_stream=True)))
+
+    def test_memory_is_bounded(self):
+        dedup = ResponseDeduplicator(max_ids=10)
+
+        for i in range(1000):
+            dedup.accept(_response(str(i), float(i), float(i + 1), is_final=True))
+
+        self.assertLessEqual(len(dedup._seen_ids), 10)
+
+    def test_ids_are_forgotten_after_window(self):
+        dedup = ResponseDeduplicator(window_seconds=60)
+
+        with patch('verbit.response_deduplicator.time.monotonic', return_value=0.0):
+            self.assertTrue(dedup.accept(_response('a', 0.0, 1.0)))
+
+        with patch('verbit.response_deduplicator.time.monotonic', return_value=61.0):
+            dedup.accept(_response('b', 0.0, 2.0))
+
+        self.assertNotIn('a', dedup._seen_ids)
+
+    def test_invalid_max_ids(self):
+        with self.assertRaises(ValueError):
+            ResponseDeduplicator(max_ids=0)
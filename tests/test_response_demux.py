@@ -0,0 +1,95 @@
+# Response demultiplexer tests:
+import unittest
+
+from threading import Thread
+
+from verbit.response_demux import ResponseDemux
+
+
+def _response(service_type: str, language_code: str, end: float, is_final: bool = False) -> dict:
+    return {'response': {'type': 'captions', 'service_type': service_type, 'language_code': language_code,
+                         'end': end, 'is_final': is_final}}
+
+
+class TestResponseDemux(unittest.TestCase):
+
+    def test_routes(self):
+        responses = [_response('transcription', 'en', 1.0), _response('translation', 'es', 1.0),
+                     _response('translation', 'fr', 1.0), _response('transcription', 'en', 2.0, is_final=True)]
+
+        demux = ResponseDemux(responses)
+        english = demux.route('transcription', 'en')
+        spanish = demux.route('translation', 'es')
+        demux.start()
+
+        self.assertEqual([1.0, 2.0], [r['response']['end'] for r in english])
+        self.assertEqual([1.0], [r['response']['end'] for r in spanish])
+        demux.join()
+        self.assertEqual(1, demux.unrouted)
+        self.assertEqual(2, english.metrics.delivered)
+
+    def test_other(self):
+        responses = [_response('transcription', 'en', 1.0), _response('translation', 'fr', 1.0)]
+        demux = ResponseDemux(responses)
+        english = demux.route('transcription', 'en')
+        other = demux.other()
+        demux.start()
+        self.assertEqual([('translation', 'fr')], [(r['response']['service_type'], r['response']['language_code']) for r in other])
+        self.assertEqual(1, len(list(english)))
+        self.assertEqual(0, demux.unrouted)
+
+    def test_slow_consumer(self):
+        def source():
+            yield _response('translation', 'es', 0.5, is_final=True)
+            for i in range(1, 11):
+                yield _response('translation', 'es', float(i))
+                yield _response('transcription', 'en', float(i))
+
+        demux = ResponseDemux(source(), max_queued=4)
+        english = demux.route('transcription', 'en', max_queued=16)
+        spanish = demux.route('translation', 'es')
+        demux.start()
+
+        # the stalled translation consumer does not delay the transcription
+        self.assertEqual(10, len(list(english)))
+
+        # the oldest partials were dropped, the final response was kept
+        ends = [r['response']['end'] for r in spanish]
+        self.assertEqual([0.5, 8.0, 9.0, 10.0], ends)
+        self.assertEqual(7, spanish.metrics.dropped)
+        self.assertEqual(4, spanish.metrics.max_depth)
+
+    def test_source_error(self):
+        def source():
+            yield _response('transcription', 'en', 1.0)
+            raise ConnectionError('connection lost')
+
+        demux = ResponseDemux(source())
+        english = demux.route('transcription', 'en')
+        demux.start()
+        received = []
+        with self.assertRaises(ConnectionError):
+            for response in english:
+                received.append(response)
+        self.assertEqual(1, len(received))
+
+    def test_consumer_threads(self):
+        responses = [_response('transcription' if i % 2 else 'translation', 'en', float(i)) for i in range(100)]
+        demux = ResponseDemux(responses)
+        streams = [demux.route('transcription', 'en'), demux.route('translation', 'en')]
+        counts = [0, 0]
+
+        def consume(index):
+            counts[index] = sum(1 for _ in streams[index])
+
+        threads = [Thread(target=consume, args=(i, )) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        demux.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([50, 50], counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# Session recording and replay tests:
+import gc
+import os
+import time
+import logging
+import tempfile
+import unittest
+
+from websocket import ABNF
+
+from verbit.streaming_client import WebSocketStreamingClient
+from verbit.stand_in_server import StandInServer
+from verbit.session_recorder import SessionRecorder, SessionReplayer, Direction, read_session_log
+
+
+def _media_generator(chunks=20, chunk_size=3200, interval=0.005):
+    for _ in range(chunks):
+        yield b'\x01' * chunk_size
+        time.sleep(interval)
+
+
+class TestSessionRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.log_path = os.path.join(tempfile.mkdtemp(), 'session.vbsr')
+        self.addCleanup(os.remove, self.log_path)
+
+    def _stream(self, ws_url, media_generator, recorder=None):
+        client = WebSocketStreamingClient(customer_token='ABCD')
+        client.set_logger(logging.getLogger('test_session_recorder'))
+        client.session_recorder = recorder
+        return list(client.start_stream(ws_url=ws_url, media_generator=media_generator))
+
+    def _record(self, record_payloads=True):
+        with StandInServer() as server, SessionRecorder(self.log_path, record_payloads=record_payloads) as recorder:
+            return self._stream(server.url, _media_generator(), recorder)
+
+    def test_records_all_frames(self):
+        responses = self._record()
+        frames = list(read_session_log(self.log_path))
+
+        self.assertEqual(Direction.Opened, frames[0].direction)
+
+        sent_media = [f for f in frames if f.direction == Direction.Sent and f.opcode == ABNF.OPCODE_BINARY]
+        self.assertEqual(20, len(sent_media))
+        self.assertEqual(b'\x01' * 3200, sent_media[0].data)
+
+        received_text = [f for f in frames if f.direction == Direction.Received and f.opcode == ABNF.OPCODE_TEXT]
+        self.assertEqual(len(responses), len(received_text))
+
+        # EOS event was sent, and a close frame received last
+        self.assertTrue(any(f.direction == Direction.Sent and f.opcode == ABNF.OPCODE_TEXT for f in frames))
+        self.assertEqual(ABNF.OPCODE_CLOSE, frames[-1].opcode)
+
+        # timestamps are monotonic
+        timestamps = [f.timestamp for f in frames]
+        self.assertEqual(sorted(timestamps), timestamps)
+
+    def test_sizes_only(self):
+        self._record(record_payloads=False)
+        frames = list(read_session_log(self.log_path))
+
+        sent_media = [f for f in frames if f.direction == Direction.Sent and f.opcode == ABNF.OPCODE_BINARY]
+        self.assertEqual(3200, sent_media[0].size)
+        self.assertEqual(bytes(3200), sent_media[0].data)
+
+    def test_replay_reproduces_session(self):
+        responses = self._record()
+        recorded_duration = list(read_session_log(self.log_path))[-1].timestamp
+
+        replayer = SessionReplayer(self.log_path, speed=4.0)
+        with StandInServer(session_factory=replayer.session_factory) as server:
+            started_at = time.monotonic()
+            replayed = self._stream(server.url, replayer.media_generator())
+            elapsed = time.monotonic() - started_at
+
+        self.assertEqual(responses, replayed)
+        self.assertLess(elapsed, recorded_duration)
+
+    def test_unsent_frames_not_recorded(self):
+        class FailingWebSocket:
+            def send(self, _data):
+                raise ConnectionResetError()
+
+        client = WebSocketStreamingClient(customer_token='ABCD')
+        with SessionRecorder(self.log_path) as recorder:
+            client.session_recorder = recorder
+            with self.assertRaises(ConnectionResetError):
+                client._send_event(WebSocketStreamingClient.EVENT_EOS, ws_client=FailingWebSocket())
+        self.assertEqual([], list(read_session_log(self.log_path)))
+
+    def test_connections_not_kept_alive(self):
+        class Connection:
+            pass
+
+        with SessionRecorder(self.log_path) as recorder:
+            first, second = Connection(), Connection()
+            recorder.record(first, Direction.Opened, ABNF.OPCODE_CONT)
+            recorder.record(second, Direction.Opened, ABNF.OPCODE_CONT)
+            del first
+            gc.collect()
+            self.assertEqual(1, len(recorder._connections))
+
+            # numbers aren't reused
+            recorder.record(Connection(), Direction.Opened, ABNF.OPCODE_CONT)
+            recorder.record(second, Direction.Sent, ABNF.OPCODE_TEXT, 'x')
+
+        self.assertEqual([0, 1, 2, 1], [frame.connection for frame in read_session_log(self.log_path)])
+
+    def test_invalid_log(self):
+        with open(self.log_path, 'wb') as f:
+            f.write(b'not a session log')
+
+        with self.assertRaises(ValueError):
+            list(read_session_log(self.log_path))
+
+        with self.assertRaises(ValueError):
+            SessionReplayer(self.log_path, speed=0)
@@ -0,0 +1,149 @@
+# Silence gate tests:
+import unittest
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit.media_timeline import MediaTimeline
+from verbit import silence_gate
+
+if silence_gate.np is not None:
+    from verbit.silence_gate import SilenceGate, SilenceGateConfig
+
+
+MEDIA_CONFIG = MediaConfig()
+BYTES_PER_SECOND = MEDIA_CONFIG.sample_rate * MEDIA_CONFIG.sample_width
+
+
+def _media(*stretches) -> list:
+    """Chunks of 100 ms, of (seconds, is_speech) stretches of a tone or of silence."""
+    chunks = []
+    for seconds, is_speech in stretches:
+        if is_speech:
+            chunks.extend(synthetic_media(MEDIA_CONFIG, seconds))
+        else:
+            chunks.extend([bytes(BYTES_PER_SECOND // 10)] * round(seconds * 10))
+    return chunks
+
+
+def _gate(config=None) -> 'SilenceGate':
+    gate = SilenceGate(config or SilenceGateConfig(hangover_seconds=0.5, preroll_seconds=0.2))
+    gate.configure(MEDIA_CONFIG.sample_rate, MEDIA_CONFIG.sample_width, MEDIA_CONFIG.num_channels)
+    return gate
+
+
+def _run(gate, chunks, seconds_per_chunk: float = 0.0) -> list:
+    segments = []
+    for index, chunk in enumerate(chunks):
+        segments.extend(gate.process(chunk, now=index * seconds_per_chunk))
+    segments.extend(gate.flush())
+
+    # merge adjacent segments of the same kind, across chunks
+    merged = []
+    for data, is_sent in segments:
+        if merged and merged[-1][1] == is_sent:
+            merged[-1] = (merged[-1][0] + data, is_sent)
+        else:
+            merged.append((data, is_sent))
+    return merged
+
+
+@unittest.skipIf(silence_gate.np is None, 'NumPy is not installed')
+class TestSilenceGate(unittest.TestCase):
+
+    def test_suppress(self):
+        chunks = _media((1.0, True), (3.0, False), (1.0, True))
+        gate = _gate()
+        segments = _run(gate, chunks)
+
+        # the media is kept in order
+        self.assertEqual(b''.join(chunks), b''.join(data for data, _ in segments))
+
+        # the silence is sent for the hangover, and before speech resumes
+        self.assertEqual([True, False, True], [is_sent for _, is_sent in segments])
+        self.assertEqual(1.5 * BYTES_PER_SECOND, len(segments[0][0]))
+        self.assertEqual(2.3 * BYTES_PER_SECOND, len(segments[1][0]))
+        self.assertEqual(1.2 * BYTES_PER_SECOND, len(segments[2][0]))
+
+        metrics = gate.metrics
+        self.assertEqual(len(segments[1][0]), metrics.suppressed_bytes)
+        self.assertEqual(sum(map(len, chunks)), metrics.processed_bytes)
+        self.assertEqual(1, metrics.silences)
+
+    def test_trailing_silence(self):
+        segments = _run(_gate(), _media((1.0, True), (2.0, False)))
+        self.assertEqual([True, False], [is_sent for _, is_sent in segments])
+        self.assertEqual(1.5 * BYTES_PER_SECOND, sum(len(data) for data, is_sent in segments if not is_sent))
+
+    def test_keepalive(self):
+        gate = _gate(SilenceGateConfig(hangover_seconds=0.5, preroll_seconds=0.0, keepalive_seconds=1.0))
+        segments = _run(gate, _media((10.0, False)), seconds_per_chunk=0.1)
+        keepalives = gate.metrics.keepalives
+        self.assertGreaterEqual(keepalives, 8)
+        self.assertEqual(0.5 * BYTES_PER_SECOND + keepalives * 0.02 * BYTES_PER_SECOND, sum(len(data) for data, is_sent in segments if is_sent))
+
+    def test_unaligned_chunks(self):
+        data = b''.join(_media((0.5, True), (2.0, False), (0.5, True)))
+        chunks = [data[i:i + 999] for i in range(0, len(data), 999)]
+        segments = _run(_gate(), chunks)
+        self.assertEqual(data, b''.join(data for data, _ in segments))
+
+    def test_take_held(self):
+        gate = _gate()
+        gate.process(b''.join(_media((2.0, False))) + b'\x01')
+        self.assertEqual(0.2 * BYTES_PER_SECOND + 1, gate.held_bytes)
+        self.assertEqual(0.2 * BYTES_PER_SECOND + 1, len(gate.take_held()))
+        self.assertEqual(0, gate.held_bytes)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            SilenceGate().configure(16000, 4, 1)
+
+
+class TestTimelineSkips(unittest.TestCase):
+
+    def test_restore_times(self):
+        timeline = MediaTimeline(bytes_per_second=100)
+        timeline.record(100, sent_at=1.0)
+        timeline.skip(300)
+        timeline.record(100, sent_at=5.0)
+        self.assertEqual(300, timeline.skipped_bytes)
+        self.assertEqual(500, timeline.stream_bytes)
+
+        # the service timed the sent media only: 0-1 before the skip, 1-2 after it
+        response = {'response': {'start': 0.5, 'end': 1.5, 'alternatives': [{'items': [
+            {'start': 0.5, 'end': 1.0}, {'start': 1.0, 'end': 1.5}]}]}}
+        timeline.restore_times(response)
+        body = response['response']
+        self.assertEqual((0.5, 4.5), (body['start'], body['end']))
+        self.assertEqual([(0.5, 1.0), (4.0, 4.5)], [(item['start'], item['end']) for item in body['alternatives'][0]['items']])
+        self.assertEqual(4.5, timeline.locate(1.5).stream_seconds)
+
+
+@unittest.skipIf(silence_gate.np is None, 'NumPy is not installed')
+class TestSilenceGateClient(unittest.TestCase):
+
+    def test_stream(self):
+        chunks = _media((2.0, True), (6.0, False), (2.0, True))
+
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.silence_gate = SilenceGate(SilenceGateConfig(hangover_seconds=1.0, preroll_seconds=0.2))
+        with StandInServer() as server:
+            responses = list(client.start_stream(ws_url=server.url, media_generator=iter(chunks), media_config=MEDIA_CONFIG))
+
+        # 4.8 seconds of silence were not sent
+        timeline = client.media_timeline
+        self.assertEqual(4.8 * BYTES_PER_SECOND, client.silence_gate.metrics.suppressed_bytes)
+        self.assertEqual(sum(map(len, chunks)), timeline.stream_bytes)
+        self.assertEqual(5.2 * BYTES_PER_SECOND, timeline.sent_bytes)
+
+        # response times are those of the stream
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+        self.assertAlmostEqual(10.0, responses[-1]['response']['end'])
+        ends = [response['response']['end'] for response in responses]
+        self.assertEqual(sorted(ends), ends)
+        self.assertTrue(any(end > 8.0 for end in ends[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# SQLite transcript sink tests:
+import os
+import time
+import sqlite3
+import tempfile
+import unittest
+
+from verbit.sqlite_sink import SqliteSink, benchmark
+
+
+def _response(transcript, start, is_final=True, response_type='transcript'):
+    words = transcript.split()
+    items = [dict(value=word, kind='text', start=start + i * 0.5, end=start + i * 0.5 + 0.4, speaker_id='s1')
+             for i, word in enumerate(words)]
+    return {'response': {'id': f'r{start}', 'type': response_type, 'service_type': 'transcription', 'language_code': 'en-US',
+                         'is_final': is_final, 'is_end_of_stream': False, 'start': start, 'end': items[-1]['end'],
+                         'start_pts': start + 10.0,
+                         'alternatives': [{'transcript': transcript, 'start': start, 'end': items[-1]['end'], 'items': items}]}}
+
+
+class TestSqliteSink(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'transcripts.db')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_write_and_search(self):
+        with SqliteSink(self.path) as sink:
+            responses = [_response('hello quarterly revenue', 0.0),
+                         _response('hello quarter', 2.0, is_final=False),
+                         _response('revenue grew this quarter', 5.0)]
+            self.assertEqual(responses, list(sink.tee(responses, session_id='a')))
+            sink.write_response(_response('no revenue here', 0.0), session_id='b')
+
+        metrics = sink.metrics
+        self.assertEqual((3, 10, 0, 0), (metrics.written_responses, metrics.written_items, metrics.dropped_responses, metrics.queued))
+
+        results = sink.search('revenue')
+        self.assertEqual({('a', 0.0), ('a', 5.0), ('b', 0.0)}, {(r.session_id, r.start) for r in results})
+        results = sink.search('quarterly AND revenue', session_id='a')
+        self.assertEqual(1, len(results))
+        self.assertEqual(('r0.0', 10.0, 'hello quarterly revenue'), (results[0].response_id, results[0].start_pts, results[0].transcript))
+
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual('wal', connection.execute('PRAGMA journal_mode').fetchone()[0])
+            self.assertEqual([('revenue', 5.0, 5.4)],
+                             connection.execute('SELECT value, start, "end" FROM items WHERE value = ? AND start > 1', ('revenue', )).fetchall())
+
+        with self.assertRaises(RuntimeError):
+            sink.write_response(_response('closed', 9.0))
+
+    def test_flush_interval(self):
+        with SqliteSink(self.path, batch_size=100, flush_interval_seconds=0.1) as sink:
+            sink.write_response(_response('hello world', 0.0))
+            deadline = time.monotonic() + 2.0
+            while sink.metrics.written_responses == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(1, sink.metrics.written_responses)
+            self.assertEqual(1, len(sink.search('world')))
+
+    def test_bounded_queue(self):
+        with SqliteSink(self.path, batch_size=2, max_queued=2, flush_interval_seconds=60.0) as sink:
+
+            # hold the database's write lock, so that the writer is stuck
+            blocker = sqlite3.connect(self.path, isolation_level=None, timeout=0)
+            blocker.execute('BEGIN IMMEDIATE')
+            for n in range(2):
+                sink.write_response(_response('first batch', n))
+            deadline = time.monotonic() + 2.0
+            while sink.metrics.queued and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            for n in range(5):
+                sink.write_response(_response('queued or dropped', 10.0 + n))
+            self.assertEqual((2, 3), (sink.metrics.queued, sink.metrics.dropped_responses))
+            blocker.execute('COMMIT')
+            blocker.close()
+
+        self.assertEqual(4, sink.metrics.written_responses)
+
+    def test_benchmark(self):
+        result = benchmark(self.path, responses=500, words_per_response=4, batch_size=64)
+        self.assertEqual((500, 2000, 0), (result.responses, result.items, result.dropped_responses))
+        self.assertGreaterEqual(result.batches, 8)
+        self.assertGreater(result.responses_per_second, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+# Stand-in server tests:
+import json
+import unittest
+
+from websocket import WebSocket, ABNF
+
+from verbit.stand_in_server import StandInServer, TranscribingSession
+
+
+class TestStandInServer(unittest.TestCase):
+
+    def test_transcribing_session(self):
+        with StandInServer(session_factory=lambda: TranscribingSession(response_interval_seconds=0.5)) as server:
+            ws = WebSocket()
+            ws.connect(server.url + '?sample_rate=16000&sample_width=2&num_channels=1')
+
+            # 1.25 seconds of media
+            for _ in range(5):
+                ws.send_binary(b'\x00' * 8000)
+            ws.send(json.dumps(dict(event='EOS', payload={})))
+
+            responses = []
+            while True:
+                opcode, data = ws.recv_data(control_frame=True)
+                if opcode == ABNF.OPCODE_CLOSE:
+                    break
+                responses.append(json.loads(data)['response'])
+            ws.close()
+
+        self.assertEqual([0.5, 1.0, 1.25], [r['end'] for r in responses])
+        self.assertTrue(responses[-1]['is_end_of_stream'])
+        self.assertEqual(1, server.accepted)
+
+    def test_ping_is_ponged(self):
+        with StandInServer() as server:
+            ws = WebSocket()
+            ws.connect(server.url)
+            ws.ping('abcd')
+            self.assertEqual((ABNF.OPCODE_PONG, b'abcd'), ws.recv_data(control_frame=True))
+            ws.close()
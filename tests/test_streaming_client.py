@@ -1,8 +1,12 @@
 # General SDK tests:
+import os
 import time
 import json
+import shutil
+import tempfile
 import struct
 import unittest
+import threading
 import websocket
 from unittest.mock import MagicMock, patch
 
@@ -10,6 +14,10 @@ from tenacity import RetryError
 
 import verbit.streaming_client
 from verbit.streaming_client import WebsocketStreamingClientSingleConnection, WebSocketStreamingClient, MediaConfig, ResponseType
+from verbit.stand_in_server import StandInServer, TranscribingSession
+from verbit.response_deduplicator import ResponseDeduplicator
+from verbit.media_spool import MediaSpool
+from verbit.loadtest import synthetic_media
 
 from tests.common import RESPONSES, mock_get_auth_token
 
@@ -349,6 +357,33 @@ class TestClientSDK(unittest.TestCase):
         # assert client closed after server closed
         self.client._ws_client.close.assert_called_once()
 
+    def test_close_with_blocked_media_generator(self):
+        """Closing the client does not wait for a media generator which is blocked (e.g. on a capture device)."""
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def blocking_media_generator():
+            yield b'\x00\x00' * 1600
+            release.wait()
+
+        with StandInServer() as server:
+            with WebSocketStreamingClient(customer_token=self.customer_token) as client:
+                client.start_stream(ws_url=server.url, media_generator=blocking_media_generator())
+                time.sleep(0.05)
+
+                started_at = time.monotonic()
+                client.close()
+                elapsed = time.monotonic() - started_at
+
+            self.assertLess(elapsed, 0.05)
+            self.assertFalse(client._media_sender_thread.is_alive())
+            self.assertFalse(client._ping_sender_thread.is_alive())
+            self.assertFalse(client._ws_client.connected)
+
+            with self.assertRaises(RuntimeError):
+                client.start_stream(ws_url=server.url, media_generator=iter([]))
+
     @patch('verbit.streaming_client.WebSocketStreamingClient._get_auth_token', mock_get_auth_token)
     def test_disconnect_while_streaming_reconnects(self):
         """When server disconnects client reconnects and streams from where it left off."""
@@ -375,6 +410,269 @@ class TestClientSDK(unittest.TestCase):
         # expect client warning, having run out Media
         self.assertIn('Media stream already finished', self.client._logger.warning.call_args_list[0][0][0])
 
+    def test_reconnect_not_gated_by_blocked_media_generator(self):
+        """Reconnecting does not wait for a blocked media generator, which then resumes over the new connection."""
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+        received = []
+
+        class RecordingSession(TranscribingSession):
+            def on_binary(self, connection, data):
+                received.append(data)
+                super().on_binary(connection, data)
+
+        def blocking_media_generator():
+            for i in range(3):
+                yield bytes([i]) * 3200
+            release.wait()
+            for i in range(3, 6):
+                yield bytes([i]) * 3200
+
+        with StandInServer(session_factory=RecordingSession) as server:
+            client = WebSocketStreamingClient(customer_token=self.customer_token)
+            responses = []
+            response_generator = client.start_stream(ws_url=server.url, media_generator=blocking_media_generator())
+            consumer = threading.Thread(target=lambda: responses.extend(response_generator))
+            consumer.start()
+            while len(received) < 3:
+                time.sleep(0.001)
+
+            # the server goes away while the media generator is blocked
+            going_away_at = time.monotonic()
+            server.close_connections(websocket.STATUS_GOING_AWAY)
+            while server.accepted < 2:
+                time.sleep(0.001)
+            self.assertLess(time.monotonic() - going_away_at, 0.5)
+
+            release.set()
+            consumer.join()
+
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+
+        # no chunk was lost, nor sent twice
+        self.assertEqual([bytes([i]) * 3200 for i in range(6)], received)
+
+    def test_close_closes_media_spool(self):
+        """Closing the client (after reconnecting from a "Going Away" close) stops spooling media, and removes the spool."""
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        spool = MediaSpool(directory=directory, segment_bytes=64 * 1024, max_bytes=1024 * 1024)
+
+        def media():
+            for chunk in synthetic_media(MediaConfig(), 60.0):
+                time.sleep(0.01)
+                yield chunk
+
+        with StandInServer() as server:
+            client = WebSocketStreamingClient(customer_token=self.customer_token)
+            client.media_spool = spool
+            responses = []
+            response_generator = client.start_stream(ws_url=server.url, media_generator=media())
+            consumer = threading.Thread(target=lambda: responses.extend(response_generator))
+            consumer.start()
+            while not responses:
+                time.sleep(0.001)
+
+            server.close_connections(websocket.STATUS_GOING_AWAY)
+            while server.accepted < 2 or spool.metrics.drained_bytes < 4 * 16000 * 2:
+                time.sleep(0.001)
+
+            client.close()
+            consumer.join(timeout=5.0)
+            self.assertFalse(consumer.is_alive())
+
+        # the capture thread stops (once the media generator yields its next chunk), and the segment files are removed
+        spool._capture_thread.join(timeout=1.0)
+        self.assertFalse(spool._capture_thread.is_alive())
+        self.assertEqual(0, spool.metrics.segments)
+        self.assertEqual([], os.listdir(directory))
+
+    @patch('verbit.streaming_client.WebSocketStreamingClient._get_auth_token', mock_get_auth_token)
+    def test_rollover_switches_media_and_merges_responses(self):
+        """
+        Before the connection duration limit, the client opens a new connection, switches media to it
+        on a sample-aligned boundary and drains the old connection, with no duplicate EOS response.
+        """
+
+        connections = []
+        sent_bytes = {}
+        eos_sent = {}
+
+        def mock_connect(_self, *_args, **_kwargs):
+            _self.connected = True
+            connections.append(_self)
+            sent_bytes[id(_self)] = 0
+            eos_sent[id(_self)] = threading.Event()
+
+        def mock_send_binary(_self, chunk):
+            sent_bytes[id(_self)] += len(chunk)
+
+        def mock_send(_self, payload, *_args, **_kwargs):
+            if 'EOS' in payload:
+                eos_sent[id(_self)].set()
+
+        def mock_close(_self, *_args, **_kwargs):
+            _self.connected = False
+
+        old_responses = iter([(websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp0']),
+                              (websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp_EOS']),
+                              (websocket.ABNF.OPCODE_CLOSE, self.HAPPY_CLOSE_MSG)])
+        new_responses = iter([(websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp1']),
+                              (websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp_EOS']),
+                              (websocket.ABNF.OPCODE_CLOSE, self.HAPPY_CLOSE_MSG)])
+
+        def mock_recv_data(_self, control_frame=False):
+
+            # old connection: the rest of the responses only arrive after EOS was sent to it
+            if _self is connections[0]:
+                opcode, data = next(old_responses)
+                if data is RESPONSES['happy_json_resp_EOS']:
+                    self.assertTrue(eos_sent[id(_self)].wait(timeout=5.0))
+                return opcode, data
+
+            return next(new_responses)
+
+        patchers = (
+            patch.object(verbit.streaming_client.WebSocket, 'connect', autospec=True, side_effect=mock_connect),
+            patch.object(verbit.streaming_client.WebSocket, 'send_binary', autospec=True, side_effect=mock_send_binary),
+            patch.object(verbit.streaming_client.WebSocket, 'send', autospec=True, side_effect=mock_send),
+            patch.object(verbit.streaming_client.WebSocket, 'send_close', autospec=True),
+            patch.object(verbit.streaming_client.WebSocket, 'recv_data', autospec=True, side_effect=mock_recv_data),
+            patch.object(verbit.streaming_client.WebSocket, 'close', autospec=True, side_effect=mock_close),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def odd_media_generator():
+            # media chunks are not sample aligned: 3 bytes per chunk, while samples are 2 bytes long
+            for _ in range(500):
+                yield b'\x01\x02\x03'
+                time.sleep(0.005)
+
+        self.client.rollover_seconds = 0.05
+        response_generator = self.client.start_stream(ws_url=self.ws_url, media_generator=odd_media_generator())
+        responses = [response['response']['id'] for response in response_generator]
+
+        # responses of both connections are merged, with a single EOS
+        expected = [self._json_to_dict(RESPONSES[key])['response']['id'] for key in ('happy_json_resp0', 'happy_json_resp1', 'happy_json_resp_EOS')]
+        self.assertEqual(expected, responses)
+
+        # a second connection was opened, and media sent over the old connection ended on a sample boundary
+        self.assertGreaterEqual(len(connections), 2)
+        self.assertEqual(0, sent_bytes[id(connections[0])] % 2)
+        self.assertGreater(sent_bytes[id(connections[1])], 0)
+
+    @patch('verbit.streaming_client.WebSocketStreamingClient._get_auth_token', mock_get_auth_token)
+    def test_hot_standby_failover(self):
+        """On a connection error, the client fails over to the standby connection without reconnecting."""
+
+        connections = []
+
+        def mock_connect(_self, *_args, **_kwargs):
+            _self.connected = True
+            connections.append(_self)
+
+        def mock_close(_self, *_args, **_kwargs):
+            _self.connected = False
+
+        primary_responses = iter([(websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp0']),
+                                  ConnectionResetError('Test disconnection before failover')])
+        standby_responses = iter([(websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp1']),
+                                  (websocket.ABNF.OPCODE_TEXT, RESPONSES['happy_json_resp_EOS']),
+                                  (websocket.ABNF.OPCODE_CLOSE, self.HAPPY_CLOSE_MSG)])
+
+        def mock_recv_data(_self, control_frame=False):
+
+            # primary connection: disconnect only after the standby connection is ready
+            if _self is connections[0]:
+                response = next(primary_responses)
+                if isinstance(response, Exception):
+                    while not self.client.failover_metrics.standby_ready:
+                        time.sleep(0.001)
+                    raise response
+                return response
+
+            return next(standby_responses)
+
+        patchers = (
+            patch.object(verbit.streaming_client.WebSocket, 'connect', autospec=True, side_effect=mock_connect),
+            patch.object(verbit.streaming_client.WebSocket, 'send_binary', autospec=True),
+            patch.object(verbit.streaming_client.WebSocket, 'send', autospec=True),
+            patch.object(verbit.streaming_client.WebSocket, 'recv_data', autospec=True, side_effect=mock_recv_data),
+            patch.object(verbit.streaming_client.WebSocket, 'close', autospec=True, side_effect=mock_close),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client.hot_standby = True
+        response_generator = self.client.start_stream(ws_url=self.ws_url, media_generator=self.infinite_valid_media_generator)
+        responses = [response['response']['id'] for response in response_generator]
+
+        # responses of the primary connection are continued by the standby connection's
+        expected = [self._json_to_dict(RESPONSES[key])['response']['id'] for key in ('happy_json_resp0', 'happy_json_resp1', 'happy_json_resp_EOS')]
+        self.assertEqual(expected, responses)
+
+        # media was switched to the standby connection
+        self.assertIs(connections[1], self.client._ws_client)
+
+        metrics = self.client.failover_metrics
+        self.assertEqual(1, metrics.failovers)
+        self.assertLess(metrics.last_failover_seconds, 1.0)
+        self.assertGreaterEqual(metrics.standby_builds, 1)
+
+    def test_standby_connects_to_other_address(self):
+        """A standby connection is opened by the WebSocket (as any other), to another address, as to the URL's host."""
+
+        connects = []
+
+        def mock_connect(_self, url, **options):
+            _self.connected = True
+            connects.append((_self, url, options))
+
+        with patch.object(verbit.streaming_client.WebSocket, 'connect', autospec=True, side_effect=mock_connect):
+            headers = {'Authorization': 'Bearer standby'}
+            ws_client = self.client._connect_websocket('wss://streaming.example.com/ws', MediaConfig(), ResponseType.Transcript,
+                                                       headers=headers, address_factory=lambda: '2001:db8::2')
+
+        (connected, url, options), = connects
+        self.assertIs(ws_client, connected)
+        self.assertTrue(url.startswith('wss://[2001:db8::2]/ws?'))
+        self.assertEqual(('streaming.example.com', 'https://streaming.example.com', headers),
+                         (options['host'], options['origin'], options['header']))
+
+        # the certificate is verified as the URL's host's (with websocket-client's TLS options)
+        self.assertEqual({'server_hostname': 'streaming.example.com'}, ws_client.sock_opt.sslopt)
+
+    def test_reconnect_with_response_deduplicator(self):
+        """Responses of a new connection are not dropped as out of order, though their times restart at zero."""
+
+        def media():
+            for chunk in synthetic_media(MediaConfig(), 8.0):
+                time.sleep(0.005)
+                yield chunk
+
+        deduplicator = ResponseDeduplicator()
+        with StandInServer() as server:
+            client = WebSocketStreamingClient(customer_token=self.customer_token)
+            client.response_deduplicator = deduplicator
+            response_generator = client.start_stream(ws_url=server.url, media_generator=media())
+
+            # the server goes away after a final response
+            final = next(response for response in response_generator if response['response']['is_final'])
+            server.close_connections(websocket.STATUS_GOING_AWAY)
+            responses = list(response_generator)
+
+        self.assertEqual(2, server.accepted)
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+        self.assertEqual((0, 0), (deduplicator.duplicates_dropped, deduplicator.out_of_order_dropped))
+
+        # responses of the new connection were yielded, though they end before the previous connection's final response
+        self.assertTrue(any(response['response']['end'] < final['response']['end'] for response in responses))
+
     # ======= #
     # Helpers #
     # ======= #
@@ -0,0 +1,139 @@
+# Tracing hooks tests:
+import time
+import unittest
+
+import websocket
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit import tracing
+from verbit.tracing import TraceHooks, TimingSampler, OpenTelemetryHooks
+
+
+class _Span:
+
+    def __init__(self, name, start_time=None, attributes=None):
+        self.name = name
+        self.start_time = start_time
+        self.end_time = None
+        self.attributes = attributes
+        self.exceptions = []
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def set_status(self, status):
+        pass
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class _Tracer:
+    """Records spans, with the start_span() API of an OpenTelemetry Tracer."""
+
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = _Span(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+def _stream(hooks: TraceHooks, media_seconds: float = 1.0) -> list:
+    client = WebSocketStreamingClient(customer_token='stand-in')
+    client.trace_hooks = hooks
+    with StandInServer() as server:
+        return list(client.start_stream(ws_url=server.url, media_generator=iter(synthetic_media(MediaConfig(), media_seconds))))
+
+
+class TestTimingSampler(unittest.TestCase):
+
+    def test_stream(self):
+        sampler = TimingSampler()
+        responses = _stream(sampler)
+        stats = sampler.stats()
+
+        self.assertEqual({'connect.auth', 'connect.handshake', 'connect.total', 'frame_sent', 'frame_received',
+                          'response_decoded', 'response_yielded'}, set(stats))
+        self.assertEqual(1, stats['connect.handshake'].count)
+        self.assertEqual(len(synthetic_media(MediaConfig(), 1.0)), stats['frame_sent'].count)
+        self.assertEqual(len(responses), stats['response_decoded'].count)
+        self.assertEqual(len(responses), stats['response_yielded'].count)
+        self.assertGreaterEqual(stats['connect.total'].max_seconds, stats['connect.handshake'].max_seconds)
+
+    def test_sample_every(self):
+        sampler = TimingSampler(sample_every=10, reservoir_size=8)
+        for i in range(100):
+            sampler.on_frame_sent(3200, 0.0, i / 1000)
+        sampler.on_connect_phase('handshake', 0.0, 0.5, ConnectionError())
+
+        stats = sampler.stats()
+        self.assertEqual((100, 10), (stats['frame_sent'].count, stats['frame_sent'].sampled))
+        self.assertAlmostEqual(0.045, stats['frame_sent'].mean_seconds)
+        self.assertEqual(0.09, stats['frame_sent'].max_seconds)
+        self.assertEqual((1, 1, 1), (stats['connect.handshake'].count, stats['connect.handshake'].sampled, stats['connect.handshake'].errors))
+
+    def test_reconnect(self):
+        sampler = TimingSampler()
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.trace_hooks = sampler
+
+        def media():
+            for chunk in synthetic_media(MediaConfig(), 3.0):
+                time.sleep(0.01)
+                yield chunk
+
+        with StandInServer() as server:
+            responses = client.start_stream(ws_url=server.url, media_generator=media())
+            next(responses)
+            server.close_connections(websocket.STATUS_GOING_AWAY)
+            remaining = list(responses)
+
+        self.assertTrue(remaining[-1]['response']['is_end_of_stream'])
+        stats = sampler.stats()
+        self.assertEqual((1, 0), (stats['reconnect'].count, stats['reconnect'].errors))
+        self.assertEqual(2, stats['connect.total'].count)
+
+
+class TestOpenTelemetryHooks(unittest.TestCase):
+
+    def test_spans(self):
+        tracer = _Tracer()
+        _stream(OpenTelemetryHooks(tracer))
+
+        names = [span.name for span in tracer.spans]
+        self.assertEqual(['verbit.connect.auth', 'verbit.connect.handshake', 'verbit.connect.total'], names)
+        for span in tracer.spans:
+            self.assertLessEqual(span.start_time, span.end_time)
+            self.assertLess(abs(span.end_time / 1e9 - time.time()), 60.0)
+
+    def test_trace_frames(self):
+        tracer = _Tracer()
+        responses = _stream(OpenTelemetryHooks(tracer, trace_frames=True))
+        names = [span.name for span in tracer.spans]
+        self.assertEqual(len(responses), names.count('verbit.response.decode'))
+        self.assertEqual(len(synthetic_media(MediaConfig(), 1.0)), names.count('verbit.frame.send'))
+
+    def test_reconnect_span(self):
+        tracer = _Tracer()
+        hooks = OpenTelemetryHooks(tracer)
+        error = ConnectionError('connection lost')
+        hooks.on_reconnect_start(error)
+        started_at = time.perf_counter()
+        hooks.on_reconnect_end(started_at, 0.25, error)
+
+        span, = tracer.spans
+        self.assertEqual('verbit.reconnect', span.name)
+        self.assertEqual([error], span.exceptions)
+        self.assertIsNotNone(span.end_time)
+
+    @unittest.skipIf(tracing.trace is None, 'OpenTelemetry is not installed')
+    def test_default_tracer(self):
+        _stream(OpenTelemetryHooks())
+
+
+if __name__ == '__main__':
+    unittest.main()
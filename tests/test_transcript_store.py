@@ -0,0 +1,101 @@
+# Transcript store tests:
+import unittest
+
+from verbit.transcript_store import TranscriptStore, _Column
+
+from tests.common import timed_items, make_response
+
+
+class TestTranscriptStore(unittest.TestCase):
+
+    def _values(self, items):
+        return [item['value'] for item in items]
+
+    def _store(self):
+        store = TranscriptStore()
+        store.add_responses([
+            make_response(timed_items(('hello', 0.0, 0.4), ('world', 0.5, 0.9), ('.', 0.9, 0.9)), start_pts_offset=10.0, start_epoch=1000.0),
+            make_response(timed_items(('a', 0.5, 0.7), ('b', 0.8, 1.0)), is_final=False),
+            make_response(timed_items(('good', 2.0, 2.6), ('morning', 2.7, 3.5)), start_pts_offset=10.0, start_epoch=1002.0),
+            make_response(timed_items(('hola', 2.0, 2.5)), service_type='translation', language_code='es-ES'),
+        ])
+        return store
+
+    def test_only_final_responses_of_the_stream(self):
+        store = self._store()
+        self.assertEqual(5, len(store))
+        self.assertEqual(['hello', 'world', '.', 'good', 'morning'], self._values(store.query(0.0, 10.0)))
+
+    def test_query_fields(self):
+        store = self._store()
+        self.assertEqual(['world', '.'], self._values(store.query(0.5, 2.0)))
+        self.assertEqual(['world', '.', 'good'], self._values(store.query(0.9, 2.7, field='end')))
+        self.assertEqual(['good', 'morning'], self._values(store.query(12.0, 13.0, field='start_pts')))
+        self.assertEqual(['world', '.'], self._values(store.query(1000.5, 1001.0, field='start_epoch')))
+        with self.assertRaises(ValueError):
+            store.query(0.0, 1.0, field='duration')
+
+    def test_between(self):
+        store = self._store()
+
+        # overlapping words, including one which started before the range
+        self.assertEqual(['good', 'morning'], self._values(store.between(2.5, 2.8)))
+        self.assertEqual(['world', '.'], self._values(store.between(0.5, 1.0)))
+        self.assertEqual([], self._values(store.between(1.0, 2.0)))
+        self.assertEqual('hello world. good', store.text(0.0, 2.5))
+        self.assertEqual('morning', store.text(13.0, 14.0, time_base='start_pts'))
+        with self.assertRaises(ValueError):
+            store.between(0.0, 1.0, time_base='end')
+
+    def test_out_of_order_column(self):
+        store = TranscriptStore()
+
+        # a PTS discontinuity between responses
+        store.add_response(make_response(timed_items(('one', 0.0, 0.5)), start_pts_offset=500.0))
+        store.add_response(make_response(timed_items(('two', 1.0, 1.5)), start_pts_offset=2.0))
+        store.add_response(make_response(timed_items(('three', 2.0, 2.5)), start_pts_offset=2.0))
+
+        self.assertEqual(['two', 'three', 'one'], self._values(store.query(0.0, 1000.0, field='start_pts')))
+        self.assertEqual(['one'], self._values(store.between(500.0, 501.0, time_base='start_pts')))
+        self.assertEqual(['one', 'two', 'three'], self._values(store.query(0.0, 10.0)))
+
+        # responses without epoch times aren't indexed by them
+        self.assertEqual([], store.query(float('-inf'), float('inf'), field='start_epoch'))
+
+    def test_query_after_out_of_order_append(self):
+        store = TranscriptStore()
+        store.add_response(make_response(timed_items(('one', 0.0, 0.5)), start_pts_offset=500.0))
+        store.add_response(make_response(timed_items(('two', 1.0, 1.5)), start_pts_offset=2.0))
+        self.assertEqual(['two', 'one'], self._values(store.query(0.0, 1000.0, field='start_pts')))
+
+        for n in range(2, 6):
+            store.add_response(make_response(timed_items((f'w{n}', float(n), n + 0.5)), start_pts_offset=600.0 - 2 * n))
+            self.assertEqual(['two', 'one', f'w{n}'], self._values(store.query(0.0, 1000.0, field='start_pts'))[:3])
+        self.assertEqual(['two', 'one', 'w5', 'w4', 'w3', 'w2'], self._values(store.query(0.0, 1000.0, field='start_pts')))
+        self.assertEqual(['w4', 'w3'], self._values(store.query(596.0, 598.0, field='start_pts')))
+
+    def test_many_discontinuities(self):
+        # every value out of order: the sorted runs are merged as they pile up
+        column = _Column()
+        for n in range(1024):
+            column.append(-n)
+            self.assertLessEqual(len(column._runs), 1 + n.bit_length())
+
+        self.assertEqual(list(range(10, 0, -1)), list(column.range(-10.0, 0.0)))
+        self.assertEqual(list(range(1023, -1, -1)), list(column.range(float('-inf'), float('inf'))))
+
+        # equal values, in the order they were appended
+        column.append(-5.0)
+        self.assertEqual([6, 5, 1024, 4], list(column.range(-6.0, -3.5)))
+
+    def test_long_session(self):
+        store = TranscriptStore()
+        for n in range(4 * 3600):
+            store.add_response(make_response(timed_items((f'w{n}', n, n + 0.5), (f'v{n}', n + 0.5, n + 0.9))))
+
+        self.assertEqual(['w7200', 'v7200'], self._values(store.between(7200.0, 7200.9)))
+        self.assertEqual(['v7199', 'w7200'], self._values(store.between(7199.7, 7200.1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# Transport config tests:
+import socket
+import unittest
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit.transport import TransportConfig, TOS_DSCP_EF
+
+
+class TestTransportConfig(unittest.TestCase):
+
+    def test_socket_options(self):
+        self.assertEqual([], TransportConfig().socket_options())
+
+        options = TransportConfig(tcp_nodelay=False, send_buffer_bytes=4096).socket_options()
+        self.assertEqual([(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0), (socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)], options)
+
+    @unittest.skipUnless(hasattr(socket, 'TCP_KEEPIDLE') and hasattr(socket, 'TCP_USER_TIMEOUT'), 'Linux socket options')
+    def test_apply(self):
+        config = TransportConfig.low_latency()
+        config.ip_tos = TOS_DSCP_EF
+        with socket.socket() as sock:
+            config.apply(sock)
+            self.assertEqual(1, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            self.assertEqual(1, sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE))
+            self.assertEqual(5, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE))
+            self.assertEqual(10000, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT))
+            self.assertEqual(TOS_DSCP_EF, sock.getsockopt(socket.IPPROTO_IP, socket.IP_TOS))
+
+    @unittest.skipUnless(hasattr(socket, 'TCP_KEEPIDLE'), 'Linux socket options')
+    def test_client_connection(self):
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.transport = TransportConfig(keepalive_idle_seconds=7, ip_tos=TOS_DSCP_EF)
+
+        with StandInServer() as server:
+            responses = client.start_stream(ws_url=server.url, media_generator=iter(synthetic_media(MediaConfig(), 1.0)))
+            sock = client._ws_client.sock
+            self.assertEqual(7, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE))
+            self.assertEqual(TOS_DSCP_EF, sock.getsockopt(socket.IPPROTO_IP, socket.IP_TOS))
+
+            # the library's defaults are kept
+            self.assertEqual(1, sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            self.assertTrue(list(responses)[-1]['response']['is_end_of_stream'])
+
+
+if __name__ == '__main__':
+    unittest.main()
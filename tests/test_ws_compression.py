@@ -0,0 +1,166 @@
+# permessage-deflate compression tests:
+import json
+import unittest
+
+from websocket import ABNF, WebSocketProtocolException, WebSocketPayloadException, WebSocketTimeoutException
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.loadtest import synthetic_media
+from verbit.ws_compression import (DeflateConfig, PerMessageDeflate, DeflateFrameReader, negotiate, accept_offer,
+                                   benchmark, _synthetic_responses)
+
+
+class TestNegotiation(unittest.TestCase):
+
+    def test_offer(self):
+        self.assertEqual('permessage-deflate; client_max_window_bits', DeflateConfig().offer())
+        self.assertEqual('permessage-deflate; client_no_context_takeover; server_no_context_takeover; '
+                         'client_max_window_bits=12; server_max_window_bits=10',
+                         DeflateConfig(True, True, client_max_window_bits=12, server_max_window_bits=10).offer())
+        with self.assertRaises(ValueError):
+            DeflateConfig(client_max_window_bits=8)
+
+    def test_negotiate(self):
+        config = DeflateConfig(client_max_window_bits=12, server_max_window_bits=11)
+        self.assertIsNone(negotiate(None, config))
+        self.assertIsNone(negotiate('', config))
+
+        deflate = negotiate('permessage-deflate; server_no_context_takeover; client_max_window_bits=10; server_max_window_bits=11', config)
+        self.assertEqual((False, 10, True), (deflate.compress_no_context_takeover, deflate.compress_window_bits, deflate.decompress_no_context_takeover))
+        deflate = negotiate('Permessage-Deflate; client_no_context_takeover', config)
+        self.assertEqual((True, 12, False), (deflate.compress_no_context_takeover, deflate.compress_window_bits, deflate.decompress_no_context_takeover))
+
+        for invalid in ('x-webkit-deflate-frame',
+                        'permessage-deflate, permessage-deflate',
+                        'permessage-deflate; unknown_param',
+                        'permessage-deflate; server_no_context_takeover; server_no_context_takeover',
+                        'permessage-deflate; server_max_window_bits=12',
+                        'permessage-deflate; client_max_window_bits',
+                        'permessage-deflate; client_max_window_bits=8'):
+            with self.assertRaises(WebSocketProtocolException, msg=invalid):
+                negotiate(invalid, config)
+
+    def test_accept_offer(self):
+        self.assertIsNone(accept_offer(None))
+        self.assertIsNone(accept_offer('permessage-deflate; server_max_window_bits=8'))
+        header, deflate = accept_offer('x-unknown, permessage-deflate; server_max_window_bits=8, '
+                                       'permessage-deflate; client_no_context_takeover; server_max_window_bits=10; client_max_window_bits')
+        self.assertEqual('permessage-deflate; client_no_context_takeover; server_max_window_bits=10', header)
+        self.assertEqual((False, 10, True), (deflate.compress_no_context_takeover, deflate.compress_window_bits, deflate.decompress_no_context_takeover))
+
+
+class TestPerMessageDeflate(unittest.TestCase):
+
+    def _round_trip(self, compress_no_context_takeover):
+        sender = PerMessageDeflate(compress_no_context_takeover=compress_no_context_takeover)
+        receiver = PerMessageDeflate(decompress_no_context_takeover=compress_no_context_takeover)
+        message = json.dumps(_synthetic_responses(seconds=5)[-1]).encode('utf-8')
+        sizes = []
+        for _ in range(3):
+            compressed = sender.compress(message)
+            sizes.append(len(compressed))
+
+            # decompressed across frames, as a fragmented message
+            middle = len(compressed) // 2
+            self.assertEqual(message, receiver.decompress(compressed[:middle], fin=False) + receiver.decompress(compressed[middle:]))
+        self.assertEqual(b'', receiver.decompress(sender.compress(b'')))
+        self.assertEqual((4, 3 * len(message)), (receiver.stats.received_messages, receiver.stats.received_bytes))
+        return sizes
+
+    def test_context_takeover(self):
+        sizes = self._round_trip(compress_no_context_takeover=False)
+        self.assertLess(sizes[1], sizes[0] / 4)
+
+    def test_no_context_takeover(self):
+        sizes = self._round_trip(compress_no_context_takeover=True)
+        self.assertEqual(1, len(set(sizes)))
+
+    def test_max_message_bytes(self):
+        sender = PerMessageDeflate()
+        receiver = PerMessageDeflate(max_message_bytes=65536)
+        self.assertEqual(65536, len(receiver.decompress(sender.compress(bytes(65536)))))
+
+        # a small frame inflating beyond the limit (across frames, too)
+        bomb = sender.compress(bytes(2 ** 24))
+        self.assertLess(len(bomb), 65536)
+        with self.assertRaises(WebSocketPayloadException):
+            receiver.decompress(bomb)
+        receiver = PerMessageDeflate(max_message_bytes=65536)
+        compressed = PerMessageDeflate().compress(bytes(65537))
+        with self.assertRaises(WebSocketPayloadException):
+            receiver.decompress(compressed[:len(compressed) // 2], fin=False)
+            receiver.decompress(compressed[len(compressed) // 2:])
+
+
+class TestDeflateFrameReader(unittest.TestCase):
+
+    def test_recv_frame(self):
+        frames = [ABNF(1, 1, 0, 0, ABNF.OPCODE_TEXT, 0, b'x' * 100),
+                  ABNF(1, 0, 0, 0, ABNF.OPCODE_BINARY, 1, b'y' * 1000),
+                  ABNF(0, 0, 0, 0, ABNF.OPCODE_BINARY, 0, b'z' * 70000)]
+        data = bytearray(b''.join(frame.format() for frame in frames))
+
+        # a byte at a time, timing out once mid-frame
+        timeouts = [len(data) - 600]
+
+        def recv(bufsize: int) -> bytes:
+            if timeouts and len(data) == timeouts[0]:
+                timeouts.pop()
+                raise WebSocketTimeoutException('timed out')
+            chunk = bytes(data[:1])
+            del data[:1]
+            return chunk
+
+        reader = DeflateFrameReader(recv)
+        frame = reader.recv_frame()
+        self.assertEqual((1, ABNF.OPCODE_TEXT, b'x' * 100), (frame.rsv1, frame.opcode, frame.data))
+        with self.assertRaises(WebSocketTimeoutException):
+            reader.recv_frame()
+        received = [reader.recv_frame() for _ in range(2)]
+        self.assertEqual([b'y' * 1000, b'z' * 70000], [frame.data for frame in received])
+        self.assertEqual([1, 0], [frame.fin for frame in received])
+
+
+class TestCompressedStream(unittest.TestCase):
+
+    def _stream(self, server_compression):
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.compression = DeflateConfig(compress_media=True, server_no_context_takeover=True)
+        with StandInServer(compression=server_compression) as server:
+            responses = list(client.start_stream(ws_url=server.url, media_generator=iter(synthetic_media(MediaConfig(), 3.0))))
+        self.assertEqual(7, len(responses))
+        self.assertTrue(responses[-1]['response']['is_end_of_stream'])
+        return client._ws_client
+
+    def test_compressed(self):
+        ws_client = self._stream(server_compression=True)
+        stats = ws_client.deflate.stats
+        self.assertTrue(ws_client.deflate.decompress_no_context_takeover)
+        self.assertEqual(7, stats.received_messages)
+        self.assertLess(stats.received_wire_bytes, stats.received_bytes)
+
+        # media and responses, but not the EOS event (too short to compress)
+        self.assertEqual(30, stats.sent_messages)
+        self.assertLess(stats.sent_wire_bytes, stats.sent_bytes)
+
+    def test_declined(self):
+        ws_client = self._stream(server_compression=False)
+        self.assertIsNone(ws_client.deflate)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_benchmark(self):
+        results = benchmark(_synthetic_responses(seconds=30))
+        self.assertEqual(['uncompressed', 'context takeover', 'no context takeover', 'context takeover, 10-bit window'],
+                         [result.name for result in results])
+        self.assertGreater(results[0].ratio, 1.0)
+        for result in results[1:]:
+            self.assertLess(result.ratio, 0.5)
+            self.assertGreater(result.compress_us_per_message, 0.0)
+        self.assertLess(results[1].wire_bytes, results[2].wire_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
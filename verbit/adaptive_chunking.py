@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import typing
+
+from threading import Lock
+from dataclasses import dataclass
+
+
+@dataclass
+class AdaptiveChunkingConfig:
+    target_latency_seconds: float = 1.0     # target latency of responses, since their media was captured (service latency included)
+    min_frame_seconds: float = 0.02
+    max_frame_seconds: float = 0.5
+    initial_frame_seconds: float = 0.1
+    increase_step_seconds: float = 0.02     # additive increase, while the latency is below target
+    decrease_factor: float = 0.5            # multiplicative decrease, while the latency is above target
+    smoothing: float = 0.2                  # weight of each new sample in the moving averages
+
+
+@dataclass
+class AdaptiveChunkingMetrics:
+    frame_seconds: float = 0.0                              # the current frame duration
+    frames: int = 0                                         # media frames sent
+    latency_seconds: typing.Optional[float] = None          # average latency of responses, since their media frame was sent
+    rtt_seconds: typing.Optional[float] = None              # average ping round-trip time
+    send_blocked_seconds: typing.Optional[float] = None     # average time sending a frame blocked
+    increases: int = 0
+    decreases: int = 0
+
+
+class AdaptiveChunker:
+    """
+    Tunes the duration of the media frames sent by the streaming client at runtime, within bounds:
+    as long as the estimated latency is below the target, frames grow (fewer frames, less per-frame overhead),
+    and once it exceeds the target, they shrink (less time spent waiting for a frame to fill).
+
+    The estimated latency of a word is the time its frame waited to fill (up to the frame's duration), plus the
+    latency of responses since the frame containing their end was sent (located by the client's MediaTimeline).
+    Until responses are received, the latter is estimated by half the ping round-trip time, plus the time sending
+    a frame blocked.
+
+    Usage:
+        client.adaptive_chunking = AdaptiveChunker(AdaptiveChunkingConfig(target_latency_seconds=1.0))
+        ...
+        client.adaptive_chunking.metrics
+    """
+
+    def __init__(self, config: typing.Optional[AdaptiveChunkingConfig] = None):
+        self._config = config or AdaptiveChunkingConfig()
+        if not 0 < self._config.min_frame_seconds <= self._config.initial_frame_seconds <= self._config.max_frame_seconds:
+            raise ValueError('Frame durations must satisfy: 0 < min_frame_seconds <= initial_frame_seconds <= max_frame_seconds')
+
+        self._lock = Lock()
+        self._metrics = AdaptiveChunkingMetrics(frame_seconds=self._config.initial_frame_seconds)
+
+        # the effect of an adjustment is only observed by responses to frames sent after it
+        self._adjusted_at = float('-inf')
+
+    @property
+    def config(self) -> AdaptiveChunkingConfig:
+        return self._config
+
+    @property
+    def frame_seconds(self) -> float:
+        return self._metrics.frame_seconds
+
+    @property
+    def metrics(self) -> AdaptiveChunkingMetrics:
+        """A snapshot of the chunker's metrics."""
+        with self._lock:
+            return AdaptiveChunkingMetrics(**vars(self._metrics))
+
+    def frame_bytes(self, bytes_per_second: int, sample_frame_size: int) -> int:
+        """The current frame size, in whole sample frames."""
+        return max(1, round(self._metrics.frame_seconds * bytes_per_second / sample_frame_size)) * sample_frame_size
+
+    def on_frame_sent(self, sent_at: float, blocked_seconds: float):
+        """
+        A media frame was sent.
+
+        :param sent_at:         time.monotonic() when sending started
+        :param blocked_seconds: the time sending it took
+        """
+        with self._lock:
+            self._metrics.frames += 1
+            self._metrics.send_blocked_seconds = self._average(self._metrics.send_blocked_seconds, blocked_seconds)
+
+            # until responses are received, adjust once a frame was sent (at least a frame's duration) after the last adjustment
+            if self._metrics.latency_seconds is None and sent_at >= self._adjusted_at + self._metrics.frame_seconds:
+                self._adjust(sent_at)
+
+    def on_rtt(self, rtt_seconds: float):
+        """A ping round-trip time was measured."""
+        with self._lock:
+            self._metrics.rtt_seconds = self._average(self._metrics.rtt_seconds, rtt_seconds)
+
+    def on_response(self, sent_at: float, received_at: float):
+        """
+        A response was received: its latency is measured since the frame containing its end was sent.
+
+        :param sent_at:         time.monotonic() when the frame containing the response's end was sent
+        :param received_at:     time.monotonic() when the response was received
+        """
+        latency = received_at - sent_at
+        if latency < 0:
+            return
+
+        with self._lock:
+            self._metrics.latency_seconds = self._average(self._metrics.latency_seconds, latency)
+            if sent_at >= self._adjusted_at:
+                self._adjust(received_at)
+
+    def _average(self, average: typing.Optional[float], sample: float) -> float:
+        return sample if average is None else average + self._config.smoothing * (sample - average)
+
+    def _adjust(self, now: float):
+        """Adjust the frame duration (AIMD), by the estimated latency."""
+
+        metrics = self._metrics
+        if metrics.latency_seconds is not None:
+            transport_latency = metrics.latency_seconds
+        else:
+            transport_latency = (metrics.rtt_seconds or 0.0) / 2 + (metrics.send_blocked_seconds or 0.0)
+        estimated_latency = metrics.frame_seconds + transport_latency
+
+        config = self._config
+        if estimated_latency > config.target_latency_seconds and metrics.frame_seconds > config.min_frame_seconds:
+            metrics.frame_seconds = max(config.min_frame_seconds, metrics.frame_seconds * config.decrease_factor)
+            metrics.decreases += 1
+            self._adjusted_at = now
+        elif estimated_latency + config.increase_step_seconds <= config.target_latency_seconds and metrics.frame_seconds < config.max_frame_seconds:
+            metrics.frame_seconds = min(config.max_frame_seconds, metrics.frame_seconds + config.increase_step_seconds)
+            metrics.increases += 1
+            self._adjusted_at = now
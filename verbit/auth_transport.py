@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import ssl
+import json
+import typing
+
+from threading import Lock
+from http.client import HTTPConnection, HTTPSConnection, HTTPResponse
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+
+
+class HttpClientAuth:
+    """
+    Obtains auth tokens with the standard library's http.client, instead of the 'requests' library:
+    'requests' is then never imported, which saves most of the startup time of short-lived processes.
+    The connection to the auth endpoint is kept alive between requests (e.g. of reconnections, or of several clients
+    sharing the transport), saving their TCP and TLS handshakes.
+
+    Usage:
+        client.auth_transport = HttpClientAuth()
+    """
+
+    DEFAULT_TIMEOUT_SECONDS = 30.0
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT_SECONDS, ssl_context: typing.Optional[ssl.SSLContext] = None):
+        """
+        :param timeout:         socket timeout of the requests, in seconds
+        :param ssl_context:     for HTTPS endpoints. if omitted, the default context (verifying certificates)
+        """
+        self._timeout = timeout
+        self._ssl_context = ssl_context
+        self._lock = Lock()
+        self._connections = {}          # (scheme, netloc) -> idle kept-alive connections
+        self.connections_opened = 0
+
+    def post_json(self, url: str, payload: dict) -> dict:
+        """
+        POST a JSON payload, and return the JSON response.
+
+        :raises urllib.error.HTTPError: if the response status is an error status (4xx or 5xx)
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported auth endpoint URL: {url}')
+        path = (parsed.path or '/') + (f'?{parsed.query}' if parsed.query else '')
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+        # a kept-alive connection is used by one request at a time, so concurrent requests open connections of their own
+        key = (parsed.scheme, parsed.netloc)
+        response = None
+        connection = self._take_connection(key)
+        if connection is not None:
+            try:
+                response = self._request(connection, path, body, headers)
+            except (BrokenPipeError, ConnectionResetError):
+                # the server may close a kept-alive connection at any time, before responding: retry once,
+                # over a new connection (Note: http.client's RemoteDisconnected is a ConnectionResetError)
+                connection = None
+        if connection is None:
+            connection = self._open(parsed.scheme, parsed.netloc)
+            response = self._request(connection, path, body, headers)
+
+        try:
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                self._connections.setdefault(key, []).append(connection)
+
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.headers, None)
+        return json.loads(data) if data else {}
+
+    def close(self):
+        """Close the kept-alive connections."""
+        with self._lock:
+            connections = [connection for idle in self._connections.values() for connection in idle]
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+    def _take_connection(self, key: typing.Tuple[str, str]) -> typing.Optional[HTTPConnection]:
+        """Take an idle kept-alive connection, if any."""
+        with self._lock:
+            idle = self._connections.get(key)
+            return idle.pop() if idle else None
+
+    @staticmethod
+    def _request(connection: HTTPConnection, path: str, body: bytes, headers: dict) -> HTTPResponse:
+        """Send a POST request, and wait for its response (closing the connection, if either fails)."""
+        try:
+            connection.request('POST', path, body, headers)
+            return connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+
+    def _open(self, scheme: str, netloc: str) -> HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if scheme == 'https':
+            return HTTPSConnection(netloc, timeout=self._timeout, context=self._ssl_context)
+        return HTTPConnection(netloc, timeout=self._timeout)
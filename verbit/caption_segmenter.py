@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+import uuid
+import typing
+
+from dataclasses import dataclass
+from collections import deque
+
+
+@dataclass
+class CaptionWindowPolicy:
+    window_seconds: float = 3.0                     # maximum duration of a caption window
+    max_gap_seconds: float = 1.0                    # a silence at least this long starts a new window
+    stable_revisions: typing.Optional[int] = 2      # see below
+
+    # Latency policy:
+    #   None: windows are only emitted once their utterance is final (most accurate, an utterance's latency)
+    #   int:  a complete window (followed by further words) is emitted from a non-final response, once its words
+    #         were unchanged in this many consecutive responses of the utterance (lower latency)
+
+
+class _StreamState:
+    """Segmentation state of a single (service type, language) stream of transcript responses."""
+
+    def __init__(self, stable_revisions: typing.Optional[int]):
+        self.committed_end = float('-inf')
+        self.revisions = deque(maxlen=max(0, (stable_revisions or 1) - 1))
+
+
+class CaptionSegmenter:
+    """
+    Derives "captions"-type responses from "transcript"-type responses: non-overlapping, final windows of words,
+    so that only transcripts need to be requested from the service to feed caption consumers as well.
+
+    The word items of each transcript response are grouped into windows (see: CaptionWindowPolicy). Once emitted,
+    a window is committed: later revisions of its utterance only contribute words after it.
+    Transcription and translation streams (and each translation language) are segmented separately.
+
+    Usage:
+        segmenter = CaptionSegmenter()
+        response_generator = client.start_stream(..., response_types=ResponseType.Transcript)
+        for response in segmenter.tee(response_generator):
+            ...  # transcript responses, each followed by the captions responses derived from it
+    """
+
+    # tolerance for comparing item times
+    EPSILON = 1e-6
+
+    def __init__(self, policy: typing.Optional[CaptionWindowPolicy] = None):
+        self._policy = policy or CaptionWindowPolicy()
+        if self._policy.stable_revisions is not None and self._policy.stable_revisions < 1:
+            raise ValueError("Parameter 'stable_revisions' must be at least 1")
+        self._streams = {}
+
+    def feed(self, response: dict) -> typing.List[dict]:
+        """
+        Segment a transcript response.
+
+        :return: the captions responses which are ready to be emitted (possibly none)
+        """
+
+        body = response.get('response', {})
+        if body.get('type') != 'transcript':
+            return []
+        captions = self._segment(body) if body.get('alternatives') else []
+
+        # the last derived response ends the stream (an empty one, if none was derived)
+        if body.get('is_end_of_stream'):
+            if not captions:
+                captions.append(self._captions_response(body, []))
+            captions[-1]['response']['is_end_of_stream'] = True
+
+        return captions
+
+    def segment(self, responses: typing.Iterable[dict]) -> typing.Iterator[dict]:
+        """Generator function yielding the captions responses derived from `responses`."""
+        for response in responses:
+            yield from self.feed(response)
+
+    def tee(self, responses: typing.Iterable[dict]) -> typing.Iterator[dict]:
+        """Generator function yielding each of `responses`, followed by the captions responses derived from it."""
+        for response in responses:
+            captions = self.feed(response)
+            yield response
+            yield from captions
+
+    def _segment(self, body: dict) -> typing.List[dict]:
+        key = (body.get('service_type'), body.get('language_code'))
+        state = self._streams.get(key)
+        if state is None:
+            state = self._streams[key] = _StreamState(self._policy.stable_revisions)
+
+        is_final = bool(body.get('is_final'))
+        windows = self._windows(self._uncommitted_items(body['alternatives'][0].get('items', []), state.committed_end))
+
+        # a final response completes all of its windows
+        if is_final:
+            ready = windows
+            state.revisions.clear()
+
+        # complete windows (all but the last) of a non-final response, as long as their words are stable
+        else:
+            ready = []
+            if self._policy.stable_revisions is not None:
+
+                # compared with the previous revisions, once there are enough of them
+                if len(state.revisions) == state.revisions.maxlen:
+                    for window in windows[:-1]:
+                        if not all(self._item_key(item) in revision for revision in state.revisions for item in window):
+                            break
+                        ready.append(window)
+                state.revisions.append({self._item_key(item) for window in windows for item in window})
+
+        captions = [self._captions_response(body, window) for window in ready]
+        if ready:
+            state.committed_end = max(item['end'] for item in ready[-1])
+        return captions
+
+    def _uncommitted_items(self, items: typing.List[dict], committed_end: float) -> typing.List[dict]:
+        """The items after the committed windows (excluding punctuation attached to the last committed word)."""
+        uncommitted = [item for item in items if item['start'] >= committed_end - self.EPSILON]
+        if committed_end > float('-inf'):
+            while uncommitted and (uncommitted[0].get('kind') == 'punct' or uncommitted[0]['end'] <= committed_end + self.EPSILON):
+                uncommitted.pop(0)
+        return uncommitted
+
+    def _windows(self, items: typing.List[dict]) -> typing.List[typing.List[dict]]:
+        windows = []
+        for item in items:
+            if windows and item.get('kind') != 'punct':
+                window = windows[-1]
+                too_long = item['end'] - window[0]['start'] > self._policy.window_seconds
+                too_far = item['start'] - window[-1]['end'] >= self._policy.max_gap_seconds
+                if too_long or too_far:
+                    windows.append([])
+            elif not windows:
+                windows.append([])
+            windows[-1].append(item)
+        return [window for window in windows if any(item.get('kind') != 'punct' for item in window)]
+
+    @staticmethod
+    def _item_key(item: dict) -> tuple:
+        return item['value'], round(item['start'], 3), round(item['end'], 3)
+
+    @staticmethod
+    def _captions_response(body: dict, window: typing.List[dict]) -> dict:
+        if window:
+            start, end = window[0]['start'], max(item['end'] for item in window)
+        else:
+            start = end = body.get('end', body.get('start', 0.0))
+
+        # shift the response's time references to the window's start
+        shift = start - body.get('start', start)
+        time_refs = {k: body[k] + shift for k in ('start_pts', 'start_epoch') if body.get(k) is not None}
+
+        transcript = ''
+        for item in window:
+            transcript += item['value'] if item.get('kind') == 'punct' or not transcript else ' ' + item['value']
+
+        speaker_ids = {item.get('speaker_id') for item in window}
+        return {
+            'response': {
+                'id': str(uuid.uuid4()),
+                'type': 'captions',
+                'service_type': body.get('service_type'),
+                'language_code': body.get('language_code'),
+                'is_final': True,
+                'is_end_of_stream': False,
+                'start': start,
+                'end': end,
+                **time_refs,
+                'speakers': [speaker for speaker in body.get('speakers', []) if speaker.get('id') in speaker_ids],
+                'alternatives': [{
+                    'transcript': transcript,
+                    'start': start,
+                    'end': end,
+                    **time_refs,
+                    'items': [dict(item) for item in window],
+                }],
+            }
+        }
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+import typing
+
+from dataclasses import dataclass, field
+from xml.sax.saxutils import escape
+
+
+@dataclass
+class SegmentationRules:
+    max_line_length: int = 32           # characters per line
+    max_lines: int = 2                  # lines per cue
+    max_duration: float = 7.0           # seconds per cue
+    min_duration: float = 1.0           # seconds per cue, a cue is extended up to the next one to reach it
+    max_cps: float = 17.0               # characters per second, a cue is extended up to the next one to keep under it
+
+
+@dataclass
+class CaptionCue:
+    start: float
+    end: float
+    lines: typing.List[str] = field(default_factory=list)
+    index: int = 0                      # 1-based, in order of writing
+
+
+def wrap_lines(words: typing.Sequence[str], max_line_length: int) -> typing.List[str]:
+    """Greedily wrap `words` into lines of up to `max_line_length` characters (a longer word takes a line of its own)."""
+    lines = []
+    for word in words:
+        if lines and len(lines[-1]) + 1 + len(word) <= max_line_length:
+            lines[-1] += ' ' + word
+        else:
+            lines.append(word)
+    return lines
+
+
+def segment_items(items: typing.Iterable[dict], rules: SegmentationRules, time_offset: float = 0.0) -> typing.Iterator[CaptionCue]:
+    """
+    Segment word items (of a response's alternative) into caption cues, by the line-length and duration rules.
+    Punctuation items are attached to the word before them.
+
+    :param items:       the word items, see: examples/responses/schema.md
+    :param rules:       segmentation rules
+    :param time_offset: added to all item times, e.g. to align them to the media stream's PTS
+
+    :return: a generator of cues, with their original end times (see: extend_cue())
+    """
+
+    words = []
+    start = end = None
+
+    for item in items:
+        value = item['value']
+
+        # attach punctuation to the preceding word
+        if item.get('kind') == 'punct' and words:
+            words[-1] += value
+            end = max(end, item['end'] + time_offset)
+            continue
+
+        item_start, item_end = item['start'] + time_offset, item['end'] + time_offset
+        if words:
+            fits = len(wrap_lines(words + [value], rules.max_line_length)) <= rules.max_lines
+            if not fits or item_end - start > rules.max_duration:
+                yield CaptionCue(start=start, end=end, lines=wrap_lines(words, rules.max_line_length))
+                words = []
+
+        if not words:
+            start = item_start
+        words.append(value)
+        end = item_end
+
+    if words:
+        yield CaptionCue(start=start, end=end, lines=wrap_lines(words, rules.max_line_length))
+
+
+def extend_cue(cue: CaptionCue, rules: SegmentationRules, next_start: typing.Optional[float] = None):
+    """Extend a cue's end to its minimum duration and its maximum characters-per-second, but not beyond `next_start`."""
+    chars = sum(len(line) for line in cue.lines)
+    desired_end = max(cue.end, cue.start + rules.min_duration, cue.start + chars / rules.max_cps)
+    if next_start is not None:
+        desired_end = min(desired_end, max(cue.end, next_start))
+    cue.end = desired_end
+
+
+class CaptionWriter:
+    """
+    Base class of incremental caption writers: consumes responses and appends caption cues to an output
+    (a text file, or any object with a `write(str)` method, e.g. `socket.makefile('w')`).
+
+    Only final responses of the given types are written. Each response is segmented into cues (see: SegmentationRules),
+    and the cues are written once per response. Memory use is constant: only the last cue is held back,
+    so that it's extended (see: extend_cue()) up to the start of the next one at most.
+    The output is flushed on flush(), i.e. at the end of the stream and on close(), unless `flush_each_response`.
+
+    Usage:
+        with open('captions.srt', 'w') as f, SrtWriter(f) as writer:
+            for response in writer.tee(client.start_stream(...)):
+                ...
+    """
+
+    def __init__(self,
+                 output: typing.Any,
+                 rules: typing.Optional[SegmentationRules] = None,
+                 time_base: str = 'start',
+                 time_offset: float = 0.0,
+                 response_types: typing.Collection[str] = ('captions', ),
+                 flush_each_response: bool = False):
+        """
+        :param output:              the object to write to
+        :param rules:               segmentation rules
+        :param time_base:           'start' for times measured from the beginning of the media stream,
+                                    or 'start_pts' for times aligned to the PTS of the input media stream (for broadcast)
+        :param time_offset:         added to all cue times
+        :param response_types:      the response types to write cues of
+        :param flush_each_response: whether to flush the output after the cues of each response are written,
+                                    e.g. for live captions read from a socket or a growing file
+        """
+
+        if time_base not in ('start', 'start_pts'):
+            raise ValueError("Parameter 'time_base' must be either 'start' or 'start_pts'")
+
+        self._output = output
+        self._rules = rules or SegmentationRules()
+        self._time_base = time_base
+        self._time_offset = time_offset
+        self._response_types = response_types
+        self._flush_each_response = flush_each_response
+
+        self._pending = None
+        self._first_body = None         # the body of the first written response, for the format's header
+        self._count = 0
+        self._started = False
+        self._closed = False
+
+    @property
+    def cues_written(self) -> int:
+        return self._count
+
+    def write_response(self, response: dict):
+        """Segment a response into cues and write them (except for the last, which is held back until the next cue)."""
+
+        body = response.get('response', {})
+        if body.get('is_final') and body.get('type') in self._response_types and body.get('alternatives'):
+            if self._first_body is None:
+                self._first_body = body
+
+            # the offset of item times from the time base
+            time_offset = self._time_offset
+            if self._time_base == 'start_pts' and body.get('start_pts') is not None:
+                time_offset += body['start_pts'] - body['start']
+
+            chunks = []
+            for cue in segment_items(body['alternatives'][0].get('items', []), self._rules, time_offset):
+                if self._pending is not None:
+                    extend_cue(self._pending, self._rules, next_start=cue.start)
+                    chunks.append(self._format_pending())
+                self._pending = cue
+            self._write(chunks)
+            if chunks and self._flush_each_response:
+                self._flush_output()
+
+        # no more cues will follow
+        if body.get('is_end_of_stream'):
+            self.flush()
+
+    def write_responses(self, responses: typing.Iterable[dict]):
+        """Write all responses, then close the writer."""
+        for response in responses:
+            self.write_response(response)
+        self.close()
+
+    def tee(self, responses: typing.Iterable[dict]) -> typing.Iterator[dict]:
+        """Generator function writing each response, and yielding it on. The writer is closed once exhausted."""
+        for response in responses:
+            self.write_response(response)
+            yield response
+        self.close()
+
+    def flush(self):
+        """Write the held back cue (with no next cue to limit its extension), and flush the output."""
+        self._write(self._flush_pending())
+        self._flush_output()
+
+    def close(self):
+        """Write the held back cue and the format's footer, and flush the output. The output itself is not closed."""
+        if self._closed:
+            return
+        chunks = self._flush_pending()
+        chunks += [self._format_footer()] if self._started else [self._format_header(self._first_body or {}), self._format_footer()]
+        self._write(chunks)
+        self._flush_output()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+    def _format_pending(self) -> str:
+        cue, self._pending = self._pending, None
+        self._count += 1
+        cue.index = self._count
+
+        text = self._format_cue(cue)
+        if not self._started:
+            self._started = True
+            text = self._format_header(self._first_body or {}) + text
+        return text
+
+    def _flush_pending(self) -> typing.List[str]:
+        """Format the held back cue, if any."""
+        if self._pending is None:
+            return []
+        extend_cue(self._pending, self._rules)
+        return [self._format_pending()]
+
+    def _write(self, chunks: typing.List[str]):
+        if chunks:
+            self._output.write(''.join(chunks))
+
+    def _flush_output(self):
+        flush = getattr(self._output, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _format_header(self, body: dict) -> str:
+        return ''
+
+    def _format_footer(self) -> str:
+        return ''
+
+    def _format_cue(self, cue: CaptionCue) -> str:
+        raise NotImplementedError()
+
+    @staticmethod
+    def _timestamp(seconds: float, fraction_separator: str) -> str:
+        millis = max(0, round(seconds * 1000))
+        hours, millis = divmod(millis, 3600 * 1000)
+        minutes, millis = divmod(millis, 60 * 1000)
+        secs, millis = divmod(millis, 1000)
+        return f'{hours:02d}:{minutes:02d}:{secs:02d}{fraction_separator}{millis:03d}'
+
+
+class SrtWriter(CaptionWriter):
+    """Writes SubRip (.srt) captions."""
+
+    def _format_cue(self, cue: CaptionCue) -> str:
+        lines = '\n'.join(cue.lines)
+        return f'{cue.index}\n{self._timestamp(cue.start, ",")} --> {self._timestamp(cue.end, ",")}\n{lines}\n\n'
+
+
+class WebVttWriter(CaptionWriter):
+    """Writes WebVTT (.vtt) captions."""
+
+    def _format_header(self, body: dict) -> str:
+        return 'WEBVTT\n\n'
+
+    def _format_cue(self, cue: CaptionCue) -> str:
+        lines = '\n'.join(escape(line) for line in cue.lines)
+        return f'{cue.index}\n{self._timestamp(cue.start, ".")} --> {self._timestamp(cue.end, ".")}\n{lines}\n\n'
+
+
+class TtmlWriter(CaptionWriter):
+    """Writes TTML (.ttml) captions. The document's language is that of the first written response."""
+
+    def _format_header(self, body: dict) -> str:
+        language = escape(body.get('language_code') or '', {'"': '&quot;'})
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<tt xmlns="http://www.w3.org/ns/ttml" xml:lang="{language}">\n'
+                '<body>\n<div>\n')
+
+    def _format_footer(self) -> str:
+        return '</div>\n</body>\n</tt>\n'
+
+    def _format_cue(self, cue: CaptionCue) -> str:
+        lines = '<br/>'.join(escape(line) for line in cue.lines)
+        return f'<p begin="{self._timestamp(cue.start, ".")}" end="{self._timestamp(cue.end, ".")}">{lines}</p>\n'
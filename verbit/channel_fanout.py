@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+
+import json
+import time
+import queue
+import typing
+import logging
+import argparse
+
+from dataclasses import dataclass, replace, asdict
+from threading import Thread, Lock
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig, ResponseType
+
+try:
+    import numpy as np
+except ImportError:     # an optional dependency, see: extras_require in setup.py
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for channel fan-out: pip install 'verbit-streaming-sdk[multichannel]'")
+
+
+def deinterleave(data: bytes, num_channels: int, sample_width: int) -> 'np.ndarray':
+    """
+    A strided view of interleaved PCM `data` (whole sample frames), by channel: view[channel] holds the channel's
+    samples, as a (frames, sample_width) array of bytes. No samples are copied until e.g. view[channel].tobytes().
+    """
+    _require_numpy()
+    frames = np.frombuffer(data, dtype=np.uint8).reshape(-1, num_channels, sample_width)
+    return frames.transpose(1, 0, 2)
+
+
+@dataclass
+class FanoutMetrics:
+    chunks: int = 0                     # source chunks read
+    source_bytes: int = 0               # source media bytes read (all channels)
+    deinterleave_seconds: float = 0.0   # CPU time of the capture loop, de-interleaving and queueing
+    blocked_seconds: float = 0.0        # time the capture loop waited for a channel's session to take its media
+
+
+class _End:
+    """Marks the end of a channel's media (or of its responses), possibly with the error ending it."""
+
+    def __init__(self, error: typing.Optional[BaseException] = None):
+        self.error = error
+
+
+class ChannelFanout:
+    """
+    Fans out an interleaved multi-channel media source (e.g. a multi-mic room) to one streaming session per channel.
+
+    A single capture loop (a thread of its own) reads the source, de-interleaves each chunk with NumPy strided views,
+    and hands each channel's mono media to its session through a bounded queue. A session that falls behind
+    by more than MAX_BUFFERED_CHUNKS blocks the capture loop, so no channel's media is dropped.
+
+    Requires NumPy.
+
+    Usage:
+        fanout = ChannelFanout(media_generator, MediaConfig(num_channels=4), labels=['host', 'guest1', 'guest2', 'guest3'])
+        clients = [WebSocketStreamingClient(customer_token=token) for _ in fanout.labels]
+        for label, response in fanout.start_streams(clients, ws_urls):
+            ...
+    """
+
+    MAX_BUFFERED_CHUNKS = 16
+
+    # how often a blocked capture loop checks whether the fan-out was closed
+    CLOSE_POLL_SECONDS = 0.1
+
+    def __init__(self,
+                 media_generator: typing.Iterator[bytes],
+                 media_config: MediaConfig,
+                 channels: typing.Optional[typing.Sequence[int]] = None,
+                 labels: typing.Optional[typing.Sequence[str]] = None):
+        """
+        :param media_generator: a generator of interleaved media chunks
+        :param media_config:    the source's media config, of `num_channels` channels
+        :param channels:        the indices of the channels to fan out (default: all)
+        :param labels:          a label per fanned-out channel, for its responses (default: the channel indices)
+        """
+        _require_numpy()
+
+        self._channels = list(range(media_config.num_channels)) if channels is None else list(channels)
+        if not self._channels or any(not 0 <= c < media_config.num_channels for c in self._channels):
+            raise ValueError(f'Channels must be within 0..{media_config.num_channels - 1}')
+        self._labels = [str(c) for c in self._channels] if labels is None else list(labels)
+        if len(self._labels) != len(self._channels):
+            raise ValueError('A label is required per channel')
+
+        self._media_generator = media_generator
+        self._media_config = media_config
+        self._queues = [queue.Queue(self.MAX_BUFFERED_CHUNKS) for _ in self._channels]
+        self._metrics = FanoutMetrics()
+        self._closed = False
+        self._start_lock = Lock()
+        self._capture_thread = None
+
+    @property
+    def labels(self) -> typing.List[str]:
+        return self._labels
+
+    @property
+    def channel_media_config(self) -> MediaConfig:
+        """The media config of each channel's session (mono)."""
+        return replace(self._media_config, num_channels=1)
+
+    @property
+    def metrics(self) -> FanoutMetrics:
+        """A snapshot of the capture loop's metrics."""
+        return replace(self._metrics)
+
+    def media_generator(self, index: int) -> typing.Iterator[bytes]:
+        """
+        Generator function of a fanned-out channel's media, by its index in `labels`.
+        The capture loop starts once any channel's media is first pulled.
+        """
+        self._start()
+        channel_queue = self._queues[index]
+        while True:
+            chunk = channel_queue.get()
+            if isinstance(chunk, _End):
+                if chunk.error is not None:
+                    raise chunk.error
+                return
+            yield chunk
+
+    def start_streams(self,
+                      clients: typing.Sequence[WebSocketStreamingClient],
+                      ws_urls: typing.Sequence[str],
+                      response_types: ResponseType = ResponseType.Transcript) -> typing.Iterator[typing.Tuple[str, dict]]:
+        """
+        Start a streaming session per channel, and merge their responses.
+
+        :param clients:         a streaming client per channel
+        :param ws_urls:         a WebSocket url per channel, as obtained from the Ordering API
+        :param response_types:  a bitmask Flag denoting which response type(s) should be returned by the service
+
+        :return: a generator which yields (channel label, response) tuples, in order of arrival.
+                 it raises the first error of any session, after closing all of them.
+        """
+        if not len(clients) == len(ws_urls) == len(self._channels):
+            raise ValueError('A client and WebSocket url are required per channel')
+
+        merged = queue.Queue()
+
+        def receive(label: str, responses: typing.Iterator[dict]):
+            try:
+                for response in responses:
+                    merged.put((label, response))
+                merged.put(_End())
+            except Exception as ex:
+                merged.put(_End(ex))
+
+        threads = []
+        finished = False
+        try:
+            for index, (client, ws_url, label) in enumerate(zip(clients, ws_urls, self._labels)):
+                responses = client.start_stream(media_generator=self.media_generator(index), ws_url=ws_url,
+                                                media_config=self.channel_media_config, response_types=response_types)
+                thread = Thread(target=receive, args=(label, responses), name=f'fanout_responses_{label}', daemon=True)
+                thread.start()
+                threads.append(thread)
+
+            running = len(threads)
+            while running:
+                item = merged.get()
+                if isinstance(item, _End):
+                    if item.error is not None:
+                        raise item.error
+                    running -= 1
+                    continue
+                yield item
+            finished = True
+
+        finally:
+            if not finished:
+                self.close()
+                for client in clients:
+                    client.close()
+
+    def close(self):
+        """Stop the capture loop (once the source yields its next chunk), ending all channels' media."""
+        self._closed = True
+
+    def _start(self):
+        with self._start_lock:
+            if self._capture_thread is None:
+                self._capture_thread = Thread(target=self._capture_worker, name='fanout_capture', daemon=True)
+                self._capture_thread.start()
+
+    def _put(self, channel_queue: queue.Queue, item) -> bool:
+        """Put an item on a channel's queue, unless closed while it's full."""
+        while not self._closed:
+            try:
+                channel_queue.put(item, timeout=self.CLOSE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _capture_worker(self):
+        """Thread function reading the source, and handing each channel's media to its queue."""
+
+        frame_size = self._media_config.sample_width * self._media_config.num_channels
+        pending = b''
+        end = _End()
+
+        try:
+            for chunk in self._media_generator:
+                cpu_started_at = time.thread_time()
+                if self._closed:
+                    break
+
+                # only whole sample frames are de-interleaved, a partial frame is kept for the next chunk
+                data = pending + chunk if pending else chunk
+                aligned = len(data) - len(data) % frame_size
+                pending = data[aligned:]
+                self._metrics.chunks += 1
+                self._metrics.source_bytes += len(chunk)
+                if not aligned:
+                    continue
+
+                view = deinterleave(memoryview(data)[:aligned], self._media_config.num_channels, self._media_config.sample_width)
+                for channel, channel_queue in zip(self._channels, self._queues):
+                    channel_chunk = view[channel].tobytes()
+                    if channel_queue.full():
+                        blocked_at = time.monotonic()
+                        if not self._put(channel_queue, channel_chunk):
+                            break
+                        self._metrics.blocked_seconds += time.monotonic() - blocked_at
+                    else:
+                        channel_queue.put(channel_chunk)
+                self._metrics.deinterleave_seconds += time.thread_time() - cpu_started_at
+
+        except Exception as ex:
+            end = _End(ex)
+
+        # when closed, channels still waiting for media are ended too
+        for channel_queue in self._queues:
+            if not self._put(channel_queue, end):
+                try:
+                    channel_queue.put_nowait(end)
+                except queue.Full:
+                    pass
+
+
+@dataclass
+class FanoutBenchmarkResult:
+    channels: int
+    media_seconds: float                        # per channel
+    deinterleave_cpu_per_channel: float         # CPU seconds of de-interleaving, per channel per media second
+    process_cpu_per_channel: float              # process CPU seconds (incl. the local stand-in server), per channel per media second
+    elapsed_seconds: float
+    responses: int
+
+
+def benchmark(num_channels: int, media_seconds: float, chunk_seconds: float = 0.1) -> FanoutBenchmarkResult:
+    """
+    Fan out `media_seconds` of synthetic `num_channels`-channel media to a session per channel, streamed as fast as
+    possible to a local stand-in server, and measure the CPU cost per channel.
+    """
+    from verbit.loadtest import synthetic_media
+    from verbit.stand_in_server import StandInServer
+
+    media_config = MediaConfig(num_channels=num_channels)
+    chunks = synthetic_media(media_config, media_seconds, chunk_seconds)
+    fanout = ChannelFanout(iter(chunks), media_config)
+
+    clients = []
+    for _ in range(num_channels):
+        client = WebSocketStreamingClient(customer_token='stand-in')
+        client.set_logger(logging.getLogger('verbit.fanout'))
+        clients.append(client)
+
+    with StandInServer() as server:
+        cpu_started_at = time.process_time()
+        started_at = time.monotonic()
+        responses = sum(1 for _ in fanout.start_streams(clients, [server.url] * num_channels))
+        elapsed = time.monotonic() - started_at
+        process_cpu = time.process_time() - cpu_started_at
+
+    channel_media_seconds = fanout.metrics.source_bytes / (media_config.sample_rate * media_config.sample_width * num_channels)
+    return FanoutBenchmarkResult(channels=num_channels,
+                                 media_seconds=channel_media_seconds,
+                                 deinterleave_cpu_per_channel=fanout.metrics.deinterleave_seconds / num_channels / channel_media_seconds,
+                                 process_cpu_per_channel=process_cpu / num_channels / channel_media_seconds,
+                                 elapsed_seconds=elapsed,
+                                 responses=responses)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the 'fanout-benchmark' command's arguments to `parser`."""
+    parser.add_argument('--channels', type=int, nargs='+', default=[1, 2, 4, 8], help='Numbers of channels to benchmark')
+    parser.add_argument('--seconds', type=float, default=60.0, help='Media duration, per channel')
+    parser.add_argument('--chunk-seconds', type=float, default=0.1, help='Duration of each source chunk')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """The 'fanout-benchmark' command."""
+
+    results = [benchmark(channels, args.seconds, args.chunk_seconds) for channels in args.channels]
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        for result in results:
+            print(f'{result.channels:>3} channels: de-interleave {result.deinterleave_cpu_per_channel:8.4%} CPU per channel, '
+                  f'process {result.process_cpu_per_channel:7.3%} CPU per channel (incl. stand-in server), '
+                  f'{result.media_seconds:.0f}s of media in {result.elapsed_seconds:.2f}s, {result.responses} responses')
+    return 0
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import sys
+import typing
+import argparse
+
+from verbit import loadtest, sqlite_sink, ws_compression, channel_fanout, startup_benchmark
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    """The 'verbit-stream' command line entry point."""
+
+    parser = argparse.ArgumentParser(prog='verbit-stream', description="Tools for Verbit's Streaming Speech Recognition SDK")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    loadtest.add_arguments(subparsers.add_parser('loadtest', help='Run concurrent simulated streams and report their performance'))
+    sqlite_sink.add_arguments(subparsers.add_parser('sink-benchmark', help="Measure the SQLite transcript sink's sustained insert rate"))
+    ws_compression.add_arguments(subparsers.add_parser('compression-benchmark', help='Measure the bytes on the wire and CPU cost of compressing responses'))
+    channel_fanout.add_arguments(subparsers.add_parser('fanout-benchmark', help='Measure the CPU cost per channel of fanning out multi-channel media'))
+    startup_benchmark.add_arguments(subparsers.add_parser('startup-benchmark', help="Measure a fresh process's import, first connect and first response times"))
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import time
+import heapq
+import typing
+import itertools
+
+from enum import IntEnum
+from dataclasses import dataclass, replace
+from threading import Condition, Lock
+
+
+class ConnectPriority(IntEnum):
+    """Priority of connect attempts, lower values are served first."""
+    Live = 0
+    Batch = 1
+
+
+class CircuitState:
+    CLOSED = 'closed'           # connect attempts are allowed
+    OPEN = 'open'               # connect attempts are blocked, until the reset timeout passes
+    HALF_OPEN = 'half_open'     # a single probing connect attempt is allowed
+
+
+class ConnectThrottledError(ConnectionError):
+    """Raised when a connect attempt could not be admitted by the ConnectionGovernor in time."""
+
+
+@dataclass
+class ConnectGovernorMetrics:
+    admitted: int = 0                   # connect attempts admitted
+    throttled: int = 0                  # connect attempts which had to wait before being admitted
+    rejected: int = 0                   # connect attempts which timed out waiting
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    waiting: int = 0                    # connect attempts currently waiting
+    successes: int = 0
+    failures: int = 0
+    circuit_state: str = CircuitState.CLOSED
+    circuit_opens: int = 0
+
+
+class ConnectionGovernor:
+    """
+    Coordinates connect attempts (to the auth and WebSocket endpoints) across all clients in a process,
+    so that a service or network blip does not turn into a reconnection storm.
+
+    1. Rate limiting: attempts are admitted by a token bucket, refilled at `rate` tokens per second,
+       up to `burst` tokens. Waiting attempts are admitted by priority (see: ConnectPriority), then in arrival order.
+    2. Circuit breaker: after `failure_threshold` consecutive failed attempts, the circuit opens and all attempts
+       wait `reset_timeout` seconds. Then, a single probing attempt is admitted: its success closes the circuit,
+       and its failure opens it again.
+
+    A governor is shared by setting it on each client (see: connect_governor), usually the process-wide one:
+        client.connect_governor = ConnectionGovernor.shared()
+    """
+
+    DEFAULT_RATE = 5.0
+    DEFAULT_BURST = 10
+    DEFAULT_FAILURE_THRESHOLD = 10
+    DEFAULT_RESET_TIMEOUT_SECONDS = 5.0
+
+    _shared = None
+    _shared_lock = Lock()
+
+    def __init__(self,
+                 rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT_SECONDS):
+        """
+        :param rate:                connect attempts admitted per second (on average)
+        :param burst:               maximum connect attempts admitted at once
+        :param failure_threshold:   consecutive failures which open the circuit
+        :param reset_timeout:       seconds the circuit stays open, before probing
+        """
+
+        if rate <= 0 or burst < 1:
+            raise ValueError("Parameters 'rate' and 'burst' must be positive")
+
+        self._rate = rate
+        self._burst = burst
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+
+        self._condition = Condition()
+
+        # token bucket
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+
+        # waiting attempts, as a heap of (priority, arrival) tickets
+        self._waiters = []
+        self._arrivals = itertools.count()
+
+        # circuit breaker
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+
+        self._metrics = ConnectGovernorMetrics()
+
+    @classmethod
+    def shared(cls) -> 'ConnectionGovernor':
+        """The process-wide governor, created with default parameters on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def metrics(self) -> ConnectGovernorMetrics:
+        """A snapshot of the governor's metrics."""
+        with self._condition:
+            return replace(self._metrics, waiting=len(self._waiters), circuit_state=self._state)
+
+    def acquire(self, priority: ConnectPriority = ConnectPriority.Live, timeout: typing.Optional[float] = None, probe: bool = True):
+        """
+        Wait until a connect attempt is admitted.
+
+        :param priority:    the priority of the connect attempt
+        :param timeout:     maximum seconds to wait. if None, waits as long as needed
+        :param probe:       whether the attempt reports its result (see: record_success(), record_failure()),
+                            so that it may be admitted as the probing attempt of a half-open circuit
+
+        :raises ConnectThrottledError: if not admitted within `timeout` seconds
+        """
+
+        started_at = time.monotonic()
+        deadline = None if timeout is None else started_at + timeout
+
+        with self._condition:
+
+            ticket = (int(priority), next(self._arrivals))
+            heapq.heappush(self._waiters, ticket)
+            throttled = False
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    # only the first waiter in line may be admitted
+                    wait_seconds = None
+                    if self._waiters[0] == ticket:
+                        wait_seconds = max(self._circuit_blocked_seconds(now, probe), (1.0 - self._tokens) / self._rate)
+                        if wait_seconds <= 0.0:
+                            self._admit(now, started_at if throttled else None, probe)
+                            return
+
+                    # timed out
+                    if deadline is not None:
+                        if now >= deadline:
+                            self._metrics.rejected += 1
+                            raise ConnectThrottledError(f'Connect attempt was not admitted within {timeout} seconds, circuit is {self._state}')
+                        wait_seconds = min(wait_seconds, deadline - now) if wait_seconds is not None else deadline - now
+
+                    throttled = True
+                    self._condition.wait(wait_seconds)
+
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def record_success(self):
+        """Report that an admitted connect attempt succeeded (or reached the service)."""
+        with self._condition:
+            self._metrics.successes += 1
+            self._consecutive_failures = 0
+            self._probe_started_at = None
+            self._state = CircuitState.CLOSED
+            self._condition.notify_all()
+
+    def record_failure(self):
+        """Report that an admitted connect attempt failed, due to the service or the network."""
+        with self._condition:
+            self._metrics.failures += 1
+            self._consecutive_failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+                self._open_circuit()
+            self._condition.notify_all()
+
+    def _refill(self, now: float):
+        self._tokens = min(float(self._burst), self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def _admit(self, now: float, throttled_since: typing.Optional[float], probe: bool):
+        """Admit an attempt, which waited since `throttled_since` (or None, if it did not wait)."""
+        self._tokens -= 1.0
+
+        # the circuit is half-open: this is the probing attempt
+        if self._state == CircuitState.HALF_OPEN and probe:
+            self._probe_started_at = now
+
+        self._metrics.admitted += 1
+        if throttled_since is not None:
+            waited = now - throttled_since
+            self._metrics.throttled += 1
+            self._metrics.total_wait_seconds += waited
+            self._metrics.max_wait_seconds = max(self._metrics.max_wait_seconds, waited)
+
+    def _open_circuit(self):
+        if self._state != CircuitState.OPEN:
+            self._metrics.circuit_opens += 1
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started_at = None
+
+    def _circuit_blocked_seconds(self, now: float, probe: bool) -> float:
+        """
+        How long attempts are blocked by the circuit breaker (at most, as a probing attempt's report unblocks them).
+
+        :return: seconds to wait, or 0.0 if not blocked
+        """
+
+        if self._state == CircuitState.OPEN:
+            reopen_at = self._opened_at + self._reset_timeout
+            if now < reopen_at:
+                return reopen_at - now
+            self._state = CircuitState.HALF_OPEN
+
+        if self._state == CircuitState.HALF_OPEN and probe and self._probe_started_at is not None:
+
+            # a probing attempt which never reported is considered lost after the reset timeout
+            lost_at = self._probe_started_at + self._reset_timeout
+            if now < lost_at:
+                return lost_at - now
+
+        return 0.0
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import json
+import time
+import typing
+import logging
+
+from collections import deque
+from threading import Thread, Condition, Lock
+
+
+class LogEvent:
+    """
+    A log message of a named event with key/value fields, formatted only once a handler emits it.
+    Logged with a plain logging.Logger, it reads as its `text` (formatted with the fields), and with an EventLogger,
+    as key/value pairs: '<name> key=value ...'.
+
+    Usage:
+        logger.debug(LogEvent('event_sent', 'Sending event: event={event!r}', event='EOS'))
+    """
+
+    __slots__ = ('name', 'text', 'fields')
+
+    def __init__(self, name: str, text: str, **fields):
+        self.name = name
+        self.text = text
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return self.text.format(**self.fields)
+
+
+class _KeyValueMessage:
+    """A key/value log message, formatted once emitted."""
+
+    __slots__ = ('name', 'fields')
+
+    def __init__(self, name: typing.Optional[str], fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self) -> str:
+        pairs = [f'{key}={_format_value(value)}' for key, value in self.fields.items()]
+        return ' '.join([self.name] + pairs if self.name else pairs)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, (dict, list, tuple)):
+        text = json.dumps(value, default=str)
+    elif isinstance(value, (bytes, bytearray)):
+        text = bytes(value).decode('utf-8', 'backslashreplace')
+    else:
+        text = str(value)
+    if text and not any(char.isspace() or char in '"=' for char in text):
+        return text
+    return json.dumps(text)
+
+
+class EventLogger(logging.LoggerAdapter):
+    """
+    Structured logging for the streaming client: events are logged as key/value pairs tagged with a session id,
+    and repetitive events (e.g. pings) are rate-limited per event name, with the number of events suppressed since
+    the previous one logged as 'suppressed=N'. Other messages are logged as 'message="..." session_id=...'.
+
+    Records also carry the `event`, `fields` and `session_id` attributes, for formatters (e.g. JSON) to use.
+
+    Usage:
+        client.set_logger(EventLogger(logging.getLogger('verbit'), session_id='order-1234'))
+    """
+
+    # events per second, per event name (unlisted events are not rate-limited)
+    DEFAULT_RATE_LIMITS = {
+        'event_sent': 10.0,
+        'ping_received': 1.0,
+        'pong_received': 1.0,
+        'ping_error': 1.0,
+        'connect_error': 1.0,
+        'response_dropped': 10.0,
+    }
+
+    def __init__(self,
+                 logger: logging.Logger,
+                 session_id: typing.Optional[str] = None,
+                 rate_limits: typing.Optional[typing.Dict[str, float]] = None):
+        """
+        :param logger:          the logger to log to
+        :param session_id:      tags all records, e.g. the order or session the client streams
+        :param rate_limits:     events per second, per event name. if omitted, DEFAULT_RATE_LIMITS.
+        """
+        super().__init__(logger, {'session_id': session_id})
+        self.session_id = session_id
+        self.rate_limits = dict(self.DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self._lock = Lock()
+        self._limits = {}               # event name -> [time.monotonic() the next event is admitted at, suppressed events]
+        self.suppressed = 0
+
+    def log(self, level: int, msg, *args, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+
+        if isinstance(msg, LogEvent):
+            suppressed = self._admit(msg.name)
+            if suppressed is None:
+                return
+            fields = dict(msg.fields)
+            if suppressed:
+                fields['suppressed'] = suppressed
+            name = msg.name
+        else:
+            fields = {'message': str(msg) % args if args else msg}
+            name = None
+            args = ()
+
+        extra = dict(kwargs.get('extra') or {}, event=name, fields=fields, session_id=self.session_id)
+        kwargs['extra'] = extra
+        if self.session_id is not None:
+            fields = dict(fields, session_id=self.session_id)
+        self.logger.log(level, _KeyValueMessage(name, fields), *args, **kwargs)
+
+    def _admit(self, name: str) -> typing.Optional[int]:
+        """Whether an event may be logged now: None if rate-limited, or the number of events suppressed before it."""
+        rate = self.rate_limits.get(name)
+        if not rate:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            limit = self._limits.setdefault(name, [now, 0])
+            if now < limit[0]:
+                limit[1] += 1
+                self.suppressed += 1
+                return None
+            suppressed = limit[1]
+            limit[0] = now + 1.0 / rate
+            limit[1] = 0
+            return suppressed
+
+
+class NonBlockingHandler(logging.Handler):
+    """
+    Hands log records to a thread of its own, which emits them with the target handlers (e.g. writing to a file or
+    a socket), so that logging threads never block on I/O. Messages are formatted by the target handlers, in the
+    handler's thread, so lazily formatted messages (e.g. LogEvent) cost the logging threads no formatting either.
+
+    The queue is bounded: once `max_queued` records are waiting, further records are dropped and counted.
+
+    Usage:
+        handler = NonBlockingHandler(logging.FileHandler('client.log'))
+        logging.getLogger('verbit').addHandler(handler)
+        ...
+        handler.close()     # emits the queued records
+    """
+
+    DEFAULT_MAX_QUEUED = 10000
+
+    def __init__(self, *handlers: logging.Handler, max_queued: int = DEFAULT_MAX_QUEUED):
+        super().__init__()
+        self.handlers = handlers
+        self._max_queued = max(1, max_queued)
+        self._condition = Condition()
+        self._records = deque()
+        self._closed = False
+        self.dropped = 0
+        self._thread = Thread(target=self._emit_worker, name='log_handler', daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord):
+        with self._condition:
+            if self._closed or len(self._records) >= self._max_queued:
+                self.dropped += 1
+                return
+            self._records.append(record)
+            self._condition.notify()
+
+    def close(self):
+        """Emit the queued records, stop the handler's thread and close the target handlers."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+    def _emit_worker(self):
+        while True:
+            with self._condition:
+                while not self._records and not self._closed:
+                    self._condition.wait()
+                if not self._records:
+                    return
+                record = self._records.popleft()
+
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
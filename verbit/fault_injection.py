@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+
+import time
+import queue
+import random
+import socket
+import struct
+import typing
+import logging
+
+from dataclasses import dataclass
+from threading import Thread, Lock, Event
+
+from websocket import STATUS_GOING_AWAY
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer, StandInConnection, TranscribingSession
+
+
+class _ProxiedConnection:
+    """A client connection of the FaultProxy, and its upstream connection."""
+
+    def __init__(self, proxy: 'FaultProxy', client_sock: socket.socket, upstream_sock: socket.socket):
+        self._proxy = proxy
+        self.client_sock = client_sock
+        self.upstream_sock = upstream_sock
+        self.blackholed = False
+        self.closed = False
+        self._pumps_done = 0
+        self._lock = Lock()
+
+    def start(self):
+        for source, target, name in ((self.client_sock, self.upstream_sock, 'upstream'),
+                                     (self.upstream_sock, self.client_sock, 'downstream')):
+            pending = queue.Queue()
+            Thread(target=self._reader_worker, args=(source, pending), name=f'fault_proxy_{name}_reader', daemon=True).start()
+            Thread(target=self._writer_worker, args=(target, pending), name=f'fault_proxy_{name}_writer', daemon=True).start()
+
+    def reset(self):
+        """Close the client connection with a TCP reset."""
+        self.closed = True
+        try:
+            self.client_sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+        self.client_sock.close()
+        self.upstream_sock.close()
+
+    def _reader_worker(self, source: socket.socket, pending: queue.Queue):
+        """Thread function reading from `source`, and scheduling delivery of the data (with latency and jitter)."""
+
+        deliver_at = 0.0
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+
+                # a half-open connection silently drops all data
+                if self.blackholed:
+                    continue
+
+                # jitter never reorders data, as on a TCP connection
+                delay = self._proxy.latency_seconds + random.uniform(0.0, self._proxy.jitter_seconds)
+                deliver_at = max(deliver_at, time.monotonic() + delay)
+                pending.put((deliver_at, data))
+        except OSError:
+            pass
+        pending.put((0.0, None))
+
+    def _writer_worker(self, target: socket.socket, pending: queue.Queue):
+        """Thread function delivering scheduled data to `target`, at the proxy's bandwidth cap."""
+
+        try:
+            while True:
+                deliver_at, data = pending.get()
+                if data is None:
+                    if not self.blackholed:
+                        target.shutdown(socket.SHUT_WR)
+                    break
+
+                delay = deliver_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                if self.blackholed:
+                    continue
+
+                target.sendall(data)
+                bandwidth = self._proxy.bandwidth_bytes_per_second
+                if bandwidth:
+                    time.sleep(len(data) / bandwidth)
+        except OSError:
+            pass
+
+        # both directions ended
+        with self._lock:
+            self._pumps_done += 1
+            if self._pumps_done == 2 and not self.blackholed:
+                self.closed = True
+                self.client_sock.close()
+                self.upstream_sock.close()
+
+
+class FaultProxy:
+    """
+    A local TCP proxy injecting network faults between a client and an upstream server.
+
+    Degradations (latency, jitter and a bandwidth cap) apply to all connections, as long as they are set.
+    Failures (half-open connections and resets) apply to the connections open when they are injected.
+
+    Usage:
+        with StandInServer() as server, FaultProxy(server.address) as proxy:
+            responses = client.start_stream(ws_url=proxy.url, ...)
+            proxy.latency_seconds = 0.2
+            proxy.reset_connections()
+    """
+
+    def __init__(self, upstream_address: typing.Tuple[str, int], host: str = '127.0.0.1', port: int = 0):
+        """
+        :param upstream_address:    (host, port) of the server to forward connections to
+        :param host:                the address to listen on
+        :param port:                the port to listen on. if 0, a free port is picked
+        """
+        self._upstream_address = upstream_address
+        self._listener = socket.create_server((host, port))
+        self._accept_thread = None
+        self._stopped = Event()
+        self._connections = []
+        self._connections_lock = Lock()
+        self.accepted = 0
+
+        # degradations
+        self.latency_seconds = 0.0
+        self.jitter_seconds = 0.0
+        self.bandwidth_bytes_per_second = None
+
+    @property
+    def address(self) -> typing.Tuple[str, int]:
+        return self._listener.getsockname()[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f'ws://{host}:{port}/ws'
+
+    def start(self) -> 'FaultProxy':
+        self._accept_thread = Thread(target=self._accept_worker, name='fault_proxy_accept', daemon=True)
+        self._accept_thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        self.reset_connections()
+        if self._accept_thread is not None:
+            self._accept_thread.join()
+
+    def __enter__(self) -> 'FaultProxy':
+        return self.start()
+
+    def __exit__(self, *_exc_info):
+        self.stop()
+
+    def clear_degradations(self):
+        self.latency_seconds = 0.0
+        self.jitter_seconds = 0.0
+        self.bandwidth_bytes_per_second = None
+
+    def half_open_connections(self):
+        """Stop forwarding data over the open connections, without closing them (as when a peer vanishes)."""
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.blackholed = True
+
+    def reset_connections(self):
+        """Reset the open client connections."""
+        for connection in self._take_connections():
+            connection.reset()
+
+    def _take_connections(self) -> typing.List[_ProxiedConnection]:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        return [connection for connection in connections if not connection.closed]
+
+    def _accept_worker(self):
+        while not self._stopped.is_set():
+            try:
+                client_sock, _ = self._listener.accept()
+            except OSError:
+                return
+
+            try:
+                upstream_sock = socket.create_connection(self._upstream_address)
+            except OSError:
+                client_sock.close()
+                continue
+
+            for sock in (client_sock, upstream_sock):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            connection = _ProxiedConnection(self, client_sock, upstream_sock)
+            with self._connections_lock:
+                self._connections.append(connection)
+                self.accepted += 1
+            connection.start()
+
+
+class Fault:
+    LATENCY = 'latency'             # 200ms of added latency
+    JITTER = 'jitter'               # up to 200ms of added jitter
+    BANDWIDTH = 'bandwidth'         # bandwidth capped below the media rate
+    HALF_OPEN = 'half_open'         # the connection stops passing data, without being closed
+    RESET = 'reset'                 # the connection is reset
+    GOING_AWAY = 'going_away'       # the server closes the connection with a GOING_AWAY close code
+
+    ALL = (LATENCY, JITTER, BANDWIDTH, HALF_OPEN, RESET, GOING_AWAY)
+
+
+@dataclass
+class RecoveryResult:
+    fault: str
+    time_to_recover_seconds: typing.Optional[float] = None  # from the fault, until media captured after it reached the server
+    audio_lost_seconds: float = 0.0                         # media which never reached the server
+    connections: int = 0                                    # connections opened by the client
+    responses: int = 0
+    error: typing.Optional[str] = None
+
+
+class _SequencedSession(TranscribingSession):
+    """A TranscribingSession recording the arrival time of sequence-numbered media chunks."""
+
+    def __init__(self, arrivals: typing.Dict[int, float]):
+        super().__init__()
+        self._arrivals = arrivals
+
+    def on_binary(self, connection: StandInConnection, data: bytes):
+        seq, = struct.unpack_from('<Q', data)
+        self._arrivals.setdefault(seq, time.monotonic())
+        super().on_binary(connection, data)
+
+
+def measure_recovery(fault: str,
+                     media_seconds: float = 3.0,
+                     fault_at_seconds: float = 1.0,
+                     fault_duration_seconds: float = 0.5,
+                     chunk_seconds: float = 0.05,
+                     socket_timeout: float = 1.0,
+                     client_factory: typing.Callable[[], WebSocketStreamingClient] = None) -> RecoveryResult:
+    """
+    Stream realtime media through a FaultProxy to a local StandInServer, inject a fault, and measure the recovery.
+
+    Media chunks are sequence-numbered, so that the server knows which were lost, and when media captured after the
+    fault arrived.
+
+    :param fault:                   see: Fault
+    :param media_seconds:           duration of the streamed media
+    :param fault_at_seconds:        when to inject the fault, since the stream started (a half-open connection,
+                                    as the next response is received)
+    :param fault_duration_seconds:  how long degradations last (failures are instantaneous)
+    :param chunk_seconds:           duration of each media chunk
+    :param socket_timeout:          the client's socket timeout, which detects half-open connections
+    :param client_factory:          a callable creating the streaming client to measure
+
+    :return: a RecoveryResult
+    """
+
+    if fault not in Fault.ALL:
+        raise ValueError(f'Unknown fault: {fault}')
+
+    media_config = MediaConfig()
+    bytes_per_second = media_config.sample_rate * media_config.sample_width * media_config.num_channels
+    chunk_size = int(chunk_seconds * bytes_per_second)
+    num_chunks = int(media_seconds / chunk_seconds)
+
+    arrivals = {}
+    captured_at = {}
+    received = Event()
+    injected = Event()
+    injected_at = 0.0
+    result = RecoveryResult(fault=fault)
+
+    def media_generator():
+        started_at = time.monotonic()
+        for seq in range(num_chunks):
+            delay = started_at + seq * chunk_seconds - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            captured_at[seq] = time.monotonic()
+            yield struct.pack('<Q', seq) + bytes(chunk_size - 8)
+
+    with StandInServer(session_factory=lambda: _SequencedSession(arrivals)) as server, FaultProxy(server.address) as proxy:
+
+        if client_factory is not None:
+            client = client_factory()
+        else:
+            client = WebSocketStreamingClient(customer_token='stand-in')
+            client.set_logger(logging.getLogger('verbit.fault_injection'))
+        client.socket_timeout = socket_timeout
+
+        def inject():
+            nonlocal injected_at
+            time.sleep(fault_at_seconds)
+            if fault == Fault.HALF_OPEN:
+                # a half-open connection is detected once the client's socket timed out, counting from the last data
+                # it received: inject the fault as a response is received, so that recovery counts from the same time
+                received.clear()
+                received.wait(timeout=socket_timeout)
+            injected_at = time.monotonic()
+            injected.set()
+            if fault == Fault.LATENCY:
+                proxy.latency_seconds = 0.2
+            elif fault == Fault.JITTER:
+                proxy.jitter_seconds = 0.2
+            elif fault == Fault.BANDWIDTH:
+                proxy.bandwidth_bytes_per_second = bytes_per_second // 2
+            elif fault == Fault.HALF_OPEN:
+                proxy.half_open_connections()
+            elif fault == Fault.RESET:
+                proxy.reset_connections()
+            elif fault == Fault.GOING_AWAY:
+                server.close_connections(STATUS_GOING_AWAY, 'Fault injection')
+            time.sleep(fault_duration_seconds)
+            proxy.clear_degradations()
+
+        injector = Thread(target=inject, name='fault_injector', daemon=True)
+        try:
+            responses = client.start_stream(ws_url=proxy.url, media_generator=media_generator(), media_config=media_config)
+            injector.start()
+            for _ in responses:
+                result.responses += 1
+                received.set()
+        except Exception as ex:
+            result.error = repr(ex)
+        if injector.ident is not None:
+            injector.join()
+
+        result.connections = proxy.accepted
+
+    # recovered when the first chunk captured after the fault arrived
+    if injected.is_set():
+        recovered_at = min((arrivals[seq] for seq, at in captured_at.items() if at >= injected_at and seq in arrivals), default=None)
+        result.time_to_recover_seconds = recovered_at - injected_at if recovered_at is not None else None
+    result.audio_lost_seconds = (num_chunks - len(arrivals)) * chunk_seconds
+
+    return result
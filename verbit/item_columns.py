@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import math
+import typing
+
+try:
+    import numpy as np
+except ImportError:     # an optional dependency, see: extras_require in setup.py
+    np = None
+
+
+KIND_TEXT = 0
+KIND_PUNCT = 1
+
+# the fields of accumulated items. strings are interned, and stored as indices to their tables (see: ItemColumns)
+ITEM_FIELDS = [
+    ('session', '<u4'),             # index to ItemColumns.sessions
+    ('language', '<u2'),            # index to ItemColumns.languages, of the item's (service type, language code)
+    ('start', '<f8'),
+    ('end', '<f8'),
+    ('start_pts', '<f8'),
+    ('start_epoch', '<f8'),         # NaN, if the response has no epoch time
+    ('kind', 'u1'),                 # KIND_TEXT or KIND_PUNCT
+    ('value', '<u4'),               # index to ItemColumns.values
+    ('speaker', '<u4'),             # index to ItemColumns.speakers
+]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for item columns: pip install 'verbit-streaming-sdk[analytics]'")
+
+
+class _Interner:
+    """A table of distinct strings, each identified by its index."""
+
+    def __init__(self, strings: typing.Iterable[str] = ()):
+        self.strings = []
+        self._indices = {}
+        for s in strings:
+            self.index(s)
+
+    def index(self, s: str) -> int:
+        index = self._indices.get(s)
+        if index is None:
+            index = self._indices[s] = len(self.strings)
+            self.strings.append(s)
+        return index
+
+
+class ItemColumns:
+    """
+    Accumulates the word items of final responses, of any number of sessions, into a growable NumPy structured
+    array (see: ITEM_FIELDS), for vectorized analytics (e.g. speaking rates, gaps, speaker turns).
+
+    Strings (words, speakers, sessions and languages) are interned: items hold indices to their tables, so that
+    e.g. grouping by speaker is a vectorized operation on integers. Item 'start_pts' and 'start_epoch' times are
+    those of their response, shifted by the item's offset from the response's start.
+
+    The array grows by doubling, so appending is amortized O(1) per item. `items` (and slices of it) are views,
+    not copies. A view taken before the array grew still refers to the items accumulated by then.
+
+    Requires NumPy (and pyarrow, for to_arrow()).
+
+    Usage:
+        columns = ItemColumns()
+        for response in columns.tee(client.start_stream(...), session_id='meeting-1'):
+            ...
+        items = columns.items
+        durations = items['end'] - items['start']
+    """
+
+    INITIAL_CAPACITY = 4096
+
+    def __init__(self, response_types: typing.Collection[str] = ('transcript', ), initial_capacity: int = INITIAL_CAPACITY):
+        """
+        :param response_types:      the types of final responses to accumulate the items of
+        :param initial_capacity:    the number of items to allocate room for
+        """
+        _require_numpy()
+
+        self._response_types = response_types
+        self._array = np.zeros(max(1, initial_capacity), dtype=ITEM_FIELDS)
+        self._size = 0
+
+        self._sessions = _Interner()
+        self._languages = _Interner()
+        self._values = _Interner()
+        self._speakers = _Interner([''])           # index 0: no speaker
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+    @property
+    def items(self) -> 'np.ndarray':
+        """The accumulated items (a view)."""
+        return self._array[:self._size]
+
+    @property
+    def sessions(self) -> typing.List[str]:
+        return self._sessions.strings
+
+    @property
+    def languages(self) -> typing.List[typing.Tuple[str, str]]:
+        """(service type, language code) pairs."""
+        return self._languages.strings
+
+    @property
+    def values(self) -> typing.List[str]:
+        return self._values.strings
+
+    @property
+    def speakers(self) -> typing.List[str]:
+        return self._speakers.strings
+
+    def add_response(self, response: dict, session_id: str = ''):
+        """Append the items of a response (unless not final, or not of the accumulated types)."""
+
+        body = response.get('response', {})
+        if not body.get('is_final') or body.get('type') not in self._response_types or not body.get('alternatives'):
+            return
+        items = body['alternatives'][0].get('items', [])
+        if not items:
+            return
+
+        session = self._sessions.index(session_id)
+        language = self._languages.index((body.get('service_type'), body.get('language_code')))
+
+        # Note: if the input media stream has no pts values, 'start_pts' is the same as 'start'
+        response_start = body.get('start', 0.0)
+        pts_offset = body.get('start_pts', response_start) - response_start
+        epoch_offset = body['start_epoch'] - response_start if body.get('start_epoch') is not None else math.nan
+
+        rows = [(session, language, item['start'], item['end'], item['start'] + pts_offset, item['start'] + epoch_offset,
+                 KIND_PUNCT if item.get('kind') == 'punct' else KIND_TEXT,
+                 self._values.index(item['value']), self._speakers.index(item.get('speaker_id') or ''))
+                for item in items]
+
+        self._reserve(self._size + len(rows))
+        self._array[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+
+    def add_responses(self, responses: typing.Iterable[dict], session_id: str = ''):
+        for response in responses:
+            self.add_response(response, session_id)
+
+    def tee(self, responses: typing.Iterable[dict], session_id: str = '') -> typing.Iterator[dict]:
+        """Generator function accumulating the items of each of `responses`, and yielding it on."""
+        for response in responses:
+            self.add_response(response, session_id)
+            yield response
+
+    def decode(self, field: str, indices: 'np.ndarray') -> 'np.ndarray':
+        """Map an array of string indices (of the 'session', 'language', 'value' or 'speaker' field) to their strings."""
+        tables = {'session': self._sessions, 'language': self._languages, 'value': self._values, 'speaker': self._speakers}
+        if field not in tables:
+            raise ValueError(f'Field {field} is not a string field')
+        table = np.empty(len(tables[field].strings), dtype=object)
+        table[:] = tables[field].strings
+        return table[indices]
+
+    def save(self, path: str):
+        """
+        Save the items and string tables to a '.npz' file, of which 'items' is a plain '.npy' structured array.
+        See: load()
+        """
+        np.savez(path,
+                 items=self.items,
+                 sessions=np.array(self._sessions.strings, dtype=str),
+                 service_types=np.array([s or '' for s, _ in self._languages.strings], dtype=str),
+                 language_codes=np.array([c or '' for _, c in self._languages.strings], dtype=str),
+                 values=np.array(self._values.strings, dtype=str),
+                 speakers=np.array(self._speakers.strings, dtype=str))
+
+    @classmethod
+    def load(cls, path: str, response_types: typing.Collection[str] = ('transcript', )) -> 'ItemColumns':
+        """Load items saved by save(), for analysis or to accumulate more."""
+        _require_numpy()
+
+        with np.load(path) as data:
+            items = data['items']
+            columns = cls(response_types, initial_capacity=len(items))
+            columns._array[:len(items)] = items
+            columns._size = len(items)
+            columns._sessions = _Interner(data['sessions'].tolist())
+            columns._languages = _Interner((s or None, c or None) for s, c in zip(data['service_types'].tolist(), data['language_codes'].tolist()))
+            columns._values = _Interner(data['values'].tolist())
+            columns._speakers = _Interner(data['speakers'].tolist())
+        return columns
+
+    def to_arrow(self) -> 'pyarrow.Table':
+        """
+        The items as an Arrow table (e.g. for Parquet files, or pandas/polars/DuckDB), with dictionary-encoded
+        string columns: the string indices are the dictionary indices, so the strings aren't copied per item.
+        """
+        import pyarrow
+
+        items = self.items
+        languages = self._languages.strings
+
+        def dictionary(field, strings):
+            return pyarrow.DictionaryArray.from_arrays(pyarrow.array(np.ascontiguousarray(items[field])), pyarrow.array(strings, pyarrow.string()))
+
+        return pyarrow.table({
+            'session_id': dictionary('session', self._sessions.strings),
+            'service_type': dictionary('language', [s for s, _ in languages]),
+            'language_code': dictionary('language', [c for _, c in languages]),
+            'start': np.ascontiguousarray(items['start']),
+            'end': np.ascontiguousarray(items['end']),
+            'start_pts': np.ascontiguousarray(items['start_pts']),
+            'start_epoch': np.ascontiguousarray(items['start_epoch']),
+            'kind': pyarrow.DictionaryArray.from_arrays(pyarrow.array(np.ascontiguousarray(items['kind'])), pyarrow.array(['text', 'punct'])),
+            'value': dictionary('value', self._values.strings),
+            'speaker_id': dictionary('speaker', [s or None for s in self._speakers.strings]),
+        })
+
+    def _reserve(self, size: int):
+        capacity = len(self._array)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        array = np.zeros(capacity, dtype=ITEM_FIELDS)
+        array[:self._size] = self._array[:self._size]
+        self._array = array
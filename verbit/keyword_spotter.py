@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+import string
+import typing
+
+from dataclasses import dataclass
+from collections import deque
+
+
+def normalize_word(word: str) -> str:
+    """Case-fold a word, and strip the punctuation around it."""
+    return word.casefold().strip(string.punctuation + '¿¡“”‘’«»…')
+
+
+class KeywordAutomaton:
+    """
+    An Aho-Corasick automaton over words (not characters), matching all of a list of keywords and phrases in a
+    single pass over a stream of words, regardless of the number of keywords.
+
+    Compiling is linear in the total length of the keywords. An automaton is immutable once compiled, so that a
+    single instance can be shared by the spotters of many sessions (see: KeywordSpotter).
+    """
+
+    ROOT = 0
+
+    def __init__(self, keywords: typing.Iterable[str]):
+        """
+        :param keywords: keywords and phrases, matched case-insensitively and regardless of punctuation
+        """
+
+        self.keywords = []                          # original keyword strings, by keyword index
+        self.lengths = []                           # number of words, by keyword index
+        self._goto = [{}]                           # transitions, by node
+        self._fail = [self.ROOT]                    # failure links, by node
+        self._output = [()]                         # indices of the keywords ending at each node
+
+        for keyword in keywords:
+            words = [w for w in (normalize_word(word) for word in keyword.split()) if w]
+            if not words:
+                continue
+            node = self.ROOT
+            for word in words:
+                next_node = self._goto[node].get(word)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][word] = next_node
+                    self._goto.append({})
+                    self._fail.append(self.ROOT)
+                    self._output.append(())
+                node = next_node
+            if not self._output[node]:
+                self._output[node] = (len(self.keywords), )
+                self.keywords.append(keyword)
+                self.lengths.append(len(words))
+
+        self.max_length = max(self.lengths, default=0)
+        self._link()
+
+    def _link(self):
+        """Set the failure links (breadth first), merging the outputs of each node's failure chain into it."""
+        queue = deque(self._goto[self.ROOT].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail != self.ROOT and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(word, self.ROOT)
+                self._fail[child] = fail
+                self._output[child] = self._output[child] + self._output[fail]
+
+    def step(self, node: int, word: str) -> typing.Tuple[int, typing.Tuple[int, ...]]:
+        """
+        Advance the automaton by a (normalized) word.
+
+        :return: the next node, and the indices of the keywords ending at it
+        """
+        while node != self.ROOT and word not in self._goto[node]:
+            node = self._fail[node]
+        node = self._goto[node].get(word, self.ROOT)
+        return node, self._output[node]
+
+
+@dataclass
+class KeywordMatch:
+    keyword: str
+    start: float
+    end: float
+    start_pts: typing.Optional[float] = None
+    start_epoch: typing.Optional[float] = None
+    is_final: bool = False
+    service_type: typing.Optional[str] = None
+    language_code: typing.Optional[str] = None
+
+
+class KeywordEvent:
+    SPOTTED = 'spotted'         # a new match, of a final response or a partial one
+    CONFIRMED = 'confirmed'     # a match previously spotted in a partial response, confirmed by the final one
+    RETRACTED = 'retracted'     # a match previously spotted in a partial response, revised away
+
+    def __init__(self, kind: str, match: KeywordMatch):
+        self.kind = kind
+        self.match = match
+
+    def __repr__(self):
+        return f'KeywordEvent({self.kind!r}, {self.match!r})'
+
+
+class _StreamState:
+    """Spotting state of a single (service type, language) stream of responses."""
+
+    def __init__(self, max_length: int):
+        self.node = KeywordAutomaton.ROOT                           # the automaton's node after the final words
+        self.tail = deque(maxlen=max(0, max_length - 1))            # the last final words, for phrases spanning utterances
+        self.pending = []                                           # matches spotted in partials of the current utterance
+
+
+class KeywordSpotter:
+    """
+    Spots keywords and phrases in the word items of a session's responses, incrementally.
+
+    Each response's words are run through the automaton from its state after the last final response, so that the
+    cost of a response is linear in its words, regardless of the number of keywords. Phrases may span utterances.
+
+    A match spotted in a partial (non-final) response is reported once: later revisions of the utterance which
+    still contain it (overlapping in time) don't report it again, the final response confirms it, and a revision
+    which no longer contains it retracts it. Transcription and translation streams are spotted separately.
+
+    Usage:
+        automaton = KeywordAutomaton(['verbit', 'speech recognition'])     # shared by all sessions
+        spotter = KeywordSpotter(automaton)
+        for response in client.start_stream(...):
+            for event in spotter.feed(response):
+                ...
+    """
+
+    def __init__(self,
+                 keywords: typing.Union[KeywordAutomaton, typing.Iterable[str]],
+                 response_types: typing.Collection[str] = ('transcript', ),
+                 partials: bool = True):
+        """
+        :param keywords:        a compiled KeywordAutomaton, or keywords and phrases to compile one of
+        :param response_types:  the response types to spot keywords in
+        :param partials:        if False, only final responses are spotted (no retractions, at an utterance's latency)
+        """
+        self._automaton = keywords if isinstance(keywords, KeywordAutomaton) else KeywordAutomaton(keywords)
+        self._response_types = response_types
+        self._partials = partials
+        self._streams = {}
+
+    @property
+    def automaton(self) -> KeywordAutomaton:
+        return self._automaton
+
+    def feed(self, response: dict) -> typing.List[KeywordEvent]:
+        """
+        Spot keywords in a response.
+
+        :return: the resulting events (possibly none)
+        """
+
+        body = response.get('response', {})
+        if body.get('type') not in self._response_types or not body.get('alternatives'):
+            return []
+        is_final = bool(body.get('is_final'))
+        if not is_final and not self._partials:
+            return []
+
+        key = (body.get('service_type'), body.get('language_code'))
+        state = self._streams.get(key)
+        if state is None:
+            state = self._streams[key] = _StreamState(self._automaton.max_length)
+
+        # the words of the response, with their time references
+        pts_offset = body['start_pts'] - body['start'] if body.get('start_pts') is not None else None
+        epoch_offset = body['start_epoch'] - body['start'] if body.get('start_epoch') is not None else None
+        words = [(word, item, pts_offset, epoch_offset) for word, item in
+                 ((normalize_word(item['value']), item) for item in body['alternatives'][0].get('items', [])
+                  if item.get('kind') != 'punct') if word]
+
+        # run the automaton from its state after the final words (and with them, for phrases spanning utterances)
+        node = state.node
+        window = list(state.tail) + words
+        matches = []
+        for position in range(len(state.tail), len(window)):
+            node, keyword_indices = self._automaton.step(node, window[position][0])
+            for index in keyword_indices:
+                matches.append(self._match(body, index, window[position + 1 - self._automaton.lengths[index]:position + 1], is_final))
+
+        # reconcile with the matches spotted in earlier revisions of the utterance
+        events = []
+        unmatched = list(state.pending)
+        for match in matches:
+            previous = next((p for p in unmatched if self._is_same(p, match)), None)
+            if previous is None:
+                events.append(KeywordEvent(KeywordEvent.SPOTTED, match))
+            else:
+                unmatched.remove(previous)
+                if is_final:
+                    events.append(KeywordEvent(KeywordEvent.CONFIRMED, match))
+        events.extend(KeywordEvent(KeywordEvent.RETRACTED, match) for match in unmatched)
+
+        if is_final:
+            state.node = node
+            state.tail.extend(words)
+            state.pending = []
+        else:
+            state.pending = matches
+
+        return events
+
+    def spot(self, responses: typing.Iterable[dict]) -> typing.Iterator[KeywordEvent]:
+        """Generator function yielding the events of `responses`."""
+        for response in responses:
+            yield from self.feed(response)
+
+    def _match(self, body: dict, keyword_index: int, words: list, is_final: bool) -> KeywordMatch:
+        _, first, pts_offset, epoch_offset = words[0]
+        return KeywordMatch(keyword=self._automaton.keywords[keyword_index],
+                            start=first['start'],
+                            end=words[-1][1]['end'],
+                            start_pts=first['start'] + pts_offset if pts_offset is not None else None,
+                            start_epoch=first['start'] + epoch_offset if epoch_offset is not None else None,
+                            is_final=is_final,
+                            service_type=body.get('service_type'),
+                            language_code=body.get('language_code'))
+
+    @staticmethod
+    def _is_same(previous: KeywordMatch, match: KeywordMatch) -> bool:
+        """Revisions may shift word times slightly: the same keyword, overlapping in time, is the same match."""
+        overlap = previous.start < match.end and match.start < previous.end
+        return previous.keyword == match.keyword and (overlap or previous.start == match.start)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+
+import json
+import math
+import time
+import wave
+import bisect
+import typing
+import logging
+import argparse
+import multiprocessing
+
+from dataclasses import dataclass, field, asdict
+from threading import Thread
+
+from verbit.streaming_client import WebSocketStreamingClient, MediaConfig
+from verbit.stand_in_server import StandInServer
+from verbit.transport import TransportConfig, PRESETS as TRANSPORT_PRESETS
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+
+DEFAULT_CHUNK_SECONDS = 0.1
+
+
+@dataclass
+class SessionResult:
+    connect_seconds: typing.Optional[float] = None          # until the WebSocket was connected (incl. authentication)
+    first_response_seconds: typing.Optional[float] = None   # time-to-first-response, since the session started
+    latencies: typing.List[float] = field(default_factory=list)     # per response, since its media end was sent
+    responses: int = 0
+    media_seconds: float = 0.0                              # media sent, in seconds
+    cpu_seconds: float = 0.0                                # CPU time of the thread receiving responses
+    error: typing.Optional[str] = None
+
+
+@dataclass
+class LoadTestReport:
+    sessions: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    responses: int = 0
+    media_seconds: float = 0.0
+    connect_p50: typing.Optional[float] = None
+    connect_p99: typing.Optional[float] = None
+    first_response_p50: typing.Optional[float] = None
+    first_response_p99: typing.Optional[float] = None
+    latency_p50: typing.Optional[float] = None
+    latency_p99: typing.Optional[float] = None
+    receive_cpu_p50: typing.Optional[float] = None          # per session, CPU time of the thread receiving responses
+    receive_cpu_p99: typing.Optional[float] = None
+    cpu_seconds_per_session: typing.Optional[float] = None  # average: process CPU time (excluding the local stand-in server) / sessions
+    rss_bytes_per_session: typing.Optional[float] = None    # average: peak RSS growth of the process / sessions
+    errors: typing.List[str] = field(default_factory=list)
+
+    def format(self) -> str:
+
+        def seconds(val):
+            return 'n/a' if val is None else f'{val * 1000:.1f} ms'
+
+        rss = 'n/a' if self.rss_bytes_per_session is None else f'{self.rss_bytes_per_session / 1024 / 1024:.2f} MiB'
+        cpu = 'n/a' if self.cpu_seconds_per_session is None else f'{self.cpu_seconds_per_session:.3f} s'
+        lines = [
+            f'sessions:               {self.sessions} ({self.failed} failed)',
+            f'elapsed:                {self.elapsed_seconds:.2f} s',
+            f'media sent:             {self.media_seconds:.1f} s, responses: {self.responses}',
+            f'connect time:           p50={seconds(self.connect_p50)}, p99={seconds(self.connect_p99)}',
+            f'time-to-first-response: p50={seconds(self.first_response_p50)}, p99={seconds(self.first_response_p99)}',
+            f'response latency:       p50={seconds(self.latency_p50)}, p99={seconds(self.latency_p99)}',
+            f'receive CPU:            p50={seconds(self.receive_cpu_p50)}, p99={seconds(self.receive_cpu_p99)} (per session)',
+            f'process per session:    CPU={cpu}, RSS={rss} (averages)',
+        ]
+        lines.extend(f'error: {error}' for error in self.errors)
+        return '\n'.join(lines)
+
+
+def percentile(values: typing.Sequence[float], percent: float) -> typing.Optional[float]:
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def synthetic_media(media_config: MediaConfig, duration_seconds: float, chunk_seconds: float = DEFAULT_CHUNK_SECONDS) -> typing.List[bytes]:
+    """A 440 Hz tone, as chunks of signed 16-bit little-endian PCM."""
+
+    if media_config.sample_width != 2:
+        raise ValueError('Synthetic media is only supported for 16-bit samples')
+
+    frames = int(duration_seconds * media_config.sample_rate)
+    samples = bytearray()
+    for i in range(frames):
+        sample = int(8000 * math.sin(2 * math.pi * 440 * i / media_config.sample_rate))
+        samples += sample.to_bytes(2, 'little', signed=True) * media_config.num_channels
+
+    chunk_size = int(chunk_seconds * media_config.sample_rate) * media_config.sample_width * media_config.num_channels
+    return [bytes(samples[i:i + chunk_size]) for i in range(0, len(samples), chunk_size)]
+
+
+def wav_media(path: str, chunk_seconds: float = DEFAULT_CHUNK_SECONDS) -> typing.Tuple[MediaConfig, typing.List[bytes]]:
+    """The PCM content of a 'WAV' file, as chunks, and its media config."""
+
+    with wave.open(str(path), 'rb') as wav:
+        num_channels, sample_width, sample_rate, *_ = wav.getparams()
+        frames_per_chunk = int(chunk_seconds * sample_rate)
+        chunks = []
+        chunk = wav.readframes(frames_per_chunk)
+        while chunk:
+            chunks.append(chunk)
+            chunk = wav.readframes(frames_per_chunk)
+
+    return MediaConfig(sample_rate=sample_rate, sample_width=sample_width, num_channels=num_channels), chunks
+
+
+class _Session:
+    """A single simulated stream."""
+
+    def __init__(self, ws_url: str, customer_token: str, media_config: MediaConfig, chunks: typing.List[bytes], rate: float,
+                 transport: typing.Optional[TransportConfig] = None):
+        self._ws_url = ws_url
+        self._customer_token = customer_token
+        self._media_config = media_config
+        self._chunks = chunks
+        self._rate = rate
+        self._transport = transport
+
+        # (media seconds sent so far, monotonic time it was sent)
+        self._sent_media_seconds = []
+        self._sent_at = []
+
+        self.result = SessionResult()
+        self.thread = Thread(target=self._run, name='loadtest_session', daemon=True)
+
+    def _media_generator(self) -> typing.Iterator[bytes]:
+        bytes_per_second = self._media_config.sample_rate * self._media_config.sample_width * self._media_config.num_channels
+        started_at = time.monotonic()
+        media_seconds = 0.0
+
+        for chunk in self._chunks:
+
+            # pace media at `rate` times realtime
+            if self._rate > 0:
+                delay = started_at + media_seconds / self._rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            yield chunk
+            media_seconds += len(chunk) / bytes_per_second
+            self._sent_media_seconds.append(media_seconds)
+            self._sent_at.append(time.monotonic())
+
+        self.result.media_seconds = media_seconds
+
+    def _latency(self, response: dict, received_at: float) -> typing.Optional[float]:
+        """Time from sending the end of the media a response refers to, until receiving the response."""
+
+        body = response.get('response', {})
+        end = body.get('end')
+        if end is None:
+            alternatives = body.get('alternatives') or [{}]
+            end = alternatives[0].get('end')
+        if end is None:
+            return None
+
+        index = bisect.bisect_left(self._sent_media_seconds, end - 1e-6)
+        if index >= len(self._sent_at):
+            return None
+        return received_at - self._sent_at[index]
+
+    def _run(self):
+        cpu_started_at = time.thread_time()
+        started_at = time.monotonic()
+
+        try:
+            client = WebSocketStreamingClient(customer_token=self._customer_token)
+            client.set_logger(logging.getLogger('verbit.loadtest'))
+            client.transport = self._transport
+
+            responses = client.start_stream(ws_url=self._ws_url, media_generator=self._media_generator(), media_config=self._media_config)
+            self.result.connect_seconds = time.monotonic() - started_at
+
+            for response in responses:
+                received_at = time.monotonic()
+                if self.result.first_response_seconds is None:
+                    self.result.first_response_seconds = received_at - started_at
+                latency = self._latency(response, received_at)
+                if latency is not None:
+                    self.result.latencies.append(latency)
+                self.result.responses += 1
+
+        except Exception as ex:
+            self.result.error = repr(ex)
+
+        self.result.cpu_seconds = time.thread_time() - cpu_started_at
+
+
+def _peak_rss_bytes() -> typing.Optional[int]:
+    if resource is None:
+        return None
+    # Note: in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _process_cpu_seconds() -> float:
+    return time.process_time()
+
+
+def _stand_in_server_process(url_queue: multiprocessing.Queue, stop_event: multiprocessing.Event):
+    """Process function serving a local StandInServer, until stopped."""
+    with StandInServer() as server:
+        url_queue.put(server.url)
+        stop_event.wait()
+
+
+def run_load_test(sessions: int,
+                  ws_url: typing.Optional[str] = None,
+                  customer_token: str = 'stand-in',
+                  media_config: typing.Optional[MediaConfig] = None,
+                  chunks: typing.Optional[typing.List[bytes]] = None,
+                  rate: float = 1.0,
+                  ramp_up_seconds: float = 0.0,
+                  transport: typing.Optional[TransportConfig] = None) -> LoadTestReport:
+    """
+    Run simulated streams concurrently, and report their performance.
+
+    :param sessions:        number of streams
+    :param ws_url:          websocket url to stream to. if omitted, a local stand-in server is started (in a separate process)
+    :param customer_token:  the customer token of the streaming clients
+    :param media_config:    the media config of `chunks`
+    :param chunks:          media chunks streamed by each session. if omitted, 10 seconds of synthetic media are used
+    :param rate:            media rate, as a multiple of realtime. if 0, media is sent as fast as possible
+    :param ramp_up_seconds: the streams are started evenly over this period
+    :param transport:       the TCP-level options of the streaming clients
+
+    :return: a LoadTestReport
+    """
+
+    media_config = media_config or MediaConfig()
+    if chunks is None:
+        chunks = synthetic_media(media_config, duration_seconds=10.0)
+
+    # start a local stand-in server, in a separate process so that it doesn't skew CPU and RSS measurements
+    server_process = None
+    if ws_url is None:
+        context = multiprocessing.get_context('spawn')
+        url_queue, stop_event = context.Queue(), context.Event()
+        server_process = context.Process(target=_stand_in_server_process, args=(url_queue, stop_event), daemon=True)
+        server_process.start()
+        ws_url = url_queue.get(timeout=30)
+
+    try:
+        rss_before = _peak_rss_bytes()
+        cpu_before = _process_cpu_seconds()
+        started_at = time.monotonic()
+
+        # ramp up
+        running = []
+        for i in range(sessions):
+            start_at = started_at + (ramp_up_seconds * i / sessions)
+            delay = start_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            session = _Session(ws_url, customer_token, media_config, chunks, rate, transport)
+            session.thread.start()
+            running.append(session)
+
+        for session in running:
+            session.thread.join()
+
+        elapsed_seconds = time.monotonic() - started_at
+        cpu_seconds = _process_cpu_seconds() - cpu_before
+        rss_after = _peak_rss_bytes()
+
+    finally:
+        if server_process is not None:
+            stop_event.set()
+            server_process.join(timeout=10)
+
+    results = [session.result for session in running]
+    succeeded = [r for r in results if r.error is None]
+    latencies = [latency for r in succeeded for latency in r.latencies]
+    connect_times = [r.connect_seconds for r in succeeded if r.connect_seconds is not None]
+    first_response_times = [r.first_response_seconds for r in succeeded if r.first_response_seconds is not None]
+    receive_cpu_times = [r.cpu_seconds for r in succeeded]
+
+    return LoadTestReport(
+        sessions=sessions,
+        failed=len(results) - len(succeeded),
+        elapsed_seconds=elapsed_seconds,
+        responses=sum(r.responses for r in results),
+        media_seconds=sum(r.media_seconds for r in results),
+        connect_p50=percentile(connect_times, 50),
+        connect_p99=percentile(connect_times, 99),
+        first_response_p50=percentile(first_response_times, 50),
+        first_response_p99=percentile(first_response_times, 99),
+        latency_p50=percentile(latencies, 50),
+        latency_p99=percentile(latencies, 99),
+        receive_cpu_p50=percentile(receive_cpu_times, 50),
+        receive_cpu_p99=percentile(receive_cpu_times, 99),
+        cpu_seconds_per_session=cpu_seconds / sessions if sessions else None,
+        rss_bytes_per_session=(rss_after - rss_before) / sessions if sessions and rss_before is not None else None,
+        errors=sorted({r.error for r in results if r.error is not None}),
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the 'loadtest' command's arguments to `parser`."""
+    parser.add_argument('-n', '--sessions', type=int, default=10, help='Number of concurrent streams')
+    parser.add_argument('--ws-url', default=None, help='WebSocket URL to stream to (default: a local stand-in server)')
+    parser.add_argument('--customer-token', default='stand-in', help='Customer token of the streaming clients')
+    parser.add_argument('-m', '--media-path', default=None, help="A 'WAV' file to stream (default: synthetic media)")
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of synthetic media per stream')
+    parser.add_argument('--rate', type=float, default=1.0, help='Media rate, as a multiple of realtime (0: as fast as possible)')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds over which the streams are started')
+    parser.add_argument('--chunk-seconds', type=float, default=DEFAULT_CHUNK_SECONDS, help='Seconds of media per sent chunk')
+    parser.add_argument('--transport', choices=sorted(TRANSPORT_PRESETS), default='default', help='TCP-level options of the clients')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """The 'loadtest' command."""
+
+    # quiet the streaming clients
+    logging.getLogger('verbit.loadtest').setLevel(logging.WARNING)
+
+    if args.media_path is not None:
+        media_config, chunks = wav_media(args.media_path, chunk_seconds=args.chunk_seconds)
+    else:
+        media_config = MediaConfig()
+        chunks = synthetic_media(media_config, duration_seconds=args.duration, chunk_seconds=args.chunk_seconds)
+
+    report = run_load_test(sessions=args.sessions,
+                           ws_url=args.ws_url,
+                           customer_token=args.customer_token,
+                           media_config=media_config,
+                           chunks=chunks,
+                           rate=args.rate,
+                           ramp_up_seconds=args.ramp_up,
+                           transport=TRANSPORT_PRESETS[args.transport])
+
+    print(json.dumps(asdict(report), indent=2) if args.json else report.format())
+    return 1 if report.failed else 0
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import time
+import shutil
+import struct
+import typing
+import tempfile
+
+from collections import deque
+from dataclasses import dataclass
+from threading import Thread, Condition
+
+
+@dataclass
+class MediaSpoolMetrics:
+    depth_bytes: int = 0                # media bytes spooled and not yet drained
+    depth_records: int = 0              # media chunks spooled and not yet drained
+    segments: int = 0                   # number of segment files on disk
+    spooled_bytes: int = 0              # total media bytes written to the spool
+    drained_bytes: int = 0              # total media bytes read from the spool
+    dropped_bytes: int = 0              # media bytes dropped since the spool exceeded its maximum size
+    expired_bytes: int = 0              # media bytes dropped since they were older than the spool's TTL
+    drain_rate: float = 0.0             # recent drain rate, in bytes per second
+    catching_up: bool = False           # is spooled media being drained faster than realtime
+
+
+class _SpoolSegment:
+    """A memory-mapped, append-only segment file of media records."""
+
+    # record header: monotonic time of spooling, payload length
+    HEADER = struct.Struct('<dI')
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        self.write_offset = 0
+        self.read_offset = 0
+        self.unread_bytes = 0
+        self.unread_records = 0
+
+        with open(path, 'w+b') as f:
+            f.truncate(capacity)
+            self.mmap = mmap.mmap(f.fileno(), capacity)
+
+    def fits(self, size: int) -> bool:
+        return self.write_offset + self.HEADER.size + size <= self.capacity
+
+    def append(self, chunk: bytes, spooled_at: float):
+        offset = self.write_offset
+        self.HEADER.pack_into(self.mmap, offset, spooled_at, len(chunk))
+        offset += self.HEADER.size
+        self.mmap[offset:offset + len(chunk)] = chunk
+        self.write_offset = offset + len(chunk)
+        self.unread_bytes += len(chunk)
+        self.unread_records += 1
+
+    def read(self) -> typing.Tuple[float, bytes]:
+        spooled_at, size = self.HEADER.unpack_from(self.mmap, self.read_offset)
+        offset = self.read_offset + self.HEADER.size
+        chunk = self.mmap[offset:offset + size]
+        self.read_offset = offset + size
+        self.unread_bytes -= size
+        self.unread_records -= 1
+        return spooled_at, chunk
+
+    def remove(self):
+        self.mmap.close()
+        os.remove(self.path)
+
+
+class MediaSpool:
+    """
+    Disk-backed spool for media chunks, so that media is neither lost nor blocks its producer during long outages.
+
+    Media chunks from the user's media generator are written through the spool: a capture thread appends them to
+    memory-mapped, append-only segment files, while the media sender drains them. When the connection is restored
+    after an outage, spooled media is drained at `catch_up_rate` times realtime, until the spool is caught up.
+
+    The spool is bounded:
+        1. in size: when exceeding `max_bytes`, the oldest segments are dropped
+        2. in time: media spooled more than `ttl_seconds` ago is dropped instead of being sent
+
+    Usage:
+        client.media_spool = MediaSpool()
+    """
+
+    DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_TTL_SECONDS = 10 * 60
+    DEFAULT_CATCH_UP_RATE = 1.25
+    DRAIN_RATE_WINDOW_SECONDS = 5.0
+
+    def __init__(self,
+                 directory: typing.Optional[str] = None,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: typing.Optional[float] = DEFAULT_TTL_SECONDS,
+                 catch_up_rate: float = DEFAULT_CATCH_UP_RATE):
+        """
+        :param directory:       directory to create segment files in. if omitted, a temporary directory is used
+        :param segment_bytes:   size of each segment file
+        :param max_bytes:       maximum total size of segment files, at least two segments
+        :param ttl_seconds:     maximum age of spooled media. if None, media never expires
+        :param catch_up_rate:   the drain rate of spooled media, as a multiple of the realtime rate
+        """
+
+        if max_bytes < 2 * segment_bytes:
+            raise ValueError("Parameter 'max_bytes' must be at least two segments")
+        if catch_up_rate < 1.0:
+            raise ValueError("Parameter 'catch_up_rate' must be at least 1.0 (realtime)")
+
+        self._own_directory = directory is None
+        self._directory = directory or tempfile.mkdtemp(prefix='verbit_media_spool_')
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._catch_up_rate = catch_up_rate
+
+        self._condition = Condition()
+        self._segments = deque()
+        self._segment_count = 0
+        self._total_capacity = 0
+
+        self._closed = False
+
+        # the capture side
+        self._input_finished = False
+        self._input_error = None
+        self._capture_thread = None
+
+        # the drain side: (time.monotonic(), size) of drained chunks
+        self._drained = deque()
+
+        self._metrics = MediaSpoolMetrics()
+
+    @property
+    def metrics(self) -> MediaSpoolMetrics:
+        """A snapshot of the spool's metrics."""
+        with self._condition:
+            now = time.monotonic()
+            while self._drained and self._drained[0][0] < now - self.DRAIN_RATE_WINDOW_SECONDS:
+                self._drained.popleft()
+            drain_rate = sum(size for _, size in self._drained) / self.DRAIN_RATE_WINDOW_SECONDS
+            return MediaSpoolMetrics(depth_bytes=sum(s.unread_bytes for s in self._segments),
+                                     depth_records=sum(s.unread_records for s in self._segments),
+                                     segments=len(self._segments),
+                                     spooled_bytes=self._metrics.spooled_bytes,
+                                     drained_bytes=self._metrics.drained_bytes,
+                                     dropped_bytes=self._metrics.dropped_bytes,
+                                     expired_bytes=self._metrics.expired_bytes,
+                                     drain_rate=drain_rate,
+                                     catching_up=self._metrics.catching_up)
+
+    def write_through(self, media_generator: typing.Iterator[bytes], bytes_per_second: int) -> typing.Iterator[bytes]:
+        """
+        Start spooling `media_generator` in a capture thread.
+
+        :param media_generator:     a generator of media bytes chunks
+        :param bytes_per_second:    the realtime rate of the media, for pacing the catch-up rate
+
+        :return: a generator which drains the spooled media chunks
+        """
+        self._capture_thread = Thread(
+            target=self._capture_worker,
+            args=(media_generator, ),
+            name='media_spool_capture',
+            daemon=True)
+        self._capture_thread.start()
+
+        return self._drain_generator(bytes_per_second)
+
+    def append(self, chunk: bytes):
+        """Append a media chunk to the spool (unless closed)."""
+
+        with self._condition:
+            if self._closed:
+                return
+            segment = self._segments[-1] if self._segments else None
+
+            # start a new segment
+            if segment is None or not segment.fits(len(chunk)):
+                capacity = max(self._segment_bytes, _SpoolSegment.HEADER.size + len(chunk))
+                path = os.path.join(self._directory, f'segment_{self._segment_count:08d}.spool')
+                self._segment_count += 1
+                segment = _SpoolSegment(path, capacity)
+                self._segments.append(segment)
+                self._total_capacity += capacity
+
+                # drop the oldest segments, beyond the maximum size
+                while self._total_capacity > self._max_bytes and len(self._segments) > 1:
+                    oldest = self._segments.popleft()
+                    self._metrics.dropped_bytes += oldest.unread_bytes
+                    self._total_capacity -= oldest.capacity
+                    oldest.remove()
+
+            segment.append(chunk, time.monotonic())
+            self._metrics.spooled_bytes += len(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error: typing.Optional[Exception] = None):
+        """
+        Mark the end of the spooled media stream.
+
+        :param error: an exception to raise to the drain side, after all spooled media was drained
+        """
+        with self._condition:
+            self._input_finished = True
+            self._input_error = error
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop spooling, end the drain side's media stream, and remove all segment files."""
+        with self._condition:
+            self._closed = True
+            self._input_finished = True
+            self._condition.notify_all()
+            while self._segments:
+                segment = self._segments.popleft()
+                self._total_capacity -= segment.capacity
+                segment.remove()
+        if self._own_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _capture_worker(self, media_generator: typing.Iterator[bytes]):
+        """Thread function for spooling media from a user-given generator."""
+        try:
+            for chunk in media_generator:
+                if self._closed:
+                    return
+                self.append(chunk)
+        except Exception as ex:
+            self.finish(error=ex)
+        else:
+            self.finish()
+
+    def _read(self) -> typing.Optional[bytes]:
+        """
+        Read the next spooled media chunk, waiting for one if needed.
+
+        :return: a media chunk, or None if the spooled media stream finished
+        """
+
+        with self._condition:
+
+            while True:
+
+                # skip over fully read segments (except for the one being written)
+                while self._segments and self._segments[0].unread_records == 0 and len(self._segments) > 1:
+                    segment = self._segments.popleft()
+                    self._total_capacity -= segment.capacity
+                    segment.remove()
+
+                segment = self._segments[0] if self._segments else None
+                if segment is not None and segment.unread_records:
+                    spooled_at, chunk = segment.read()
+
+                    # drop expired media
+                    if self._ttl_seconds is not None and time.monotonic() - spooled_at > self._ttl_seconds:
+                        self._metrics.expired_bytes += len(chunk)
+                        continue
+
+                    self._metrics.drained_bytes += len(chunk)
+                    self._drained.append((time.monotonic(), len(chunk)))
+                    self._metrics.catching_up = segment.unread_records > 0 or len(self._segments) > 1
+                    return chunk
+
+                if self._input_finished:
+                    return None
+
+                self._metrics.catching_up = False
+                self._condition.wait()
+
+    def _drain_generator(self, bytes_per_second: int) -> typing.Iterator[bytes]:
+        """
+        Generator function draining spooled media chunks.
+        While spooled media is behind realtime, chunks are paced at `catch_up_rate` times realtime.
+        """
+
+        catch_up_bytes_per_second = bytes_per_second * self._catch_up_rate
+        next_chunk_at = time.monotonic()
+
+        while True:
+            chunk = self._read()
+            if chunk is None:
+                break
+
+            # pace catching up, no faster than the catch-up rate
+            now = time.monotonic()
+            if self._metrics.catching_up:
+                if next_chunk_at > now:
+                    time.sleep(next_chunk_at - now)
+            else:
+                next_chunk_at = now
+            next_chunk_at = max(next_chunk_at, now) + len(chunk) / catch_up_bytes_per_second
+
+            yield chunk
+
+        if self._input_error is not None:
+            raise self._input_error
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+import math
+import time
+import bisect
+import typing
+import weakref
+
+from array import array
+from threading import Lock
+from dataclasses import dataclass
+
+
+class MediaChunk(bytes):
+    """
+    A media chunk tagged with the source presentation timestamp (PTS, in seconds) of its first sample.
+    Media generators may yield these instead of plain bytes, for the MediaTimeline to map response times to source PTS.
+    Slices and concatenations of a MediaChunk are plain bytes (untagged).
+    """
+
+    def __new__(cls, data: bytes, pts: typing.Optional[float] = None):
+        chunk = super().__new__(cls, data)
+        chunk.pts = pts
+        return chunk
+
+
+@dataclass
+class MediaPosition:
+    stream_seconds: float                   # media time, since the start of the stream (across connections)
+    sent_at: float                          # time.monotonic() when the frame containing the media was sent
+    sent_at_epoch: float                    # the same, as a time.time() epoch time
+    pts: typing.Optional[float] = None      # source PTS of the media, if the media generator tagged it (see: MediaChunk)
+
+
+class MediaTimeline:
+    """
+    A sample-accurate record of the media sent over a stream: for each sent media frame, its byte offset in the sent
+    media and in the stream, the time.monotonic() it was sent at, and its source PTS (if tagged, see: MediaChunk).
+    The two offsets differ once media of the stream was skipped, i.e. not sent (see: skip(), SilenceGate).
+
+    Response times are relative to the media sent over their connection, so the sent offset at which each connection
+    started is recorded too. locate() maps a response time back to the stream offset, local send time and source PTS.
+
+    Frames are kept in compact arrays, bounded by `max_frames` (older frames are dropped, in halves).
+    Recorded by the streaming client's media sender, see: WebSocketStreamingClient.media_timeline
+    """
+
+    DEFAULT_MAX_FRAMES = 64 * 1024
+
+    def __init__(self, bytes_per_second: int, max_frames: int = DEFAULT_MAX_FRAMES):
+        if bytes_per_second <= 0:
+            raise ValueError("Parameter 'bytes_per_second' must be positive")
+
+        self._bytes_per_second = bytes_per_second
+        self._max_frames = max(1, max_frames)
+        self._lock = Lock()
+
+        # per frame: byte offsets of its start in the sent media and in the stream, time.monotonic() it was sent at,
+        # source PTS (NaN, if not tagged)
+        self._offsets = array('q')
+        self._stream_offsets = array('q')
+        self._sent_at = array('d')
+        self._pts = array('d')
+        self._sent_bytes = 0
+        self._stream_bytes = 0
+
+        # connection -> sent byte offset its media started at. the current connection's offset is kept separately.
+        self._connection_offsets = weakref.WeakKeyDictionary()
+        self._connection_offset = 0
+
+        # for converting monotonic times to epoch times
+        self._epoch_offset = time.time() - time.monotonic()
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self._bytes_per_second
+
+    @property
+    def sent_bytes(self) -> int:
+        """Media bytes sent over the stream, across connections."""
+        return self._sent_bytes
+
+    @property
+    def sent_seconds(self) -> float:
+        return self._sent_bytes / self._bytes_per_second
+
+    @property
+    def stream_bytes(self) -> int:
+        """Media bytes of the stream so far, sent or skipped."""
+        return self._stream_bytes
+
+    @property
+    def stream_seconds(self) -> float:
+        return self._stream_bytes / self._bytes_per_second
+
+    @property
+    def skipped_bytes(self) -> int:
+        return self._stream_bytes - self._sent_bytes
+
+    @property
+    def connection_offset_seconds(self) -> float:
+        """Sent media time at which the current connection's media started."""
+        return self._connection_offset / self._bytes_per_second
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def start_connection(self, connection: typing.Optional[object] = None):
+        """
+        Media continues over a new connection (whose response times start at zero), from the current offset.
+
+        :param connection: the connection (e.g. WebSocket), for locating responses it received after another started
+        """
+        with self._lock:
+            self._connection_offset = self._sent_bytes
+            if connection is not None:
+                self._connection_offsets[connection] = self._sent_bytes
+
+    def record(self, size: int, sent_at: float, pts: typing.Optional[float] = None):
+        """
+        A media frame was sent.
+
+        :param size:        the frame's size, in bytes
+        :param sent_at:     time.monotonic() when sending started
+        :param pts:         source PTS of the frame's first sample. if None, extrapolated from the previous frame's.
+        """
+        with self._lock:
+            if pts is None and self._pts and not math.isnan(self._pts[-1]):
+                pts = self._pts[-1] + (self._stream_bytes - self._stream_offsets[-1]) / self._bytes_per_second
+
+            self._offsets.append(self._sent_bytes)
+            self._stream_offsets.append(self._stream_bytes)
+            self._sent_at.append(sent_at)
+            self._pts.append(math.nan if pts is None else pts)
+            self._sent_bytes += size
+            self._stream_bytes += size
+
+            if len(self._offsets) > 2 * self._max_frames:
+                del self._offsets[:self._max_frames]
+                del self._stream_offsets[:self._max_frames]
+                del self._sent_at[:self._max_frames]
+                del self._pts[:self._max_frames]
+
+    def skip(self, size: int):
+        """Media of the stream was skipped, i.e. not sent (e.g. a silence, see: SilenceGate)."""
+        with self._lock:
+            self._stream_bytes += size
+
+    def locate(self, media_seconds: float, connection: typing.Optional[object] = None, is_start: bool = False) -> typing.Optional[MediaPosition]:
+        """
+        Locate the media at a time of a connection (e.g. a response's 'end').
+        Media at a frame boundary is located in the frame ending there, or starting there if `is_start`
+        (so that an end before skipped media, and a start after it, are located on their side of the skip).
+
+        :param media_seconds:   media time, since the start of the connection
+        :param connection:      the connection the time is relative to. if omitted, the current connection.
+        :param is_start:        whether the time is a start time
+
+        :return: the media's position, or None if it wasn't sent (yet), or its frame is no longer kept
+        """
+        with self._lock:
+            connection_offset = self._connection_offset
+            if connection is not None:
+                connection_offset = self._connection_offsets.get(connection, connection_offset)
+
+            offset = connection_offset + round(media_seconds * self._bytes_per_second)
+            if not self._offsets or offset > self._sent_bytes or offset < self._offsets[0]:
+                return None
+
+            search = bisect.bisect_right if is_start else bisect.bisect_left
+            index = max(0, search(self._offsets, offset) - 1)
+            sent_at = self._sent_at[index]
+            pts = self._pts[index]
+            frame_offset = self._offsets[index]
+            stream_offset = self._stream_offsets[index] + offset - frame_offset
+
+        return MediaPosition(
+            stream_seconds=stream_offset / self._bytes_per_second,
+            sent_at=sent_at,
+            sent_at_epoch=sent_at + self._epoch_offset,
+            pts=None if math.isnan(pts) else pts + (offset - frame_offset) / self._bytes_per_second)
+
+    def locate_response(self, response: dict, field: str = 'end', connection: typing.Optional[object] = None) -> typing.Optional[MediaPosition]:
+        """Locate the media at a response's 'start' or 'end' time. See: locate()"""
+        media_seconds = response.get('response', {}).get(field)
+        if media_seconds is None:
+            return None
+        return self.locate(media_seconds, connection, is_start=field == 'start')
+
+    def restore_times(self, response: dict, connection: typing.Optional[object] = None):
+        """
+        Once media was skipped, response times (relative to the sent media) no longer match the stream's timing:
+        restore the start and end times of a response (and of its alternatives and items) to those of the stream,
+        in place. Times which can't be located (e.g. of frames no longer kept) are left as they are.
+        """
+        if self._stream_bytes == self._sent_bytes:
+            return
+
+        connection_offset = self._get_connection_offset(connection)
+        connection_stream_offset = self._stream_offset(connection_offset, is_start=True)
+        if connection_stream_offset is None:
+            return
+
+        def restore(obj: dict):
+            for field in ('start', 'end'):
+                media_seconds = obj.get(field)
+                if media_seconds is not None:
+                    stream_offset = self._stream_offset(connection_offset + round(media_seconds * self._bytes_per_second), field == 'start')
+                    if stream_offset is not None:
+                        obj[field] = (stream_offset - connection_stream_offset) / self._bytes_per_second
+
+        body = response.get('response', {})
+        restore(body)
+        for alternative in body.get('alternatives') or []:
+            restore(alternative)
+            for item in alternative.get('items') or []:
+                restore(item)
+
+    def connection_stream_seconds(self, connection: typing.Optional[object] = None) -> float:
+        """
+        Stream time at which a connection's media started. Added to the times of the connection's responses
+        (restored, once media was skipped, see: restore_times()), it gives stream times, comparable across connections.
+
+        :param connection: the connection. if omitted, the current connection.
+        """
+        connection_offset = self._get_connection_offset(connection)
+        stream_offset = self._stream_offset(connection_offset, is_start=True)
+        return (connection_offset if stream_offset is None else stream_offset) / self._bytes_per_second
+
+    def _get_connection_offset(self, connection: typing.Optional[object]) -> int:
+        """The sent offset a connection's media started at (the current connection's, if unknown)."""
+        with self._lock:
+            if connection is None:
+                return self._connection_offset
+            return self._connection_offsets.get(connection, self._connection_offset)
+
+    def _stream_offset(self, offset: int, is_start: bool) -> typing.Optional[int]:
+        """The stream offset of a sent offset."""
+        with self._lock:
+            if not self._offsets or offset > self._sent_bytes or offset < self._offsets[0]:
+                return None
+            search = bisect.bisect_right if is_start else bisect.bisect_left
+            index = max(0, search(self._offsets, offset) - 1)
+            return self._stream_offsets[index] + offset - self._offsets[index]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import time
+import typing
+
+from collections import OrderedDict
+
+
+class ResponseDeduplicator:
+    """
+    Drops duplicated and out-of-order responses, e.g. for utterances which straddled a reconnection.
+
+    Responses are deduplicated by their `id`, using a bounded set of recently seen ids: an id is forgotten
+    after `window_seconds`, or when more than `max_ids` ids were seen since - so memory is constant over
+    arbitrarily long sessions.
+
+    Ordering is kept monotonic per response stream, i.e. per (type, service_type, language_code):
+        1. a response ending before the end of the last final response of its stream is stale, and dropped
+        2. a non-final response of the current utterance, ending before a previous one, is stale, and dropped
+    End-of-stream responses are never dropped.
+    Response times are relative to their connection, so either pass the stream time each connection started at,
+    see: accept(), or restart ordering per connection, see: reset_ordering()
+    """
+
+    DEFAULT_MAX_IDS = 4096
+    DEFAULT_WINDOW_SECONDS = 10 * 60
+
+    def __init__(self, max_ids: int = DEFAULT_MAX_IDS, window_seconds: typing.Optional[float] = DEFAULT_WINDOW_SECONDS):
+        """
+        :param max_ids:         maximum number of response ids to remember
+        :param window_seconds:  how long to remember a response id. if None, ids are only forgotten by `max_ids`
+        """
+
+        if max_ids <= 0:
+            raise ValueError("Parameter 'max_ids' must be positive")
+
+        self._max_ids = max_ids
+        self._window_seconds = window_seconds
+
+        # response id -> time.monotonic() it was seen at, oldest first
+        self._seen_ids = OrderedDict()
+
+        # stream key -> end of last final response
+        self._final_ends = dict()
+
+        # stream key -> (start, end) of last non-final response
+        self._partials = dict()
+
+        # statistics
+        self.duplicates_dropped = 0
+        self.out_of_order_dropped = 0
+
+    def accept(self, response: dict, offset_seconds: float = 0.0) -> bool:
+        """
+        Check whether a response should be passed on to the consumer.
+
+        :param response:        a response, as yielded by the streaming client
+        :param offset_seconds:  added to the response's times for ordering, e.g. the stream time its connection started at
+
+        :return: True if the response is new and in order, False if it should be dropped
+        """
+
+        resp = response.get('response', {})
+
+        # never drop the end of stream
+        if resp.get('is_end_of_stream'):
+            return True
+
+        # deduplicate by id
+        resp_id = resp.get('id')
+        if resp_id is not None:
+            now = time.monotonic()
+            self._forget_ids(now)
+            if resp_id in self._seen_ids:
+                self.duplicates_dropped += 1
+                return False
+            self._seen_ids[resp_id] = now
+
+        # keep monotonic ordering
+        start, end = self._get_times(resp)
+        if end is None:
+            return True
+        if offset_seconds:
+            start = None if start is None else start + offset_seconds
+            end += offset_seconds
+
+        key = (resp.get('type'), resp.get('service_type'), resp.get('language_code'))
+        final_end = self._final_ends.get(key)
+        if final_end is not None and end < final_end:
+            self.out_of_order_dropped += 1
+            return False
+
+        if resp.get('is_final'):
+            self._final_ends[key] = end
+            self._partials.pop(key, None)
+        else:
+            partial = self._partials.get(key)
+            if partial is not None and partial[0] == start and end < partial[1]:
+                self.out_of_order_dropped += 1
+                return False
+            self._partials[key] = (start, end)
+
+        return True
+
+    def reset_ordering(self):
+        """
+        Restart ordering, e.g. when responses continue over a new connection, whose response times start at zero.
+        Response ids are still remembered, so duplicates across connections are dropped.
+        """
+        self._final_ends.clear()
+        self._partials.clear()
+
+    def filter(self, responses: typing.Iterable[dict]) -> typing.Iterator[dict]:
+        """Generator yielding only the accepted responses of `responses`."""
+        for response in responses:
+            if self.accept(response):
+                yield response
+
+    def _forget_ids(self, now: float):
+        """Forget the oldest ids, beyond `max_ids` or older than `window_seconds`."""
+
+        while len(self._seen_ids) >= self._max_ids:
+            self._seen_ids.popitem(last=False)
+
+        if self._window_seconds is not None:
+            oldest = now - self._window_seconds
+            while self._seen_ids and next(iter(self._seen_ids.values())) < oldest:
+                self._seen_ids.popitem(last=False)
+
+    @staticmethod
+    def _get_times(resp: dict) -> typing.Tuple[typing.Optional[float], typing.Optional[float]]:
+        """Get the start and end times of a response, falling back to its first alternative's."""
+
+        if 'end' in resp:
+            return resp.get('start'), resp.get('end')
+
+        alternatives = resp.get('alternatives') or [{}]
+        return alternatives[0].get('start'), alternatives[0].get('end')
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import typing
+
+from collections import deque
+from dataclasses import dataclass, replace
+from threading import Thread, Condition, Lock
+
+
+RouteKey = typing.Tuple[typing.Optional[str], typing.Optional[str]]     # (service type, language code)
+
+
+@dataclass
+class RouteMetrics:
+    routed: int = 0             # responses routed to the sub-stream
+    delivered: int = 0          # responses taken by its consumer
+    dropped: int = 0            # responses dropped, since its queue was full
+    max_depth: int = 0          # maximum number of responses queued
+
+
+class DemuxStream:
+    """
+    A sub-stream of responses of one (service type, language code), with a bounded queue of its own.
+    Iterating it yields its responses, until the demultiplexed source ends (raising the source's error, if any).
+
+    When the queue is full, the oldest non-final response is dropped (it's superseded by a later revision anyway),
+    or the oldest response, if all are final. So a slow consumer never blocks the source or the other sub-streams.
+    """
+
+    def __init__(self, key: RouteKey, max_queued: int):
+        self.key = key
+        self._max_queued = max(1, max_queued)
+        self._condition = Condition()
+        self._responses = deque()
+        self._ended = False
+        self._error = None
+        self._metrics = RouteMetrics()
+
+    @property
+    def metrics(self) -> RouteMetrics:
+        """A snapshot of the sub-stream's metrics."""
+        with self._condition:
+            return replace(self._metrics)
+
+    def __iter__(self) -> typing.Iterator[dict]:
+        while True:
+            with self._condition:
+                while not self._responses and not self._ended:
+                    self._condition.wait()
+                if not self._responses:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                response = self._responses.popleft()
+                self._metrics.delivered += 1
+            yield response
+
+    def put(self, response: dict):
+        with self._condition:
+            if len(self._responses) >= self._max_queued:
+                self._drop_one()
+            self._responses.append(response)
+            self._metrics.routed += 1
+            self._metrics.max_depth = max(self._metrics.max_depth, len(self._responses))
+            self._condition.notify_all()
+
+    def end(self, error: typing.Optional[BaseException] = None):
+        with self._condition:
+            self._ended = True
+            self._error = error
+            self._condition.notify_all()
+
+    def _drop_one(self):
+        for index, response in enumerate(self._responses):
+            if not response.get('response', {}).get('is_final'):
+                del self._responses[index]
+                break
+        else:
+            self._responses.popleft()
+        self._metrics.dropped += 1
+
+
+class ResponseDemux:
+    """
+    Routes the interleaved responses of a session (e.g. a translation session's transcription and translations)
+    into sub-streams per (service type, language code), each with its own bounded queue and consumer.
+
+    A single thread iterates the source and routes each response by a dictionary lookup of its key, without touching
+    the rest of the response: consumers run in threads of their own, so a slow consumer (e.g. of a translation)
+    never delays the others (e.g. the source language's captions).
+
+    Usage:
+        demux = ResponseDemux(client.start_stream(...))
+        captions = demux.route('transcription', 'en')
+        spanish = demux.route('translation', 'es')
+        demux.start()
+        Thread(target=translate_consumer, args=(spanish, )).start()
+        for response in captions:
+            ...
+    """
+
+    DEFAULT_MAX_QUEUED = 256
+
+    def __init__(self, responses: typing.Iterable[dict], max_queued: int = DEFAULT_MAX_QUEUED):
+        """
+        :param responses:   the responses to demultiplex, e.g. as returned by WebSocketStreamingClient.start_stream()
+        :param max_queued:  the default maximum number of responses queued per sub-stream
+        """
+        self._responses = responses
+        self._max_queued = max_queued
+        self._routes = {}
+        self._other = None
+        self._lock = Lock()
+        self._thread = None
+        self.unrouted = 0
+
+    def route(self,
+              service_type: typing.Optional[str],
+              language_code: typing.Optional[str],
+              max_queued: typing.Optional[int] = None) -> DemuxStream:
+        """The sub-stream of the responses of a (service type, language code). Should be called before start()."""
+        key = (service_type, language_code)
+        with self._lock:
+            stream = self._routes.get(key)
+            if stream is None:
+                stream = self._routes[key] = DemuxStream(key, max_queued or self._max_queued)
+        return stream
+
+    def other(self, max_queued: typing.Optional[int] = None) -> DemuxStream:
+        """The sub-stream of the responses of any key without a route (otherwise, those are dropped)."""
+        with self._lock:
+            if self._other is None:
+                self._other = DemuxStream((None, None), max_queued or self._max_queued)
+        return self._other
+
+    @property
+    def routes(self) -> typing.Dict[RouteKey, DemuxStream]:
+        return dict(self._routes)
+
+    def start(self) -> 'ResponseDemux':
+        """Start routing the source's responses, in a thread of its own."""
+        if self._thread is None:
+            self._thread = Thread(target=self._route_worker, name='response_demux', daemon=True)
+            self._thread.start()
+        return self
+
+    def join(self, timeout: typing.Optional[float] = None):
+        """Wait for the source to end."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _route_worker(self):
+        """Thread function routing each of the source's responses to its sub-stream."""
+
+        error = None
+        routes = self._routes
+        try:
+            for response in self._responses:
+                body = response.get('response', {})
+                stream = routes.get((body.get('service_type'), body.get('language_code')), self._other)
+                if stream is not None:
+                    stream.put(response)
+                else:
+                    self.unrouted += 1
+        except Exception as ex:
+            error = ex
+
+        streams = list(routes.values()) + ([self._other] if self._other is not None else [])
+        for stream in streams:
+            stream.end(error)
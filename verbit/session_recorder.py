@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import time
+import struct
+import typing
+import weakref
+import itertools
+
+from enum import IntEnum
+from dataclasses import dataclass
+from threading import Thread, Lock
+
+from websocket import ABNF
+
+from verbit.stand_in_server import StandInSession, StandInConnection
+
+
+class Direction(IntEnum):
+    Sent = 0            # a frame sent by the client
+    Received = 1        # a frame received by the client
+    Opened = 2          # a marker of a newly opened connection (with no frame data)
+
+
+@dataclass
+class RecordedFrame:
+    direction: Direction
+    opcode: int
+    connection: int             # index of the connection, in the order connections were opened
+    timestamp: float            # monotonic seconds since the recording started
+    size: int                   # frame payload size, in bytes
+    data: bytes                 # frame payload, or zeros if payloads were not recorded
+
+
+# log file header: magic, version, flags, wall-clock time of recording start
+_FILE_HEADER = struct.Struct('<4sBBd')
+_MAGIC = b'VBSR'
+_VERSION = 1
+_FLAG_PAYLOADS = 0x01
+
+# record header: direction, opcode, connection index, timestamp, payload size
+_RECORD_HEADER = struct.Struct('<BBHdI')
+
+
+class SessionRecorder:
+    """
+    Records every WebSocket frame of a streaming session (sent media and events, received responses and control frames)
+    to a compact binary log, with its opcode, size and monotonic timestamp.
+    Logs are read by read_session_log(), and replayed by SessionReplayer.
+
+    Usage:
+        with SessionRecorder('session.vbsr') as recorder:
+            client.session_recorder = recorder
+            for response in client.start_stream(...):
+                ...
+    """
+
+    def __init__(self, path: str, record_payloads: bool = True):
+        """
+        :param path:            the log file to write
+        :param record_payloads: whether to record frame payloads. if False, only frame sizes are recorded
+                                (e.g. when media and transcripts are too sensitive to keep)
+        """
+        self._record_payloads = record_payloads
+        self._file = open(path, 'wb')
+        self._lock = Lock()
+        self._connections = weakref.WeakKeyDictionary()     # WebSocket -> connection number, not keeping it alive
+        self._connection_numbers = itertools.count()
+        self._started_at = time.monotonic()
+        self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, _FLAG_PAYLOADS if record_payloads else 0, time.time()))
+
+    def record(self, ws_client: typing.Any, direction: Direction, opcode: int, data: typing.Union[bytes, str] = b''):
+        """
+        Record a single frame.
+
+        :param ws_client:   the WebSocket the frame was sent or received over
+        :param direction:   see: Direction
+        :param opcode:      the frame's ABNF opcode
+        :param data:        the frame's payload
+        """
+
+        timestamp = time.monotonic() - self._started_at
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        with self._lock:
+            if self._file.closed:
+                return
+            connection = self._connections.get(ws_client)
+            if connection is None:
+                connection = self._connections[ws_client] = next(self._connection_numbers)
+            self._file.write(_RECORD_HEADER.pack(direction, opcode, connection, timestamp, len(data)))
+            if self._record_payloads:
+                self._file.write(data)
+
+    def close(self):
+        with self._lock:
+            self._connections.clear()
+            self._file.close()
+
+    def __enter__(self) -> 'SessionRecorder':
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+
+def read_session_log(path: str) -> typing.Iterator[RecordedFrame]:
+    """Generator function reading the frames of a log written by SessionRecorder."""
+
+    with open(path, 'rb') as f:
+        magic, version, flags, _started_at = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'Not a session log (version {_VERSION}): {path}')
+        has_payloads = bool(flags & _FLAG_PAYLOADS)
+
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            direction, opcode, connection, timestamp, size = _RECORD_HEADER.unpack(header)
+            data = f.read(size) if has_payloads else bytes(size)
+            yield RecordedFrame(Direction(direction), opcode, connection, timestamp, size, data)
+
+
+class SessionReplayer:
+    """
+    Replays a session log, at its original speed or faster, so that a recorded session can be reproduced deterministically:
+        1. media_generator(): yields the recorded media chunks, paced as they were sent, to drive a streaming client
+        2. session_factory(): replays the recorded server frames of each connection, when served by a StandInServer
+
+    Usage:
+        replayer = SessionReplayer('session.vbsr', speed=4.0)
+        with StandInServer(session_factory=replayer.session_factory) as server:
+            for response in client.start_stream(ws_url=server.url, media_generator=replayer.media_generator()):
+                ...
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        :param path:    the log file to replay
+        :param speed:   replay speed, as a multiple of the original speed
+        """
+        if speed <= 0:
+            raise ValueError("Parameter 'speed' must be positive")
+
+        self._speed = speed
+        self.frames = list(read_session_log(path))
+        self._connections = itertools.count()
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    def media_generator(self) -> typing.Iterator[bytes]:
+        """Generator function yielding the recorded media chunks (of all connections), at their recorded times."""
+
+        media = [frame for frame in self.frames if frame.direction == Direction.Sent and frame.opcode == ABNF.OPCODE_BINARY]
+        if not media:
+            return
+
+        started_at = time.monotonic()
+        for frame in media:
+            self._sleep_until(started_at + (frame.timestamp - media[0].timestamp) / self._speed)
+            yield frame.data
+
+    def session_factory(self) -> StandInSession:
+        """Create a StandInSession replaying the next recorded connection (the first one, for the first call, etc.)."""
+
+        connection = next(self._connections)
+        opened_at = next((frame.timestamp for frame in self.frames
+                          if frame.connection == connection and frame.direction == Direction.Opened), None)
+        frames = [frame for frame in self.frames if frame.connection == connection and frame.direction == Direction.Received]
+        if opened_at is None:
+            opened_at = frames[0].timestamp if frames else 0.0
+
+        return _ReplaySession(frames, opened_at, self._speed)
+
+    @staticmethod
+    def _sleep_until(deadline: float):
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ReplaySession(StandInSession):
+    """Sends the recorded frames received over a connection, at their recorded times since the connection opened."""
+
+    # frames which the client sent in response to its own frames, are not replayed
+    REPLAYED_OPCODES = (ABNF.OPCODE_TEXT, ABNF.OPCODE_BINARY, ABNF.OPCODE_PING, ABNF.OPCODE_CLOSE)
+
+    def __init__(self, frames: typing.List[RecordedFrame], opened_at: float, speed: float):
+        self._frames = frames
+        self._opened_at = opened_at
+        self._speed = speed
+
+    def on_open(self, connection: StandInConnection):
+        Thread(target=self._replay_worker, args=(connection, ), name='session_replay', daemon=True).start()
+
+    def _replay_worker(self, connection: StandInConnection):
+        started_at = time.monotonic()
+        try:
+            for frame in self._frames:
+                if frame.opcode not in self.REPLAYED_OPCODES:
+                    continue
+                SessionReplayer._sleep_until(started_at + (frame.timestamp - self._opened_at) / self._speed)
+                if connection.closed:
+                    return
+                connection.send_frame(frame.opcode, frame.data)
+                if frame.opcode == ABNF.OPCODE_CLOSE:
+                    return
+        except OSError:
+            pass
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import time
+import typing
+
+from collections import deque
+from dataclasses import dataclass, replace
+
+try:
+    import numpy as np
+except ImportError:     # an optional dependency, see: extras_require in setup.py
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for the silence gate: pip install 'verbit-streaming-sdk[silence-gate]'")
+
+
+@dataclass
+class SilenceGateConfig:
+    threshold_dbfs: float = -50.0       # blocks whose RMS level (of their loudest channel) is below it are silent
+    block_seconds: float = 0.02         # the analysis block duration
+    hangover_seconds: float = 1.0       # silence sent before suppressing, so that the service finalizes utterances
+    preroll_seconds: float = 0.2        # suppressed silence sent again before speech resumes, so that onsets aren't clipped
+    keepalive_seconds: float = 30.0     # while suppressing, a block of silence is sent at least this often
+
+
+@dataclass
+class SilenceGateMetrics:
+    processed_bytes: int = 0
+    suppressed_bytes: int = 0           # media bytes not sent (saved)
+    silences: int = 0                   # silent stretches suppressed
+    keepalives: int = 0                 # blocks sent to keep the connection alive, while suppressing
+
+
+class SilenceGate:
+    """
+    Suppresses long silent stretches of media (e.g. breaks, muted hold music), so that they aren't sent.
+
+    Media is analyzed in blocks, whose RMS levels are computed vectorized (with NumPy), per chunk. Once a silence
+    lasted `hangover_seconds`, its remaining blocks are suppressed, except for the last `preroll_seconds` before
+    speech resumes, and a block every `keepalive_seconds`.
+
+    Suppressed media shifts the times of later responses, since the service only times the media it received:
+    the streaming client records suppressed media in its MediaTimeline, and restores the times of responses to those
+    of the stream. Only 16-bit PCM ('S16LE') media is supported.
+
+    Usage:
+        client.silence_gate = SilenceGate(SilenceGateConfig(threshold_dbfs=-50.0))
+        ...
+        client.silence_gate.metrics.suppressed_bytes
+    """
+
+    def __init__(self, config: typing.Optional[SilenceGateConfig] = None):
+        _require_numpy()
+        self._config = config or SilenceGateConfig()
+        self._metrics = SilenceGateMetrics()
+        self._bytes_per_second = None
+        self._num_channels = 1
+        self._block_bytes = 0
+        self._threshold = 0.0
+
+        self._silent_bytes = 0          # length of the current silence
+        self._last_sent_at = None
+        self._preroll = deque()         # the most recent suppressed blocks
+        self._preroll_bytes = 0
+        self._pending = b''             # a partial block, held until the next chunk
+
+    @property
+    def config(self) -> SilenceGateConfig:
+        return self._config
+
+    @property
+    def metrics(self) -> SilenceGateMetrics:
+        """A snapshot of the gate's metrics."""
+        return replace(self._metrics)
+
+    @property
+    def held_bytes(self) -> int:
+        """Media bytes held by the gate (the preroll, and a partial block), not sent nor suppressed yet."""
+        return self._preroll_bytes + len(self._pending)
+
+    def take_held(self) -> bytes:
+        """Take back the media held by the gate, e.g. to gate it again after a failed send."""
+        held = b''.join(self._preroll) + self._pending
+        self._preroll.clear()
+        self._preroll_bytes = 0
+        self._pending = b''
+        return held
+
+    def configure(self, sample_rate: int, sample_width: int, num_channels: int):
+        """Set the media format (see: MediaConfig). Called by the streaming client when its stream starts."""
+        if sample_width != 2:
+            raise ValueError('The silence gate only supports 16-bit samples')
+        frame_size = sample_width * num_channels
+        self._bytes_per_second = sample_rate * frame_size
+        self._num_channels = num_channels
+        self._block_bytes = max(1, round(self._config.block_seconds * sample_rate)) * frame_size
+        self._threshold = 32768.0 * 10 ** (self._config.threshold_dbfs / 20)
+
+    def process(self, chunk: bytes, now: typing.Optional[float] = None) -> typing.List[typing.Tuple[bytes, bool]]:
+        """
+        Gate a media chunk.
+
+        :param chunk:   the next media chunk
+        :param now:     time.monotonic(), for keep-alive
+
+        :return: the chunk's media in order, as (media, is_sent) segments: media to send, or suppressed media.
+                 a partial block at the chunk's end is held until the next chunk (or flush()).
+        """
+        if self._bytes_per_second is None:
+            raise RuntimeError('Silence gate is not configured, see: configure()')
+        now = time.monotonic() if now is None else now
+        if self._last_sent_at is None:
+            self._last_sent_at = now
+
+        data = self._pending + chunk if self._pending else chunk
+        whole = len(data) - len(data) % self._block_bytes
+        self._pending = data[whole:]
+        self._metrics.processed_bytes += len(chunk)
+        if not whole:
+            return []
+
+        # the RMS level of each block, of its loudest channel
+        samples = np.frombuffer(data, dtype='<i2', count=whole // 2).reshape(-1, self._block_bytes // 2 // self._num_channels, self._num_channels)
+        levels = np.sqrt(np.mean(np.square(samples, dtype=np.float64), axis=1)).max(axis=1)
+        silent = levels < self._threshold
+
+        config = self._config
+        hangover_bytes = config.hangover_seconds * self._bytes_per_second
+        runs = _Runs()
+
+        for index, is_silent in enumerate(silent.tolist()):
+            block = data[index * self._block_bytes:(index + 1) * self._block_bytes]
+
+            # speech: send the preroll before it
+            if not is_silent:
+                while self._preroll:
+                    self._release(runs, True)
+                self._silent_bytes = 0
+                runs.add(block, True)
+                continue
+
+            # the beginning of a silence is sent
+            self._silent_bytes += len(block)
+            if self._silent_bytes <= hangover_bytes:
+                runs.add(block, True)
+                continue
+
+            # keep the connection alive with a block of silence
+            if now - self._last_sent_at >= config.keepalive_seconds:
+                while self._preroll:
+                    self._release(runs, False)
+                runs.add(block, True)
+                self._metrics.keepalives += 1
+                self._last_sent_at = now
+                continue
+
+            # suppress the block, holding the most recent blocks for the preroll
+            if self._silent_bytes - len(block) <= hangover_bytes:
+                self._metrics.silences += 1
+            self._preroll.append(block)
+            self._preroll_bytes += len(block)
+            while self._preroll and self._preroll_bytes - len(self._preroll[0]) >= config.preroll_seconds * self._bytes_per_second:
+                self._release(runs, False)
+
+        segments = runs.segments()
+        if any(is_sent for _, is_sent in segments):
+            self._last_sent_at = now
+        return segments
+
+    def flush(self) -> typing.List[typing.Tuple[bytes, bool]]:
+        """The media held by the gate, once the media stream finished: the preroll (suppressed), and a partial block."""
+        runs = _Runs()
+        while self._preroll:
+            self._release(runs, False)
+        if self._pending:
+            runs.add(self._pending, True)
+            self._pending = b''
+        return runs.segments()
+
+    def _release(self, runs: '_Runs', is_sent: bool):
+        """Release the oldest block held for the preroll, to be sent or suppressed."""
+        block = self._preroll.popleft()
+        self._preroll_bytes -= len(block)
+        if not is_sent:
+            self._metrics.suppressed_bytes += len(block)
+        runs.add(block, is_sent)
+
+
+class _Runs:
+    """Collects blocks in order, as runs of sent or suppressed media."""
+
+    def __init__(self):
+        self._segments = []
+        self._blocks = []
+        self._is_sent = None
+
+    def add(self, block: bytes, is_sent: bool):
+        if is_sent != self._is_sent:
+            self._close()
+            self._is_sent = is_sent
+        self._blocks.append(block)
+
+    def segments(self) -> typing.List[typing.Tuple[bytes, bool]]:
+        self._close()
+        return self._segments
+
+    def _close(self):
+        if self._blocks:
+            self._segments.append((b''.join(self._blocks), self._is_sent))
+            self._blocks = []
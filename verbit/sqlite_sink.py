@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import uuid
+import typing
+import sqlite3
+import argparse
+import tempfile
+
+from collections import deque
+from dataclasses import dataclass, asdict
+from threading import Thread, Condition
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    response_id TEXT,
+    type TEXT,
+    service_type TEXT,
+    language_code TEXT,
+    start REAL,
+    "end" REAL,
+    start_pts REAL,
+    start_epoch REAL,
+    transcript TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_session_start ON responses (session_id, start);
+CREATE TABLE IF NOT EXISTS items (
+    response_rowid INTEGER NOT NULL REFERENCES responses (id),
+    kind TEXT,
+    value TEXT,
+    start REAL,
+    "end" REAL,
+    speaker_id TEXT
+);
+CREATE INDEX IF NOT EXISTS items_response ON items (response_rowid);
+CREATE VIRTUAL TABLE IF NOT EXISTS responses_fts USING fts5 (transcript, content='responses', content_rowid='id');
+'''
+
+
+@dataclass
+class SqliteSinkMetrics:
+    queued: int = 0                     # responses waiting to be written
+    written_responses: int = 0
+    written_items: int = 0
+    dropped_responses: int = 0          # responses dropped since the queue was full
+    batches: int = 0                    # transactions committed
+    last_batch_seconds: float = 0.0     # duration of the last transaction
+
+
+@dataclass
+class SearchResult:
+    session_id: str
+    response_id: str
+    type: str
+    service_type: str
+    language_code: str
+    start: float
+    end: float
+    start_pts: typing.Optional[float]
+    start_epoch: typing.Optional[float]
+    transcript: str
+
+
+class SqliteSink:
+    """
+    Persists final responses and their word items to a SQLite database, with a full-text search index (FTS5)
+    of transcripts across sessions.
+
+    Writing a response only queues it: a background writer thread writes queued responses in batched transactions,
+    once `batch_size` responses are queued or the oldest was queued `flush_interval_seconds` ago. So the response
+    generator loop (and the socket reader behind it) is never stalled by disk I/O. The database is in WAL mode,
+    so it may be searched while being written.
+
+    The queue is bounded: when full, further responses are dropped (see: metrics), unless `block` is set.
+
+    Usage:
+        with SqliteSink('transcripts.db') as sink:
+            for response in sink.tee(client.start_stream(...), session_id='meeting-1'):
+                ...
+        results = sink.search('quarterly AND revenue')
+    """
+
+    DEFAULT_BATCH_SIZE = 256
+    DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+    DEFAULT_MAX_QUEUED = 10000
+
+    def __init__(self,
+                 path: str,
+                 response_types: typing.Collection[str] = ('transcript', 'captions'),
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 max_queued: int = DEFAULT_MAX_QUEUED,
+                 block: bool = False):
+        """
+        :param path:                    path of the database file, created if it doesn't exist
+        :param response_types:          the types of final responses to persist
+        :param batch_size:              maximum number of responses per transaction
+        :param flush_interval_seconds:  maximum time a response is queued before its transaction starts
+        :param max_queued:              maximum number of queued responses
+        :param block:                   if True, writing to a full queue blocks until there's room, instead of dropping
+        """
+
+        if batch_size < 1 or max_queued < batch_size:
+            raise ValueError("Parameter 'max_queued' must be at least 'batch_size', which must be positive")
+
+        self._path = path
+        self._response_types = response_types
+        self._batch_size = batch_size
+        self._flush_interval_seconds = flush_interval_seconds
+        self._max_queued = max_queued
+        self._block = block
+
+        # create the schema before returning, so that the database can be searched right away
+        connection = self._connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+        finally:
+            connection.close()
+
+        self._condition = Condition()
+        self._queue = deque()
+        self._closing = False
+        self._error = None
+        self._metrics = SqliteSinkMetrics()
+
+        self._writer_thread = Thread(target=self._writer_worker, name='sqlite_sink_writer', daemon=True)
+        self._writer_thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def metrics(self) -> SqliteSinkMetrics:
+        """A snapshot of the sink's metrics."""
+        with self._condition:
+            return SqliteSinkMetrics(**{**asdict(self._metrics), 'queued': len(self._queue)})
+
+    def write_response(self, response: dict, session_id: str = ''):
+        """Queue a response to be written (unless not final, or not of the persisted types)."""
+
+        body = response.get('response', {})
+        if not body.get('is_final') or body.get('type') not in self._response_types:
+            return
+
+        with self._condition:
+            if self._closing:
+                raise RuntimeError('SQLite sink is closed!')
+            if self._block:
+                while len(self._queue) >= self._max_queued and self._error is None:
+                    self._condition.wait()
+            if self._error is not None:
+                raise self._error
+            if len(self._queue) >= self._max_queued:
+                self._metrics.dropped_responses += 1
+                return
+            self._queue.append((time.monotonic(), session_id, body))
+            self._condition.notify_all()
+
+    def tee(self, responses: typing.Iterable[dict], session_id: str = '') -> typing.Iterator[dict]:
+        """Generator function queueing each of `responses` to be written, and yielding it on."""
+        for response in responses:
+            self.write_response(response, session_id)
+            yield response
+
+    def close(self):
+        """Write all queued responses, and stop the writer thread. Raises the writer's error, if it failed."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._writer_thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'SqliteSink':
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
+    def search(self, query: str, session_id: typing.Optional[str] = None, limit: int = 100) -> typing.List[SearchResult]:
+        """
+        Full-text search of the written transcripts, best matches first.
+
+        :param query:       an FTS5 query, see: https://www.sqlite.org/fts5.html#full_text_query_syntax
+        :param session_id:  if given, only responses of this session are searched
+        :param limit:       maximum number of results
+        """
+
+        sql = ('SELECT r.session_id, r.response_id, r.type, r.service_type, r.language_code, '
+               'r.start, r."end", r.start_pts, r.start_epoch, r.transcript '
+               'FROM responses_fts JOIN responses AS r ON r.id = responses_fts.rowid '
+               'WHERE responses_fts MATCH ?')
+        params = [query]
+        if session_id is not None:
+            sql += ' AND r.session_id = ?'
+            params.append(session_id)
+        sql += ' ORDER BY bm25(responses_fts) LIMIT ?'
+        params.append(limit)
+
+        connection = self._connect()
+        try:
+            return [SearchResult(*row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, isolation_level=None)
+        connection.execute('PRAGMA synchronous=NORMAL')     # durable across application crashes, in WAL mode
+        return connection
+
+    def _writer_worker(self):
+        connection = self._connect()
+        try:
+            while True:
+                with self._condition:
+
+                    # wait for a full batch, or for the oldest queued response to be due
+                    while not self._closing and len(self._queue) < self._batch_size:
+                        timeout = None
+                        if self._queue:
+                            timeout = self._queue[0][0] + self._flush_interval_seconds - time.monotonic()
+                            if timeout <= 0:
+                                break
+                        self._condition.wait(timeout)
+
+                    if not self._queue:
+                        return
+                    batch = [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+                    self._condition.notify_all()
+
+                started_at = time.monotonic()
+                items = self._write_batch(connection, batch)
+
+                with self._condition:
+                    self._metrics.written_responses += len(batch)
+                    self._metrics.written_items += items
+                    self._metrics.batches += 1
+                    self._metrics.last_batch_seconds = time.monotonic() - started_at
+
+        except Exception as ex:
+            with self._condition:
+                self._error = ex
+                self._condition.notify_all()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _write_batch(connection: sqlite3.Connection, batch: list) -> int:
+        """Write a batch of responses in a single transaction. Returns the number of items written."""
+
+        items = 0
+        connection.execute('BEGIN')
+        try:
+            for _, session_id, body in batch:
+                alternative = body['alternatives'][0] if body.get('alternatives') else {}
+                cursor = connection.execute(
+                    'INSERT INTO responses (session_id, response_id, type, service_type, language_code, '
+                    'start, "end", start_pts, start_epoch, transcript) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (session_id, body.get('id'), body.get('type'), body.get('service_type'), body.get('language_code'),
+                     body.get('start'), body.get('end'), body.get('start_pts'), body.get('start_epoch'),
+                     alternative.get('transcript', '')))
+                rowid = cursor.lastrowid
+                connection.execute('INSERT INTO responses_fts (rowid, transcript) VALUES (?, ?)',
+                                   (rowid, alternative.get('transcript', '')))
+                rows = [(rowid, item.get('kind'), item.get('value'), item.get('start'), item.get('end'), item.get('speaker_id'))
+                        for item in alternative.get('items', [])]
+                connection.executemany('INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)', rows)
+                items += len(rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return items
+
+
+@dataclass
+class SinkBenchmarkResult:
+    responses: int
+    items: int
+    seconds: float
+    responses_per_second: float
+    items_per_second: float
+    batches: int
+    dropped_responses: int
+
+
+def _synthetic_response(n: int, words_per_response: int) -> dict:
+    start = n * words_per_response * 0.5
+    items = [{'start': start + i * 0.5, 'end': start + i * 0.5 + 0.4, 'kind': 'text', 'value': f'word{(n * 7 + i) % 5000}',
+              'speaker_id': 's1'} for i in range(words_per_response)]
+    end = items[-1]['end']
+    return {'response': {'id': str(uuid.uuid4()), 'type': 'transcript', 'service_type': 'transcription',
+                         'language_code': 'en-US', 'is_final': True, 'is_end_of_stream': False,
+                         'start': start, 'end': end, 'start_pts': start, 'start_epoch': 1.7e9 + start,
+                         'alternatives': [{'transcript': ' '.join(item['value'] for item in items),
+                                           'start': start, 'end': end, 'items': items}]}}
+
+
+def benchmark(path: str, responses: int = 20000, words_per_response: int = 12, sessions: int = 4,
+              batch_size: int = SqliteSink.DEFAULT_BATCH_SIZE) -> SinkBenchmarkResult:
+    """
+    Measure the sustained insert rate of a SqliteSink: write `responses` final responses (interleaved between
+    `sessions` sessions) as fast as they're accepted, until all are committed.
+    """
+
+    prepared = [_synthetic_response(n, words_per_response) for n in range(responses)]
+    started_at = time.monotonic()
+    with SqliteSink(path, batch_size=batch_size, block=True) as sink:
+        for n, response in enumerate(prepared):
+            sink.write_response(response, session_id=f'session-{n % sessions}')
+    seconds = time.monotonic() - started_at
+
+    metrics = sink.metrics
+    return SinkBenchmarkResult(responses=metrics.written_responses,
+                               items=metrics.written_items,
+                               seconds=seconds,
+                               responses_per_second=metrics.written_responses / seconds,
+                               items_per_second=metrics.written_items / seconds,
+                               batches=metrics.batches,
+                               dropped_responses=metrics.dropped_responses)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the 'sink-benchmark' command's arguments to `parser`."""
+    parser.add_argument('--path', default=None, help='Database file to write (default: a temporary file)')
+    parser.add_argument('-n', '--responses', type=int, default=20000, help='Number of responses to write')
+    parser.add_argument('--words', type=int, default=12, help='Words per response')
+    parser.add_argument('--sessions', type=int, default=4, help='Number of sessions the responses are interleaved between')
+    parser.add_argument('--batch-size', type=int, default=SqliteSink.DEFAULT_BATCH_SIZE, help='Responses per transaction')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """The 'sink-benchmark' command."""
+
+    with tempfile.TemporaryDirectory(prefix='verbit_sqlite_sink_') as directory:
+        path = args.path or os.path.join(directory, 'benchmark.db')
+        result = benchmark(path, responses=args.responses, words_per_response=args.words,
+                           sessions=args.sessions, batch_size=args.batch_size)
+
+    if args.json:
+        print(json.dumps(asdict(result), indent=2))
+    else:
+        print(f'{result.responses} responses ({result.items} items) in {result.seconds:.2f}s, {result.batches} batches: '
+              f'{result.responses_per_second:.0f} responses/s, {result.items_per_second:.0f} items/s')
+    return 0
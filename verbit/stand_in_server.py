@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+import json
+import uuid
+import base64
+import socket
+import struct
+import typing
+import hashlib
+
+from threading import Thread, Lock, Event
+from urllib.parse import urlparse, parse_qs
+
+from websocket import ABNF, STATUS_NORMAL, WebSocketException, WebSocketProtocolException
+
+from verbit.ws_compression import PerMessageDeflate, DeflateFrameReader, accept_offer
+
+
+# see: https://datatracker.ietf.org/doc/html/rfc6455#section-1.3
+_WEBSOCKET_ACCEPT_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class StandInConnection:
+    """The server side of a single WebSocket connection accepted by a StandInServer."""
+
+    def __init__(self, sock: socket.socket, path: str, headers: typing.Dict[str, str], deflate: typing.Optional[PerMessageDeflate] = None):
+        self.sock = sock
+        self.path = path
+        self.headers = headers
+        self.deflate = deflate          # the negotiated compression, if any
+        self.query = {k: v[0] for k, v in parse_qs(urlparse(path).query).items()}
+        self.closed = False
+        self._send_lock = Lock()
+        self._close_sent = False
+
+    @property
+    def bytes_per_second(self) -> int:
+        """The media rate of this connection, as requested by the client's query string."""
+        return int(self.query.get('sample_rate', 16000)) * int(self.query.get('sample_width', 2)) * int(self.query.get('num_channels', 1))
+
+    def send_frame(self, opcode: int, data: bytes = b''):
+        # Note: server frames are not masked
+        with self._send_lock:
+            if self._close_sent:
+                return
+            if opcode == ABNF.OPCODE_CLOSE:
+                self._close_sent = True
+            if self.deflate is not None and opcode == ABNF.OPCODE_TEXT:
+                frame = ABNF(1, 1, 0, 0, opcode, 0, self.deflate.compress(data))
+            else:
+                frame = ABNF(1, 0, 0, 0, opcode, 0, data)
+            self.sock.sendall(frame.format())
+
+    def send_text(self, text: str):
+        self.send_frame(ABNF.OPCODE_TEXT, text.encode('utf-8'))
+
+    def send_response(self, response: dict):
+        self.send_text(json.dumps(response))
+
+    def send_close(self, code: int = STATUS_NORMAL, reason: str = ''):
+        """Start the closing handshake, the connection is closed when the client replies."""
+        self.send_frame(ABNF.OPCODE_CLOSE, struct.pack('!H', code) + reason.encode('utf-8'))
+
+    def abort(self):
+        """Close the connection's socket, with no closing handshake."""
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class StandInSession:
+    """
+    Server-side behavior of a StandInServer connection.
+    A session instance is created per accepted connection, and its callbacks are called from the connection's thread.
+    """
+
+    def on_open(self, connection: StandInConnection):
+        pass
+
+    def on_text(self, connection: StandInConnection, data: bytes):
+        pass
+
+    def on_binary(self, connection: StandInConnection, data: bytes):
+        pass
+
+    def on_close(self, connection: StandInConnection):
+        pass
+
+
+class TranscribingSession(StandInSession):
+    """
+    Simulates the speech recognition service: for each `response_interval_seconds` of received media,
+    a transcript response is sent, with a final response every `utterance_seconds`.
+    On an EOS event, a final response with 'is_end_of_stream' is sent, and the connection is closed.
+    """
+
+    def __init__(self, response_interval_seconds: float = 0.5, utterance_seconds: float = 3.0):
+        self._response_interval_seconds = response_interval_seconds
+        self._utterance_seconds = utterance_seconds
+        self._received_bytes = 0
+        self._responded_seconds = 0.0
+        self._utterance_start = 0.0
+        self._speaker_id = str(uuid.uuid4())
+
+    def on_binary(self, connection: StandInConnection, data: bytes):
+        self._received_bytes += len(data)
+        received_seconds = self._received_bytes / connection.bytes_per_second
+        while received_seconds - self._responded_seconds >= self._response_interval_seconds:
+            self._responded_seconds += self._response_interval_seconds
+            is_final = self._responded_seconds - self._utterance_start >= self._utterance_seconds
+            connection.send_response(self._response(self._responded_seconds, is_final=is_final))
+
+    def on_text(self, connection: StandInConnection, data: bytes):
+        event = json.loads(data.decode('utf-8')).get('event')
+        if event == 'EOS':
+            end = self._received_bytes / connection.bytes_per_second
+            connection.send_response(self._response(end, is_final=True, is_end_of_stream=True))
+            connection.send_close(STATUS_NORMAL)
+
+    def _response(self, end: float, is_final: bool, is_end_of_stream: bool = False) -> dict:
+        start = self._utterance_start
+        if is_final:
+            self._utterance_start = end
+
+        # a word every half second of the utterance
+        items = []
+        word_start = start
+        while word_start < end:
+            word_end = min(end, word_start + 0.5)
+            items.append(dict(start=round(word_start, 3), end=round(word_end, 3), kind='text',
+                              value=f'word{len(items)}', speaker_id=self._speaker_id))
+            word_start = word_end
+
+        return {
+            'response': {
+                'id': str(uuid.uuid4()),
+                'type': 'transcript',
+                'service_type': 'transcription',
+                'language_code': 'en',
+                'start': start,
+                'end': end,
+                'is_final': is_final,
+                'is_end_of_stream': is_end_of_stream,
+                'speakers': [{'id': self._speaker_id, 'label': None}],
+                'alternatives': [{
+                    'transcript': ' '.join(item['value'] for item in items),
+                    'start': start,
+                    'end': end,
+                    'items': items,
+                }],
+            }
+        }
+
+
+class StandInServer:
+    """
+    A local, plain-text WebSocket server standing in for the speech recognition service, for tests and benchmarks.
+    Connections are served by threads, with their behavior defined by a StandInSession (by default, a TranscribingSession).
+
+    Usage:
+        with StandInServer() as server:
+            responses = client.start_stream(ws_url=server.url, media_generator=media_generator)
+    """
+
+    def __init__(self,
+                 session_factory: typing.Callable[[], StandInSession] = TranscribingSession,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 compression: bool = False):
+        """
+        :param session_factory: a callable returning a new StandInSession, called for each accepted connection
+        :param host:            the address to listen on
+        :param port:            the port to listen on. if 0, a free port is picked
+        :param compression:     whether to accept permessage-deflate offers, compressing the text messages sent
+        """
+        self._session_factory = session_factory
+        self._compression = compression
+        self._listener = socket.create_server((host, port))
+        self._accept_thread = None
+        self._stopped = Event()
+        self._connections = []
+        self._connections_lock = Lock()
+        self.accepted = 0
+
+    @property
+    def address(self) -> typing.Tuple[str, int]:
+        return self._listener.getsockname()[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f'ws://{host}:{port}/ws'
+
+    def start(self) -> 'StandInServer':
+        self._accept_thread = Thread(target=self._accept_worker, name='stand_in_accept', daemon=True)
+        self._accept_thread.start()
+        return self
+
+    def stop(self):
+        """Stop accepting connections, and abort all open connections."""
+        self._stopped.set()
+
+        # Note: shutting the listener down wakes up the accept thread
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.abort()
+        if self._accept_thread is not None:
+            self._accept_thread.join()
+
+    def close_connections(self, code: int = STATUS_NORMAL, reason: str = ''):
+        """Start the closing handshake of all open connections, e.g. with STATUS_GOING_AWAY."""
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.send_close(code, reason)
+            except OSError:
+                pass
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *_exc_info):
+        self.stop()
+
+    def _accept_worker(self):
+        while not self._stopped.is_set():
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            Thread(target=self._connection_worker, args=(sock, ), name='stand_in_connection', daemon=True).start()
+
+    def _connection_worker(self, sock: socket.socket):
+        """Thread function serving a single connection: handshake, then frames until closed."""
+
+        try:
+            connection = self._handshake(sock, self._compression)
+        except (OSError, ValueError):
+            sock.close()
+            return
+
+        with self._connections_lock:
+            if self._stopped.is_set():
+                connection.abort()
+                return
+            self._connections.append(connection)
+            self.accepted += 1
+
+        session = self._session_factory()
+        try:
+            session.on_open(connection)
+            self._serve(connection, session)
+        except (OSError, WebSocketException):
+            pass
+        finally:
+            connection.closed = True
+            session.on_close(connection)
+            with self._connections_lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            sock.close()
+
+    @staticmethod
+    def _handshake(sock: socket.socket, compression: bool = False) -> StandInConnection:
+        request = b''
+        while b'\r\n\r\n' not in request:
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError('Connection closed during handshake')
+            request += data
+
+        request_line, *header_lines = request.split(b'\r\n\r\n')[0].decode('latin-1').split('\r\n')
+        _method, path, _version = request_line.split(' ')
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        key = headers.get('sec-websocket-key')
+        if key is None:
+            raise ValueError('Not a WebSocket upgrade request')
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_ACCEPT_GUID).encode('ascii')).digest()).decode('ascii')
+
+        extensions, deflate = '', None
+        accepted = accept_offer(headers.get('sec-websocket-extensions')) if compression else None
+        if accepted is not None:
+            extension, deflate = accepted
+            extensions = f'Sec-WebSocket-Extensions: {extension}\r\n'
+
+        sock.sendall(('HTTP/1.1 101 Switching Protocols\r\n'
+                      'Upgrade: websocket\r\n'
+                      'Connection: Upgrade\r\n'
+                      f'{extensions}'
+                      f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode('latin-1'))
+
+        return StandInConnection(sock, path, headers, deflate)
+
+    @staticmethod
+    def _serve(connection: StandInConnection, session: StandInSession):
+
+        def recv(bufsize: int) -> bytes:
+            data = connection.sock.recv(bufsize)
+            if not data:
+                raise ConnectionError('Connection closed by client')
+            return data
+
+        frames = DeflateFrameReader(recv, skip_utf8_validation=True)
+        while not connection.closed:
+            frame = frames.recv_frame()
+
+            # Note: clients don't fragment messages
+            if frame.rsv1:
+                if connection.deflate is None:
+                    raise WebSocketProtocolException('Unexpected RSV1 bit')
+                frame.data = connection.deflate.decompress(frame.data)
+            if frame.opcode == ABNF.OPCODE_TEXT:
+                session.on_text(connection, frame.data)
+            elif frame.opcode == ABNF.OPCODE_BINARY:
+                session.on_binary(connection, frame.data)
+            elif frame.opcode == ABNF.OPCODE_PING:
+                connection.send_frame(ABNF.OPCODE_PONG, frame.data)
+            elif frame.opcode == ABNF.OPCODE_CLOSE:
+                # reply to a close initiated by the client (a no-op, if the server initiated it)
+                connection.send_frame(ABNF.OPCODE_CLOSE, frame.data[:2])
+                return
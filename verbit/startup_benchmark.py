@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import typing
+import argparse
+import statistics
+import subprocess
+
+from threading import Thread
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# modules whose import dominates startup time, if imported
+HEAVY_MODULES = ('requests', 'numpy', 'tenacity', 'verbit.stand_in_server')
+
+# runs in a fresh interpreter: times the import, the first connection and the first response, of a streaming client
+_STARTUP_SCRIPT = '''
+import sys, json, time
+started_at = time.perf_counter()
+from verbit.streaming_client import WebSocketStreamingClient
+imported_at = time.perf_counter()
+
+ws_url, auth_endpoint, auth = sys.argv[1:4]
+client = WebSocketStreamingClient(customer_token='stand-in')
+client._auth_endpoint = auth_endpoint
+if auth == 'http.client':
+    from verbit.auth_transport import HttpClientAuth
+    client.auth_transport = HttpClientAuth()
+responses = client.start_stream(ws_url=ws_url, media_generator=iter([bytes(3200)] * 10))
+connected_at = time.perf_counter()
+next(responses)
+responded_at = time.perf_counter()
+for _ in responses:
+    pass
+
+print(json.dumps(dict(import_seconds=imported_at - started_at, connect_seconds=connected_at - imported_at,
+                      first_response_seconds=responded_at - started_at,
+                      modules=[name for name in sys.argv[4:] if name in sys.modules])))
+'''
+
+
+@dataclass
+class StartupBenchmarkResult:
+    auth: str                       # 'ad-hoc' (no auth request), 'requests' or 'http.client'
+    runs: int
+    import_seconds: float           # medians, over the runs
+    connect_seconds: float          # after the import, until connected (incl. auth)
+    first_response_seconds: float   # from the import's start
+    heavy_modules: typing.List[str]  # imported by the end of the stream (of HEAVY_MODULES)
+
+
+class _AuthHandler(BaseHTTPRequestHandler):
+    """A stand-in auth endpoint, with keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    PATH = '/api/v1/auth'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != self.PATH:
+            self.send_error(404)
+            return
+        body = json.dumps({'token': 'stand-in'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def benchmark(auth: str, runs: int = 5) -> StartupBenchmarkResult:
+    """
+    Start `runs` fresh interpreters, each importing the streaming client and streaming a second of media to a local
+    stand-in server, and measure their startup.
+
+    :param auth: 'ad-hoc' for ad-hoc connections (no auth request), or the auth transport: 'requests' or 'http.client'
+    """
+    from verbit.stand_in_server import StandInServer
+
+    if auth not in ('ad-hoc', 'requests', 'http.client'):
+        raise ValueError(f'Unknown auth: {auth}')
+
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_dir, env.get('PYTHONPATH')]))
+
+    auth_server = ThreadingHTTPServer(('127.0.0.1', 0), _AuthHandler)
+    Thread(target=auth_server.serve_forever, name='stand_in_auth', daemon=True).start()
+    auth_endpoint = f'http://127.0.0.1:{auth_server.server_address[1]}{_AuthHandler.PATH}'
+
+    measurements = []
+    try:
+        with StandInServer() as server:
+            # a session token in the URL requires an auth token
+            ws_url = server.url if auth == 'ad-hoc' else f'{server.url}?token=stand-in-session'
+            for _ in range(runs):
+                output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT, ws_url, auth_endpoint, auth, *HEAVY_MODULES],
+                                        env=env, capture_output=True, text=True, check=True).stdout
+                measurements.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        auth_server.shutdown()
+        auth_server.server_close()
+
+    def median(field: str) -> float:
+        return statistics.median(measurement[field] for measurement in measurements)
+
+    return StartupBenchmarkResult(auth=auth,
+                                  runs=runs,
+                                  import_seconds=median('import_seconds'),
+                                  connect_seconds=median('connect_seconds'),
+                                  first_response_seconds=median('first_response_seconds'),
+                                  heavy_modules=measurements[-1]['modules'])
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the 'startup-benchmark' command's arguments to `parser`."""
+    parser.add_argument('--auth', nargs='+', default=['ad-hoc', 'requests', 'http.client'], choices=['ad-hoc', 'requests', 'http.client'],
+                        help='Auth to benchmark: none (ad-hoc connections), or an auth transport')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start, per auth')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """The 'startup-benchmark' command."""
+
+    results = [benchmark(auth, args.runs) for auth in args.auth]
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        for result in results:
+            print(f'{result.auth:>11}: import {result.import_seconds * 1000:6.1f}ms, '
+                  f'connect {result.connect_seconds * 1000:6.1f}ms, '
+                  f'first response {result.first_response_seconds * 1000:6.1f}ms (medians of {result.runs} runs), '
+                  f"imported: {', '.join(result.heavy_modules) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    return 0
@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
 
 import json
+import time
 import random
+import select
 import string
 import socket
 import struct
 import typing
 import logging
-import requests
 
 from enum import IntFlag
-from dataclasses import dataclass
-from threading import Thread, Event
+from dataclasses import dataclass, replace
+from collections import deque
+from threading import Thread, Event, Lock, Condition, current_thread
 from urllib.parse import urlencode, urlparse, parse_qs
 
-import tenacity
-from tenacity import retry, wait_random, wait_random_exponential, stop_after_delay, stop_after_attempt
+from verbit.media_spool import MediaSpool
+from verbit.event_logging import LogEvent
+from verbit.transport import TransportConfig
+from verbit.adaptive_chunking import AdaptiveChunker
+from verbit.media_timeline import MediaTimeline, MediaChunk
+from verbit.connect_control import ConnectionGovernor, ConnectPriority
+from verbit.response_deduplicator import ResponseDeduplicator
+
 from websocket import (WebSocket,
                        WebSocketException, WebSocketBadStatusException, WebSocketConnectionClosedException,
                        ABNF, STATUS_NORMAL, STATUS_GOING_AWAY)
 
+# imported when used, for a fast import of this module (see: README.md, Startup time):
+# tenacity and requests (or an auth transport) when connecting, the features' modules when they're set
+if typing.TYPE_CHECKING:
+    from verbit.auth_transport import HttpClientAuth
+    from verbit.session_recorder import SessionRecorder
+    from verbit.silence_gate import SilenceGate
+    from verbit.tracing import TraceHooks
+    from verbit.ws_compression import DeflateConfig
+
 
 @dataclass
 class MediaConfig:
@@ -29,6 +46,130 @@ class MediaConfig:
     num_channels: int = 1
 
 
+@dataclass
+class FailoverMetrics:
+    failovers: int = 0                                  # number of failovers to the standby connection
+    last_failover_seconds: typing.Optional[float] = None    # from connection error, until media resumed on standby
+    max_failover_seconds: float = 0.0
+    standby_ready: bool = False                         # is a warmed-up standby connection available right now
+    standby_builds: int = 0                             # number of standby connections opened
+    standby_build_failures: int = 0                     # number of standby connections failed to open
+    standby_drops: int = 0                              # number of standby connections dropped while in standby
+    standby_last_seen: typing.Optional[float] = None    # time.monotonic() of last frame received over standby
+
+
+class _MediaPump:
+    """
+    Pulls media chunks from a media generator in a thread of its own, and hands them to media sender threads.
+    Since waiting for a chunk is interruptible (see: get()), a media sender can be stopped immediately,
+    even while the media generator is blocked (e.g. on a live capture device).
+    A single pump serves all media sender threads of a stream (across reconnections), so the generator is only ever
+    iterated by the pump's thread.
+    """
+
+    MAX_BUFFERED_CHUNKS = 16
+
+    def __init__(self, media_generator: typing.Iterator[bytes]):
+        self.media_generator = media_generator
+        self._condition = Condition()
+        self._chunks = deque()
+        self._finished = False
+        self._closed = False
+        self._error = None
+        self._thread = Thread(target=self._pump_worker, name='ws_media_pump', daemon=True)
+        self._thread.start()
+
+    def get(self, stop_event: Event) -> typing.Optional[bytes]:
+        """
+        Wait for the next media chunk, until `stop_event` is set (see: wake()).
+
+        :return: the next media chunk, or None if stopped or if the media stream finished
+        :raises: the media generator's exception, once all chunks before it were taken
+        """
+        with self._condition:
+            while not self._chunks and not self._finished and not stop_event.is_set():
+                self._condition.wait()
+            if stop_event.is_set():
+                return None
+            if self._chunks:
+                chunk = self._chunks.popleft()
+                self._condition.notify_all()
+                return chunk
+            if self._error is not None:
+                raise self._error
+            return None
+
+    def get_frame(self, stop_event: Event, frame_bytes: int) -> typing.Optional[bytes]:
+        """
+        Wait for `frame_bytes` of media, re-framed from the media generator's chunks (coalesced, or split),
+        until `stop_event` is set (see: wake()). Once the media stream finished, the last frame may be shorter.
+
+        :return: the next media frame, or None if stopped or if the media stream finished
+        :raises: the media generator's exception, once all chunks before it were taken
+        """
+        frame = bytearray()
+        pts = None
+        with self._condition:
+            while len(frame) < frame_bytes:
+                while not self._chunks and not self._finished and not stop_event.is_set():
+                    self._condition.wait()
+                if stop_event.is_set():
+                    if frame:
+                        self._chunks.appendleft(bytes(frame))
+                    return None
+                if not self._chunks:
+                    break
+                chunk = self._chunks.popleft()
+                missing = frame_bytes - len(frame)
+                if len(chunk) > missing:
+                    self._chunks.appendleft(chunk[missing:])
+                    chunk = chunk[:missing]
+                elif not frame:
+                    pts = getattr(chunk, 'pts', None)
+                frame += chunk
+                self._condition.notify_all()
+            if frame:
+                return MediaChunk(frame, pts) if pts is not None else bytes(frame)
+            if self._error is not None:
+                raise self._error
+            return None
+
+    def unget(self, chunk: bytes):
+        """Return a media chunk which was not sent, to be taken again first."""
+        with self._condition:
+            self._chunks.appendleft(chunk)
+            self._condition.notify_all()
+
+    def wake(self):
+        """Wake up waiting media senders, so that they notice their stop event."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop pulling media chunks (once the media generator yields its next chunk)."""
+        with self._condition:
+            self._closed = True
+            self._chunks.clear()
+            self._condition.notify_all()
+
+    def _pump_worker(self):
+        """Thread function pulling media chunks, up to MAX_BUFFERED_CHUNKS ahead of the media senders."""
+        try:
+            for chunk in self.media_generator:
+                with self._condition:
+                    while len(self._chunks) >= self.MAX_BUFFERED_CHUNKS and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                    self._chunks.append(chunk)
+                    self._condition.notify_all()
+        except Exception as ex:
+            self._error = ex
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+
 class ResponseType(IntFlag):
     Transcript = 1
     Captions = 2
@@ -75,6 +216,10 @@ class WebsocketStreamingClientSingleConnection:
 
         self._max_connection_retry_seconds = self.DEFAULT_CONNECT_TIMEOUT_SECONDS
 
+        # connect attempts coordination
+        self._connect_governor = None
+        self._connect_priority = ConnectPriority.Live
+
         # ASR config
         self._model_id = None
         self._language_code = None
@@ -82,26 +227,48 @@ class WebsocketStreamingClientSingleConnection:
         # auth
         self._customer_token = customer_token
         self._auth_endpoint = self.DEFAULT_AUTH_ENDPOINT
-        self._ws_auth_headers = None
+        self._auth_transport = None
 
         # WebSocket
         self._ws_client = None
         self._socket_timeout = None
+        self._compression = None
+        self._transport = None
         self._ping_event = Event()
         self._ping_sender_thread = None
+        self._last_ping = None
+
+        # media
+        self._adaptive_chunking = None
+        self._silence_gate = None
 
         # logger
         self._logger = None
         self.set_logger()
 
+        # wire-level session recording
+        self._session_recorder = None
+
+        # profiling and tracing
+        self._trace_hooks = None
+
         # media
+        self._media_pump = None
+        self._media_timeline = None
         self._media_sender_thread = None
-        self._stop_media_thread = False
+        self._media_stop_event = Event()
         self._media_stream_finished = False
+        self._media_switch_ws = None
+        self._media_switch_drain = True
+        self._media_switch_lock = Lock()
+        self._media_switched = Event()
 
         # error handling
         self._on_media_error = on_media_error or self._default_on_media_error
 
+        # lifecycle
+        self._closed = False
+
     # ========== #
     # Properties #
     # ========== #
@@ -117,6 +284,152 @@ class WebsocketStreamingClientSingleConnection:
     def max_connection_retry_seconds(self, val: float):
         self._max_connection_retry_seconds = val
 
+    @property
+    def connect_governor(self) -> typing.Optional[ConnectionGovernor]:
+        return self._connect_governor
+
+    @connect_governor.setter
+    def connect_governor(self, governor: typing.Optional[ConnectionGovernor]):
+        """
+        Sets a ConnectionGovernor, which rate-limits connect attempts and stops them while the service is failing.
+        Setting the same governor on all clients in a process (e.g. ConnectionGovernor.shared()) coordinates them.
+
+        Possible values:
+            None: Connect attempts are only retried by this client's own retry policy (the default)
+            ConnectionGovernor: Each connect attempt waits for the governor to admit it
+        """
+        self._connect_governor = governor
+
+    @property
+    def connect_priority(self) -> ConnectPriority:
+        return self._connect_priority
+
+    @connect_priority.setter
+    def connect_priority(self, priority: ConnectPriority):
+        """Sets the priority of this client's connect attempts, when waiting for the connect_governor."""
+        self._connect_priority = priority
+
+    @property
+    def auth_transport(self) -> typing.Optional['HttpClientAuth']:
+        return self._auth_transport
+
+    @auth_transport.setter
+    def auth_transport(self, transport: typing.Optional['HttpClientAuth']):
+        """
+        Sets how auth tokens are obtained, when connecting to an existing session (see: Ordering API).
+
+        Possible values:
+            None: Requested with the 'requests' library, which is imported on the first request (the default)
+            HttpClientAuth: Requested with the standard library's http.client, over a kept-alive connection
+        """
+        self._auth_transport = transport
+
+    @property
+    def session_recorder(self) -> typing.Optional['SessionRecorder']:
+        return self._session_recorder
+
+    @session_recorder.setter
+    def session_recorder(self, recorder: typing.Optional['SessionRecorder']):
+        """
+        Sets a SessionRecorder, which records every frame sent and received over the WebSocket to a binary log,
+        for reproducing a session with a SessionReplayer.
+
+        Possible values:
+            None: Frames are not recorded (the default)
+            SessionRecorder: Records frames of all connections of the session
+        """
+        self._session_recorder = recorder
+
+    @property
+    def trace_hooks(self) -> typing.Optional['TraceHooks']:
+        return self._trace_hooks
+
+    @trace_hooks.setter
+    def trace_hooks(self, hooks: typing.Optional['TraceHooks']):
+        """
+        Sets hooks invoked at the client's I/O boundaries (connect phases, each frame sent and received, each response
+        decoded and yielded, reconnections), for profiling and tracing a live session. Set it before start_stream().
+
+        Possible values:
+            None: No hooks are invoked (the default)
+            TraceHooks: e.g. a TimingSampler, or OpenTelemetryHooks (see: verbit.tracing)
+        """
+        self._trace_hooks = hooks
+
+    @property
+    def compression(self) -> typing.Optional['DeflateConfig']:
+        return self._compression
+
+    @compression.setter
+    def compression(self, config: typing.Optional['DeflateConfig']):
+        """
+        Sets the permessage-deflate compression (RFC 7692) to offer when connecting, which mostly reduces the
+        downstream bandwidth of responses. If the server declines it, messages are sent and received uncompressed.
+        Applies to connections opened after it's set.
+
+        Possible values:
+            None: Compression is not offered (the default)
+            DeflateConfig: Compression is offered, with context takeover and window sizes per direction as configured
+        """
+        self._compression = config
+
+    @property
+    def transport(self) -> typing.Optional[TransportConfig]:
+        return self._transport
+
+    @transport.setter
+    def transport(self, config: typing.Optional[TransportConfig]):
+        """
+        Sets TCP-level options of the WebSocket's socket (e.g. TransportConfig.low_latency()).
+        Applies to connections opened after it's set.
+
+        Possible values:
+            None: The websocket-client library's and OS defaults (the default)
+            TransportConfig: Options set in the config override the defaults
+        """
+        self._transport = config
+
+    @property
+    def media_timeline(self) -> typing.Optional[MediaTimeline]:
+        """
+        The record of media sent by the media sender (None, before a media generator was streamed): it maps
+        response times to the stream's media offset, local send time and source PTS (see: MediaTimeline.locate()).
+        """
+        return self._media_timeline
+
+    @property
+    def adaptive_chunking(self) -> typing.Optional[AdaptiveChunker]:
+        return self._adaptive_chunking
+
+    @adaptive_chunking.setter
+    def adaptive_chunking(self, chunker: typing.Optional[AdaptiveChunker]):
+        """
+        Sets runtime tuning of the size of sent media frames, by the measured latency of responses (and ping RTT).
+        Media chunks of the media generator are then coalesced or split into sample-aligned frames of the tuned size.
+        Set it before start_stream().
+
+        Possible values:
+            None: Media chunks are sent as yielded by the media generator (the default)
+            AdaptiveChunker: Media frames are sized within the chunker's bounds, see: AdaptiveChunker.metrics
+        """
+        self._adaptive_chunking = chunker
+
+    @property
+    def silence_gate(self) -> typing.Optional['SilenceGate']:
+        return self._silence_gate
+
+    @silence_gate.setter
+    def silence_gate(self, gate: typing.Optional['SilenceGate']):
+        """
+        Sets suppression of long silent stretches of media, so that they aren't sent (only for 16-bit PCM media).
+        The times of responses are restored to those of the stream, see: media_timeline. Set it before start_stream().
+
+        Possible values:
+            None: All media is sent (the default)
+            SilenceGate: Silence is suppressed as configured, see: SilenceGate.metrics for the bytes saved
+        """
+        self._silence_gate = gate
+
     @property
     def socket_timeout(self) -> typing.Optional[float]:
         return self._socket_timeout
@@ -184,11 +497,17 @@ class WebsocketStreamingClientSingleConnection:
         self._media_stream_finished = True
         self.send_event(event=self.EVENT_EOS)
 
-    def set_logger(self, logger: logging.Logger = None):
+    def set_logger(self, logger: typing.Union[logging.Logger, logging.LoggerAdapter] = None):
         """
         Set the streaming client logger object to an external logging.Logger
+        By default, an INFO-level logger named after the client's class, which logs to the console
+        (unless the application configured logging handlers).
 
-        :param logger: the external logger to use as the streaming client's logger
+        Frequent events (e.g. pings) are logged at DEBUG level, which is checked once per connection:
+        a logger's level set to DEBUG mid-connection applies from the next connection.
+
+        :param logger: the external logger to use as the streaming client's logger,
+                       or an EventLogger for structured logging (see: verbit.event_logging)
         :return:
         """
 
@@ -197,23 +516,58 @@ class WebsocketStreamingClientSingleConnection:
 
             # create logger
             logger = logging.getLogger(self.__class__.__name__)
-            logger.setLevel(logging.DEBUG)
+            logger.setLevel(logging.INFO)
+
+            # log to the console, unless logging was configured by the application (the root logger is left as it is)
+            if not logger.hasHandlers():
 
-            # create console handler and set level to debug
-            ch = logging.StreamHandler()
-            ch.setLevel(logging.DEBUG)
+                # create console handler
+                ch = logging.StreamHandler()
 
-            # create formatter
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+                # create formatter
+                formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-            # add formatter to ch
-            ch.setFormatter(formatter)
+                # add formatter to ch
+                ch.setFormatter(formatter)
 
-            # add ch to logger
-            logging.basicConfig(handlers=[ch])
+                # add ch to logger
+                logger.addHandler(ch)
 
         self._logger = logger
 
+    def close(self):
+        """
+        Stop all threads of the client and close the WebSocket, without waiting for the server.
+        A media generator which is blocked is no longer iterated, once it yields its next chunk.
+        """
+        self._closed = True
+
+        # stop media sending
+        self._stop_media_sender_thread()
+        if self._media_pump is not None:
+            self._media_pump.close()
+
+        # stop ping sending
+        self._ping_event.set()
+        if self._ping_sender_thread is not None and self._ping_sender_thread is not current_thread():
+            self._ping_sender_thread.join()
+
+        # close WebSocket
+        ws_client = self._ws_client
+        if ws_client is not None and ws_client.connected:
+            self._logger.info('Closing WebSocket')
+            try:
+                ws_client.send_close(STATUS_NORMAL)
+            except self.CONNECTION_EXCEPTION_CLASSES:
+                pass
+        self._abort_ws(ws_client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.close()
+
     # ======== #
     # Internal #
     # ======== #
@@ -237,40 +591,86 @@ class WebsocketStreamingClientSingleConnection:
 
         # use default media config if not provided
         media_config = media_config or MediaConfig()
+        self._media_config = media_config
         self._response_types = response_types
 
+        if self._closed:
+            raise RuntimeError('Streaming client is closed!')
+
         # protect against connecting after media stream finished
         if self._media_stream_finished:
             raise RuntimeError('Media stream already finished! Will not connect to WebSocket as server will not return any responses.')
 
         # get websocket headers
-        self._ws_auth_headers = self._get_ws_connect_headers(ws_url)
+        headers = self._get_ws_connect_headers(ws_url)
 
         # connect to WebSocket
-        self._connect_websocket(ws_url, media_config=media_config, response_types=response_types)
+        self._ws_client = self._connect_websocket(ws_url, media_config=media_config, response_types=response_types, headers=headers)
 
         # start media sender thread
         if media_generator is not None:
-            self._media_sender_thread = Thread(
-                target=self._media_sender_worker,
-                args=(media_generator, ),
-                name='ws_media_sender')
-            self._stop_media_thread = False
-            self._media_sender_thread.start()
+            self._start_media_sender_thread(media_generator)
 
         # start ping sender thread
         if self.AUTO_PING_INTERVAL_SECONDS > 0:
-            self._ping_sender_thread = Thread(
-                target=self._ping_sender_worker,
-                name='ws_ping_sender',
-                daemon=True)
-            self._ping_event.clear()
-            self._ping_sender_thread.start()
+            self._start_ping_sender_thread()
 
         # return response generator
-        return self._response_generator()
+        return self._response_generator(self._ws_client)
+
+    def _start_media_sender_thread(self, media_generator: typing.Iterator[bytes]):
+
+        # a stream's media generator is pulled by a single pump, shared by its media sender threads
+        if self._media_pump is None or self._media_pump.media_generator is not media_generator:
+            if self._media_pump is not None:
+                self._media_pump.close()
+            self._media_pump = _MediaPump(media_generator)
+            media_config = self._media_config or MediaConfig()
+            self._media_timeline = MediaTimeline(media_config.sample_rate * media_config.sample_width * media_config.num_channels)
+            if self._silence_gate is not None:
+                self._silence_gate.configure(media_config.sample_rate, media_config.sample_width, media_config.num_channels)
+
+        # each media sender thread has its own stop event, so stopping it never affects the next one
+        self._media_stop_event = Event()
+        self._media_sender_thread = Thread(
+            target=self._media_sender_worker,
+            args=(self._media_pump, self._media_stop_event),
+            name='ws_media_sender')
+        self._media_sender_thread.start()
+
+    def _signal_media_sender_stop(self):
+        """Request the media sender thread to stop, interrupting its wait for the next media chunk."""
+        self._media_stop_event.set()
+        if self._media_pump is not None:
+            self._media_pump.wake()
+
+    def _stop_media_sender_thread(self, timeout: typing.Optional[float] = None):
+        """Stop the media sender thread, and wait for it to finish (unless called from it)."""
+
+        self._signal_media_sender_stop()
+
+        media_thread = self._media_sender_thread
+        if media_thread is None or media_thread is current_thread():
+            return
 
-    def _connect_websocket(self, ws_url: str, media_config: MediaConfig, response_types: ResponseType):
+        media_thread.join(timeout)
+        if media_thread.is_alive():
+            self._logger.warning(f'{media_thread.name} did not stop within {timeout=} seconds')
+
+    def _start_ping_sender_thread(self):
+        self._ping_sender_thread = Thread(
+            target=self._ping_sender_worker,
+            name='ws_ping_sender',
+            daemon=True)
+        self._ping_event.clear()
+        self._ping_sender_thread.start()
+
+    def _connect_websocket(self,
+                           ws_url: str,
+                           media_config: MediaConfig,
+                           response_types: ResponseType,
+                           headers: dict,
+                           address_factory: typing.Optional[typing.Callable[[], typing.Optional[str]]] = None) -> WebSocket:
         """
         Connect to the URL returned by
             self.ws_url
@@ -289,13 +689,31 @@ class WebsocketStreamingClientSingleConnection:
         :param ws_url: websocket url to use, as obtained from the Ordering API.
         :param media_config:    a MediaConfig dataclass which describes the media format sent by the client
         :param response_types: a bitmask Flag denoting which response type(s) should be returned by the server
+        :param headers: the headers of the handshake request (e.g. authentication), see: _get_ws_connect_headers()
+        :param address_factory: an optional callable returning an IP address of the WebSocket's host to connect to, per attempt.
+                                if omitted (or if it returns None), the WebSocket's host is resolved and connected to.
+
+        :return: a connected WebSocket instance
         """
+        import tenacity
+        from tenacity import retry, wait_random_exponential, stop_after_delay
 
         # build WebSocket url
         ws_url += self._get_ws_connect_query_string(ws_url=ws_url, media_config=media_config, response_types=response_types)
 
         # create WebSocket instance
-        self._ws_client = WebSocket(enable_multithread=True)
+        ws_options = dict(enable_multithread=True)
+        if self._transport is not None:
+            ws_options['sockopt'] = self._transport.socket_options()
+        parsed_ws_url = urlparse(ws_url)
+        if address_factory is not None:
+            # an address connected to is verified (and its TLS server name indicated) as the URL's host
+            ws_options['sslopt'] = dict(server_hostname=parsed_ws_url.hostname)
+        if self._compression is not None:
+            from verbit.ws_compression import DeflateWebSocket
+            ws_client = DeflateWebSocket(self._compression, **ws_options)
+        else:
+            ws_client = WebSocket(**ws_options)
 
         # set WebSocket client timeout
         # Note: this is the maximum time before
@@ -303,7 +721,7 @@ class WebsocketStreamingClientSingleConnection:
         # and attempting to open a new one.
         # eventually sets: https://docs.python.org/3/library/socket.html#socket.socket.settimeout
         # Setting a None value is ok, it will set the system-OS-level default
-        self._ws_client.timeout = self.socket_timeout
+        ws_client.timeout = self.socket_timeout
 
         def _should_retry_http_error(retry_ex: WebSocketBadStatusException):
 
@@ -348,24 +766,87 @@ class WebsocketStreamingClientSingleConnection:
             elif isinstance(outcome_ex, self.CONNECTION_EXCEPTION_CLASSES):
                 should_retry = True
 
-            self._logger.warning(f'Error while connecting WebSocket: {repr(outcome_ex)}, {should_retry=}')
+            self._logger.warning(LogEvent('connect_error', 'Error while connecting WebSocket: {error!r}, should_retry={should_retry}',
+                                          error=outcome_ex, should_retry=should_retry))
 
             return should_retry
 
+        def _is_service_failure(ex: Exception):
+            """Whether a connect error signals that the service (or the network) is failing."""
+            if isinstance(ex, WebSocketBadStatusException):
+                return ex.status_code in self.RETRY_HTTP_CLIENT_CODES or ex.status_code in range(500, 600)
+            return isinstance(ex, self.CONNECTION_EXCEPTION_CLASSES)
+
         @retry(wait=wait_random_exponential(multiplier=0.5),
                stop=stop_after_delay(self.max_connection_retry_seconds),
                retry=retry_predicate)
         def connect_and_retry():
+
+            # wait for the connect attempt to be admitted
+            # Note: being throttled raises a ConnectionError, which is retried as well
+            governor = self._connect_governor
+            if governor is not None:
+                if hooks is not None:
+                    started_at = time.perf_counter()
+                    try:
+                        governor.acquire(self._connect_priority, timeout=max(0.0, connect_deadline - time.monotonic()))
+                    except Exception as ex:
+                        hooks.on_connect_phase('admission', started_at, time.perf_counter() - started_at, ex)
+                        raise
+                    hooks.on_connect_phase('admission', started_at, time.perf_counter() - started_at)
+                else:
+                    governor.acquire(self._connect_priority, timeout=max(0.0, connect_deadline - time.monotonic()))
+
             self._logger.info(f'Connecting to WebSocket at {ws_url}')
-            self._ws_client.connect(ws_url, header=self._ws_auth_headers)
+            connect_url, connect_options = ws_url, dict(header=headers)
+            started_at = time.perf_counter() if hooks is not None else 0.0
+            try:
+                address = address_factory() if address_factory is not None else None
+                if address is not None:
+                    connect_url, connect_options['host'], connect_options['origin'] = self._pin_address(parsed_ws_url, address)
+                ws_client.connect(connect_url, **connect_options)
+
+                # Note: set after connecting, since it depends on the address family of the resolved host
+                if self._transport is not None and ws_client.sock is not None:
+                    self._transport.apply_tos(ws_client.sock)
+
+            # report the attempt's result
+            except Exception as ex:
+                if hooks is not None:
+                    hooks.on_connect_phase('handshake', started_at, time.perf_counter() - started_at, ex)
+                if governor is not None:
+                    if _is_service_failure(ex):
+                        governor.record_failure()
+                    else:
+                        governor.record_success()
+                raise
+            if hooks is not None:
+                hooks.on_connect_phase('handshake', started_at, time.perf_counter() - started_at)
+            if governor is not None:
+                governor.record_success()
+
+            if self._session_recorder is not None:
+                from verbit.session_recorder import Direction
+                self._session_recorder.record(ws_client, Direction.Opened, ABNF.OPCODE_CONT)
+
             self._logger.info('WebSocket connected!')
+            if self._compression is not None:
+                self._logger.info(f'Compression: {ws_client.deflate or "declined by the server"}')
 
         # try opening WebSocket connection
+        hooks = self._trace_hooks
+        connect_started_at = time.perf_counter() if hooks is not None else 0.0
+        connect_deadline = time.monotonic() + self.max_connection_retry_seconds
         try:
             connect_and_retry()
+            if hooks is not None:
+                hooks.on_connect_phase('total', connect_started_at, time.perf_counter() - connect_started_at)
+            return ws_client
 
         # catch and log retry errors
         except tenacity.RetryError as retry_err:
+            if hooks is not None:
+                hooks.on_connect_phase('total', connect_started_at, time.perf_counter() - connect_started_at, retry_err)
             statistics = connect_and_retry.retry.statistics
             last_exception = retry_err.last_attempt.exception()
             self._logger.error(f'Error while connecting WebSocket! Exceeded maximum retries and giving up.\n'
@@ -377,6 +858,8 @@ class WebsocketStreamingClientSingleConnection:
 
         # catch and log all other exceptions
         except Exception as ex:
+            if hooks is not None:
+                hooks.on_connect_phase('total', connect_started_at, time.perf_counter() - connect_started_at, ex)
             self._log_exception('Error while connecting WebSocket', ex)
             raise
 
@@ -387,21 +870,29 @@ class WebsocketStreamingClientSingleConnection:
     def _default_on_media_error(self, err: Exception):
         self._log_exception('Exception on media thread', err)
 
-    def _send_event(self, event: str, payload: dict = None):
+    def _send_event(self, event: str, payload: dict = None, ws_client: typing.Optional[WebSocket] = None):
 
         # use default payload if not provided
         payload = payload or dict()
 
+        # use current WebSocket if not provided
+        ws_client = ws_client or self._ws_client
+
         # prepare message dict
         msg = dict(event=event, payload=payload)
 
         # serialize as json
         msg_json = json.dumps(msg)
 
-        self._logger.debug(f'Sending event: {event=}, {msg=}')
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(LogEvent('event_sent', 'Sending event: event={event!r}, msg={msg!r}', event=event, msg=msg))
 
         # send to server
-        self._ws_client.send(msg_json)
+        ws_client.send(msg_json)
+
+        if self._session_recorder is not None:
+            from verbit.session_recorder import Direction
+            self._session_recorder.record(ws_client, Direction.Sent, ABNF.OPCODE_TEXT, msg_json)
 
     def _ping_sender_worker(self):
 
@@ -412,31 +903,94 @@ class WebsocketStreamingClientSingleConnection:
         while not self._ping_event.wait(self.AUTO_PING_INTERVAL_SECONDS):
             try:
                 if self._ws_client.connected:
-                    self._ws_client.ping(_random_payload())
+                    payload = _random_payload()
+                    self._last_ping = (payload.encode('utf-8'), time.monotonic())
+                    self._ws_client.ping(payload)
             except Exception as ex:
-                self._logger.warning(f'Error sending ping: {ex}')
+                self._logger.warning(LogEvent('ping_error', 'Error sending ping: {error}', error=ex))
 
-    def _media_sender_worker(self, media_generator: typing.Iterator[bytes]):
-        """Thread function for emitting media from a user-given generator."""
+    def _media_sender_worker(self, media_pump: _MediaPump, stop_event: Event):
+        """Thread function for emitting media from a user-given generator (pulled by `media_pump`)."""
 
         try:
 
             # capture WebSocket, so that connect changes in other threads do not affect this loop
             ws_client = self._ws_client
-
-            # iterate media generator
-            for chunk in media_generator:
-
-                # emit media chunk
-                ws_client.send_binary(chunk)
-
-                # if stop requested
-                if self._stop_media_thread:
-
-                    # stop before consuming next media chunk
+            timeline = self._media_timeline
+            timeline.start_connection(ws_client)
+
+            # number of bytes in a single sample frame (one sample of each channel)
+            frame_size = self._media_config.sample_width * self._media_config.num_channels
+            bytes_per_second = self._media_config.sample_rate * frame_size
+            sent_bytes = 0
+
+            chunker = self._adaptive_chunking
+            gate = self._silence_gate
+            hooks = self._trace_hooks
+
+            def emit(segments: typing.List[typing.Tuple[bytes, bool]], pts: typing.Optional[float], pts_offset: int) -> int:
+                """Send the media segments to send, and skip the suppressed ones. Returns the number of bytes sent."""
+                emitted = 0
+                for index, (data, is_sent) in enumerate(segments):
+                    if not is_sent:
+                        timeline.skip(len(data))
+                        continue
+                    sent_at = time.monotonic()
+                    started_at = time.perf_counter() if hooks is not None else 0.0
+                    try:
+                        ws_client.send_binary(data)
+                    except Exception:
+
+                        # the media is sent again by the next media sender (e.g. after reconnection)
+                        unsent = b''.join(segment for segment, _ in segments[index:])
+                        media_pump.unget(unsent + gate.take_held() if gate is not None else unsent)
+                        raise
+                    if self._session_recorder is not None:
+                        from verbit.session_recorder import Direction
+                        self._session_recorder.record(ws_client, Direction.Sent, ABNF.OPCODE_BINARY, data)
+                    if hooks is not None:
+                        hooks.on_frame_sent(len(data), started_at, time.perf_counter() - started_at)
+                    emitted += len(data)
+                    timeline.record(len(data), sent_at, pts + (timeline.stream_bytes - pts_offset) / bytes_per_second if pts is not None else None)
+                    if chunker is not None:
+                        chunker.on_frame_sent(sent_at, time.monotonic() - sent_at)
+                return emitted
+
+            while True:
+
+                # wait for the next media chunk (or for a stop request)
+                if chunker is not None:
+                    chunk = media_pump.get_frame(stop_event, chunker.frame_bytes(bytes_per_second, frame_size))
+                else:
+                    chunk = media_pump.get(stop_event)
+                if stop_event.is_set():
+                    if chunk is not None:
+                        media_pump.unget(chunk)
                     self._logger.debug(f'Stopping media sender')
                     return
 
+                # media stream finished: emit the media held by the silence gate
+                if chunk is None:
+                    if gate is not None:
+                        emit(gate.flush(), None, 0)
+                    break
+
+                # switch to another WebSocket if requested (see: _request_media_switch())
+                if self._media_switch_ws is not None:
+                    chunk = self._switch_media_ws(ws_client, chunk, misaligned_bytes=sent_bytes % frame_size)
+                    ws_client = self._ws_client
+                    sent_bytes = 0
+                    timeline.start_connection(ws_client)
+
+                # emit media chunk (through the silence gate, if any)
+                pts_offset = timeline.stream_bytes
+                if gate is not None:
+                    pts_offset += gate.held_bytes
+                    segments = gate.process(chunk)
+                else:
+                    segments = [(chunk, True)]
+                sent_bytes += emit(segments, getattr(chunk, 'pts', None), pts_offset)
+
             self._logger.debug(f'Finished sending media')
 
             # signal end of stream
@@ -447,21 +1001,106 @@ class WebsocketStreamingClientSingleConnection:
         except Exception as err:
             self._on_media_error(err)
 
-    def _response_generator(self) -> typing.Iterator[typing.Dict]:
+    def _request_media_switch(self, ws_client: WebSocket, drain: bool = True):
+        """
+        Request the media sender thread to continue sending media over another (already connected) WebSocket.
+        The switch is performed by the media sender thread itself, before sending its next media chunk.
+
+        :param ws_client: a connected WebSocket to switch media sending to
+        :param drain:     whether to end the media stream of the current WebSocket (which should still be usable)
+        """
+        with self._media_switch_lock:
+            self._media_switched.clear()
+            self._media_switch_drain = drain
+            self._media_switch_ws = ws_client
+
+    def _switch_media_ws(self, ws_client: WebSocket, chunk: bytes, misaligned_bytes: int) -> bytes:
+        """
+        Switch media sending from `ws_client` to the requested WebSocket, on a sample-aligned boundary.
+        When draining, the last partial sample frame (if any) is completed over `ws_client`, followed by an EOS event,
+        so that the server finalizes all responses of the old connection.
+
+        :param ws_client:           the WebSocket which media was sent over so far
+        :param chunk:               the next media chunk to send
+        :param misaligned_bytes:    number of bytes of the last sample frame already sent over `ws_client`
+
+        :return: the (remainder of the) media chunk to send over the new WebSocket
+        """
+
+        with self._media_switch_lock:
+
+            # switch request was withdrawn in the meantime
+            if self._media_switch_ws is None:
+                return chunk
+
+            if self._media_switch_drain:
+
+                # complete the partial sample frame over the old connection
+                if misaligned_bytes:
+                    frame_size = self._media_config.sample_width * self._media_config.num_channels
+                    head_size = frame_size - misaligned_bytes
+                    sent_at = time.monotonic()
+                    started_at = time.perf_counter()
+                    ws_client.send_binary(chunk[:head_size])
+                    if self._session_recorder is not None:
+                        from verbit.session_recorder import Direction
+                        self._session_recorder.record(ws_client, Direction.Sent, ABNF.OPCODE_BINARY, chunk[:head_size])
+                    if self._trace_hooks is not None:
+                        self._trace_hooks.on_frame_sent(head_size, started_at, time.perf_counter() - started_at)
+                    self._media_timeline.record(head_size, sent_at, getattr(chunk, 'pts', None))
+                    chunk = chunk[head_size:]
+
+                # signal the old connection that its part of the media stream ended
+                self._send_event(self.EVENT_EOS, ws_client=ws_client)
+
+            # switch
+            self._ws_client, self._media_switch_ws = self._media_switch_ws, None
+            self._media_switched.set()
+            self._logger.info('Media sender switched WebSocket')
+
+        return chunk
+
+    def _withdraw_media_switch(self) -> typing.Optional[WebSocket]:
+        """
+        Withdraw a media switch request which was not performed (yet).
+
+        :return: the WebSocket which media sending was requested to switch to, or None if already switched
+        """
+        with self._media_switch_lock:
+            ws_client, self._media_switch_ws = self._media_switch_ws, None
+        return ws_client
+
+    def _discard_media_switch(self):
+        """Close a WebSocket which media sending was requested to switch to, but never did."""
+        ws_client = self._withdraw_media_switch()
+        if ws_client is not None:
+            self._logger.debug('Discarding pending media switch')
+            ws_client.close(STATUS_NORMAL)
+
+    def _response_generator(self, ws_client: typing.Optional[WebSocket] = None) -> typing.Iterator[typing.Dict]:
         """
         Generator function for iterating responses.
 
         For available response structures, see: https://verbit.co/api_docs/index.html
         For a description of ABNF opcodes, see: https://datatracker.ietf.org/doc/html/rfc6455#section-5.2
+
+        :param ws_client: the WebSocket to receive responses from. if omitted, the current WebSocket is used.
         """
 
+        # capture WebSocket, so that connection switches in other threads do not affect this loop
+        ws_client = ws_client or self._ws_client
+
         # WebSocket should already be connected at this point, see: _connect_and_start()
-        if self._ws_client is None or not self._ws_client.connected:
+        if ws_client is None or not ws_client.connected:
             raise RuntimeError('WebSocket client is disconnected!')
 
         # init closing flag
         should_stop = False
 
+        # checked once, not per frame (see: set_logger())
+        is_debug = self._logger.isEnabledFor(logging.DEBUG)
+        hooks = self._trace_hooks
+
         try:
 
             self._logger.debug('Waiting for responses ...')
@@ -470,16 +1109,37 @@ class WebsocketStreamingClientSingleConnection:
             while not should_stop:
 
                 # read data from WebSocket
-                opcode, data = self._ws_client.recv_data(control_frame=True)
+                started_at = time.perf_counter() if hooks is not None else 0.0
+                opcode, data = ws_client.recv_data(control_frame=True)
+                if hooks is not None:
+                    hooks.on_frame_received(opcode, len(data), started_at, time.perf_counter() - started_at)
+                if self._session_recorder is not None:
+                    from verbit.session_recorder import Direction
+                    self._session_recorder.record(ws_client, Direction.Received, opcode, data)
 
                 # message is text
                 if opcode == ABNF.OPCODE_TEXT:
 
                     # parse from json
+                    started_at = time.perf_counter() if hooks is not None else 0.0
                     resp = json.loads(data.decode('utf-8'))
+                    if self._adaptive_chunking is not None and self._media_timeline is not None:
+                        position = self._media_timeline.locate_response(resp, connection=ws_client)
+                        if position is not None:
+                            self._adaptive_chunking.on_response(position.sent_at, time.monotonic())
+
+                    # restore the times of responses to those of the stream, once silence was suppressed
+                    if self._silence_gate is not None and self._media_timeline is not None:
+                        self._media_timeline.restore_times(resp, connection=ws_client)
 
                     # response is ready
-                    yield resp
+                    if hooks is not None:
+                        yielded_at = time.perf_counter()
+                        hooks.on_response_decoded(len(data), started_at, yielded_at - started_at)
+                        yield resp
+                        hooks.on_response_yielded(yielded_at, time.perf_counter() - yielded_at)
+                    else:
+                        yield resp
 
                 # message is close signal
                 elif opcode == ABNF.OPCODE_CLOSE:
@@ -499,18 +1159,29 @@ class WebsocketStreamingClientSingleConnection:
                 # If PONG responses are not sent to server, and no messages are exchanged,
                 # the connection will automatically time out after the time period specified by self.socket_timeout.
                 elif opcode == ABNF.OPCODE_PING:
-                    self._logger.debug(f'Received Ping with payload: {data}')
+                    if is_debug:
+                        self._logger.debug(LogEvent('ping_received', 'Received Ping with payload: {payload}', payload=data))
 
                 elif opcode == ABNF.OPCODE_PONG:
-                    self._logger.debug(f'Received Pong with payload: {data}')
+                    if is_debug:
+                        self._logger.debug(LogEvent('pong_received', 'Received Pong with payload: {payload}', payload=data))
+                    last_ping = self._last_ping
+                    if self._adaptive_chunking is not None and last_ping is not None and last_ping[0] == data:
+                        self._adaptive_chunking.on_rtt(time.monotonic() - last_ping[1])
 
                 else:
 
                     # future server versions might use more opcodes
-                    self._logger.warning(f'Unexpected WebSocket response: OPCODE={opcode}')
+                    self._logger.warning(LogEvent('unexpected_opcode', 'Unexpected WebSocket response: OPCODE={opcode}', opcode=opcode))
 
         # catch connection errors (and don't try closing connection)
         except self.CONNECTION_EXCEPTION_CLASSES as connection_error:
+
+            # the client was closed while receiving
+            if self._closed:
+                self._logger.debug('Streaming client closed while generating responses')
+                return
+
             self._log_exception('Connection error while generating responses', connection_error)
 
             # raise further so that exception can be handled
@@ -521,7 +1192,7 @@ class WebsocketStreamingClientSingleConnection:
             self._log_exception('Error while generating responses', ex)
 
             # try to close WebSocket connection
-            self._close_ws()
+            self._close_ws(ws_client)
 
             # raise further so that exception can be handled
             raise
@@ -530,16 +1201,32 @@ class WebsocketStreamingClientSingleConnection:
         else:
 
             # try to close WebSocket connection
-            self._close_ws()
+            self._close_ws(ws_client)
 
-    def _close_ws(self):
+    def _close_ws(self, ws_client: typing.Optional[WebSocket] = None):
         """Close WebSocket if still connected."""
-        # stop media thread
-        self._stop_media_thread = True
 
-        if self._ws_client.connected:
+        # use current WebSocket if not provided
+        ws_client = ws_client or self._ws_client
+
+        # stop media thread, unless it already switched to another WebSocket
+        if ws_client is self._ws_client:
+            self._signal_media_sender_stop()
+
+        if ws_client.connected:
             self._logger.info(f'Closing WebSocket')
-            self._ws_client.close(STATUS_NORMAL)
+            ws_client.close(STATUS_NORMAL)
+
+    @staticmethod
+    def _abort_ws(ws_client: typing.Optional[WebSocket]):
+        """Shut down the WebSocket's socket, interrupting any blocked sends and receives."""
+        if ws_client is None or ws_client.sock is None:
+            return
+        try:
+            ws_client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        ws_client.shutdown()
 
     def _handle_socket_close(self, data):
         """
@@ -570,7 +1257,18 @@ class WebsocketStreamingClientSingleConnection:
             self._log_exception(f'WebSocket closed with invalid payload. Data={data}', ex)
 
     def _get_ws_connect_headers(self, ws_url: str) -> dict:
-        return {**self._get_ws_auth_info(ws_url)}
+        hooks = self._trace_hooks
+        if hooks is None:
+            return {**self._get_ws_auth_info(ws_url)}
+
+        started_at = time.perf_counter()
+        try:
+            headers = {**self._get_ws_auth_info(ws_url)}
+        except Exception as ex:
+            hooks.on_connect_phase('auth', started_at, time.perf_counter() - started_at, ex)
+            raise
+        hooks.on_connect_phase('auth', started_at, time.perf_counter() - started_at)
+        return headers
 
     @staticmethod
     def _get_ws_connect_query_string(ws_url: str, media_config: MediaConfig, response_types: ResponseType) -> str:
@@ -626,15 +1324,53 @@ class WebsocketStreamingClientSingleConnection:
 
         return {'Authorization': f'Bearer {auth_token}'}
 
-    @retry(reraise=True, stop=stop_after_attempt(5), wait=wait_random(min=0.5, max=1.5))
     def _get_auth_token(self):
+        from tenacity import Retrying, stop_after_attempt, wait_random
 
+        for attempt in Retrying(reraise=True, stop=stop_after_attempt(5), wait=wait_random(min=0.5, max=1.5)):
+            with attempt:
+                return self._request_auth_token()
+
+    def _request_auth_token(self):
+
+        # wait for the auth attempt to be admitted
+        governor = self._connect_governor
+        if governor is None:
+            return self._post_auth_request()
+        governor.acquire(self._connect_priority, timeout=self.max_connection_retry_seconds, probe=False)
+
+        # report the attempt's result
+        try:
+            auth_token = self._post_auth_request()
+        except Exception as ex:
+            if self._is_auth_service_failure(ex):
+                governor.record_failure()
+            else:
+                governor.record_success()
+            raise
+        governor.record_success()
+        return auth_token
+
+    def _is_auth_service_failure(self, ex: Exception) -> bool:
+        """Whether an auth error signals that the auth service (or the network) is failing, rather than rejecting the request."""
+        status_code = getattr(getattr(ex, 'response', None), 'status_code', getattr(ex, 'code', None))
+        if isinstance(status_code, int):
+            return status_code in self.RETRY_HTTP_CLIENT_CODES or status_code in range(500, 600)
+
+        # Note: requests' exceptions are OSErrors too
+        return isinstance(ex, (OSError, ) + self.CONNECTION_EXCEPTION_CLASSES)
+
+    def _post_auth_request(self):
         auth_payload = {
             "data": {
                 "api_key": self._customer_token
             }
         }
 
+        if self._auth_transport is not None:
+            return self._auth_transport.post_json(self._auth_endpoint, auth_payload).get('token')
+
+        import requests
         response = requests.post(self._auth_endpoint, json=auth_payload)
         response.raise_for_status()
 
@@ -648,8 +1384,23 @@ class WebSocketStreamingClient(WebsocketStreamingClientSingleConnection):
     Extend the WebsocketStreamingClientSingleConnection class
     to reconnect to a server and continue after disconnection
     (for whatever reason).
+
+    In addition, before reaching the server's connection duration limit (see README.md),
+    a new connection is opened and media sending is rolled over to it (make-before-break),
+    so that responses keep on flowing with no reconnection gap.
+
+    Optionally, a warmed-up standby connection is kept open (see: hot_standby),
+    and failed over to immediately on connection errors, instead of reconnecting.
     """
 
+    # constants
+    CONNECTION_DURATION_LIMIT_SECONDS = 2 * 60 * 60
+    DEFAULT_ROLLOVER_MARGIN_SECONDS = 5 * 60            # how long before the duration limit to roll over
+    RECOMMENDED_ROLLOVER_SECONDS = CONNECTION_DURATION_LIMIT_SECONDS - DEFAULT_ROLLOVER_MARGIN_SECONDS
+    ROLLOVER_SWITCH_TIMEOUT_SECONDS = 10.0              # how long to wait for the media sender to switch connections
+    STANDBY_REBUILD_WAIT_SECONDS = 1.0                  # how long to wait before rebuilding a failed standby connection
+    MEDIA_SENDER_STOP_TIMEOUT_SECONDS = 1.0             # how long to wait for the media sender to stop, before reconnecting
+
     def __init__(self, customer_token, on_media_error: typing.Callable[[Exception], None] = None):
 
         # base class init logic
@@ -658,6 +1409,104 @@ class WebSocketStreamingClient(WebsocketStreamingClientSingleConnection):
         # state for reconnection
         self._media_generator = None
 
+        # state for rollover (opt-in, see: rollover_seconds)
+        self._rollover_seconds = None
+        self._rollover_thread = None
+        self._rollover_event = Event()
+
+        # state for hot standby
+        self._hot_standby = False
+        self._standby_ws = None
+        self._standby_lock = Lock()
+        self._standby_thread = None
+        self._standby_stop_event = Event()
+        self._standby_wakeup = None
+        self._failover_metrics = FailoverMetrics()
+
+        # response de-duplication
+        self._response_deduplicator = None
+
+        # media spooling
+        self._media_spool = None
+
+    # ========== #
+    # Properties #
+    # ========== #
+    @property
+    def hot_standby(self) -> bool:
+        return self._hot_standby
+
+    @hot_standby.setter
+    def hot_standby(self, val: bool):
+        """
+        Sets whether to keep a second, authenticated and warmed-up, connection in standby.
+        On connection errors, media is switched to the standby connection immediately (instead of reconnecting),
+        and a replacement standby connection is opened in the background.
+        When the WebSocket host resolves to several addresses, the standby connects to a different address than the
+        current connection.
+
+        Should be set before starting the stream.
+        """
+        self._hot_standby = val
+
+    @property
+    def response_deduplicator(self) -> typing.Optional[ResponseDeduplicator]:
+        return self._response_deduplicator
+
+    @response_deduplicator.setter
+    def response_deduplicator(self, deduplicator: typing.Optional[ResponseDeduplicator]):
+        """
+        Sets a ResponseDeduplicator, for dropping duplicated and out-of-order responses across reconnections.
+
+        Possible values:
+            None: Disables de-duplication (the default)
+            ResponseDeduplicator: Used for checking each response before it is yielded
+        """
+        self._response_deduplicator = deduplicator
+
+    @property
+    def media_spool(self) -> typing.Optional[MediaSpool]:
+        return self._media_spool
+
+    @media_spool.setter
+    def media_spool(self, spool: typing.Optional[MediaSpool]):
+        """
+        Sets a MediaSpool, which media is written through to disk, so that it's neither lost nor blocked during outages.
+        Once reconnected, spooled media is drained at the spool's catch-up rate.
+
+        Possible values:
+            None: Media is sent directly from the media generator (the default)
+            MediaSpool: Media from the media generator is spooled, and sent from the spool
+
+        Should be set before starting the stream.
+        """
+        self._media_spool = spool
+
+    @property
+    def failover_metrics(self) -> FailoverMetrics:
+        """A snapshot of the hot standby failover metrics."""
+        return replace(self._failover_metrics, standby_ready=self._standby_ws is not None)
+
+    @property
+    def rollover_seconds(self) -> typing.Optional[float]:
+        return self._rollover_seconds
+
+    @rollover_seconds.setter
+    def rollover_seconds(self, val: typing.Optional[float]):
+        """
+        Sets the connection age (in seconds) after which a new connection is opened and rolled over to.
+        Useful for streams which may reach the connection duration limit (see README.md), for which
+        RECOMMENDED_ROLLOVER_SECONDS rolls over shortly before the limit.
+
+        Possible values:
+            None: Disables rollover, the client will only reconnect after the server closed the connection (the default)
+            float: Sets number of seconds
+        """
+        self._rollover_seconds = val
+
+    # ======== #
+    # Internal #
+    # ======== #
     def _connect_and_start(self,
                            ws_url: str,
                            media_generator: typing.Optional[typing.Iterator[bytes]] = None,
@@ -669,9 +1518,22 @@ class WebSocketStreamingClient(WebsocketStreamingClientSingleConnection):
         self._media_config = media_config
         self._response_types = response_types
 
+        # write media through the spool, and send media from it
+        if self._media_spool is not None and media_generator is not None:
+            spool_config = media_config or MediaConfig()
+            bytes_per_second = spool_config.sample_rate * spool_config.sample_width * spool_config.num_channels
+            self._media_generator = self._media_spool.write_through(media_generator, bytes_per_second)
+
         # start stream now
         response_generator = super()._connect_and_start(ws_url, self._media_generator, self._media_config, self._response_types)
 
+        # schedule rollover of the new connection
+        self._start_rollover_timer(ws_url)
+
+        # open standby connection
+        if self._hot_standby:
+            self._start_standby(ws_url)
+
         return self._reconnect_generator(ws_url, response_generator)
 
     def _reconnect_generator(self, ws_url, response_generator) -> typing.Iterator[typing.Dict]:
@@ -682,62 +1544,452 @@ class WebSocketStreamingClient(WebsocketStreamingClientSingleConnection):
 
         ended = False
 
-        # continue until finished successfully
-        while not ended:
+        # ids of responses drained from a rolled-over connection, and of the connection before it
+        drained_ids = set()
+        skip_ids = set()
 
-            try:
-                yield from response_generator
+        # checked once, not per response (see: set_logger())
+        is_debug = self._logger.isEnabledFor(logging.DEBUG)
+
+        # the connection which responses were last received from
+        ws_client = None
 
-                # response_generator exhausted without any exceptions
-                ended = True
+        try:
 
-            # catch connection errors and attempt reconnection
-            except self.CONNECTION_EXCEPTION_CLASSES as connection_error:
-                self._log_exception(f'Error while generating responses', connection_error)
+            # continue until finished successfully
+            while not ended:
+
+                # the connection which `response_generator` receives from
+                previous_ws_client, ws_client = ws_client, self._ws_client
+
+                # response times restart on a new connection: unless their stream times are compared, restart ordering
+                # (see: _accept_response())
+                if self._response_deduplicator is not None and previous_ws_client is not None and ws_client is not previous_ws_client:
+                    if self._media_timeline is None:
+                        self._response_deduplicator.reset_ordering()
+
+                try:
+                    for response in response_generator:
+
+                        resp_id = response.get('response', {}).get('id')
+
+                        # draining responses of a rolled-over connection
+                        if self._rolled_over_from(ws_client):
+
+                            # the old connection's EOS does not end the media stream
+                            if response.get('response', {}).get('is_end_of_stream'):
+                                self._logger.debug('Skipping EOS response of rolled-over connection')
+                                continue
+
+                            drained_ids.add(resp_id)
+
+                        # already drained from the previous connection
+                        elif resp_id in skip_ids:
+                            continue
+
+                        # duplicated or out-of-order (e.g. after reconnection)
+                        if self._response_deduplicator is not None and not self._accept_response(response, ws_client):
+                            if is_debug:
+                                self._logger.debug(LogEvent('response_dropped', 'Dropping duplicated or out-of-order response: resp_id={resp_id!r}', resp_id=resp_id))
+                            continue
+
+                        yield response
+
+                    # response_generator exhausted without any exceptions
+                    if self._rolled_over_from(ws_client):
+                        response_generator = self._adopt_rollover_connection(ws_url)
+                        skip_ids, drained_ids = drained_ids, set()
+                    else:
+                        ended = True
+
+                # catch connection errors and attempt reconnection
+                except self.CONNECTION_EXCEPTION_CLASSES as connection_error:
+
+                    # the client was closed while receiving
+                    if self._closed:
+                        return
+
+                    self._log_exception(f'Error while generating responses', connection_error)
+
+                    # media sending already rolled over to a new connection, keep on with it
+                    if self._rolled_over_from(ws_client):
+                        response_generator = self._adopt_rollover_connection(ws_url)
+                        skip_ids, drained_ids = drained_ids, set()
+                        continue
+
+                    # cancel rollover of the disconnected connection
+                    self._stop_rollover_timer()
+
+                    # fail over to the standby connection, if one is ready
+                    standby_generator = self._failover_to_standby(ws_url, ws_client)
+                    if standby_generator is not None:
+                        response_generator = standby_generator
+                        continue
+
+                    hooks = self._trace_hooks
+                    reconnect_started_at = time.perf_counter()
+                    if hooks is not None:
+                        hooks.on_reconnect_start(connection_error)
+
+                    # wait for ping sender thread
+                    if self._ping_sender_thread and self._ping_sender_thread.is_alive():
+                        self._ping_event.set()
+                        self._ping_sender_thread.join()
+
+                    # stop media thread: interrupt its wait for the next media chunk (the media generator may be blocked),
+                    # or its send over the broken connection (any unsent chunk is sent again after reconnecting)
+                    self._abort_ws(ws_client)
+                    self._stop_media_sender_thread(timeout=self.MEDIA_SENDER_STOP_TIMEOUT_SECONDS)
+
+                    # if media stream already finished
+                    if self._media_stream_finished:
+                        self._logger.warning('Media stream already finished! '
+                                             'Will not attempt to reconnect to WebSocket as server will not return any responses.')
+                        if hooks is not None:
+                            hooks.on_reconnect_end(reconnect_started_at, time.perf_counter() - reconnect_started_at, connection_error)
+                        return
+
+                    # try reconnecting and keep on yielding from the same generator
+                    if self._media_timeline is not None:
+                        self._logger.info(f'Media sent so far: {self._media_timeline.sent_seconds:.3f} seconds, resuming from there')
+                    self._logger.debug('Trying to reconnect')
+                    try:
+                        response_generator = super()._connect_and_start(ws_url, self._media_generator, self._media_config, self._response_types)
+                    except Exception as ex:
+                        if hooks is not None:
+                            hooks.on_reconnect_end(reconnect_started_at, time.perf_counter() - reconnect_started_at, ex)
+                        raise
+                    if hooks is not None:
+                        hooks.on_reconnect_end(reconnect_started_at, time.perf_counter() - reconnect_started_at)
+                    self._start_rollover_timer(ws_url)
+                    if self._hot_standby:
+                        self._start_standby(ws_url)
+
+                # catch all other exceptions and stop the generator
+                except Exception as ex:
+                    self._log_exception('Exception while reconnecting', ex)
+                    raise
+
+        finally:
+
+            # no rollover nor failover after the stream ended (or the generator was closed)
+            self._stop_rollover_timer()
+            self._stop_standby()
+
+    def close(self):
+        # no rollover nor failover after closing
+        self._stop_rollover_timer()
+        self._stop_standby()
+        super().close()
+
+        # spooled media is no longer sent
+        if self._media_spool is not None:
+            self._media_spool.close()
+
+    def _accept_response(self, response: typing.Dict, ws_client: WebSocket) -> bool:
+        """Check a response with the response deduplicator, by its stream time (if media is sent by the client)."""
+        offset_seconds = 0.0
+        if self._media_timeline is not None:
+            offset_seconds = self._media_timeline.connection_stream_seconds(ws_client)
+        return self._response_deduplicator.accept(response, offset_seconds)
+
+    def _rolled_over_from(self, ws_client: WebSocket) -> bool:
+        """Whether the current connection was rolled over from `ws_client` to a new one."""
+        return self._ws_client is not ws_client and self._ws_client is not None and self._ws_client.connected
+
+    def _adopt_rollover_connection(self, ws_url: str) -> typing.Iterator[typing.Dict]:
+        """
+        Continue receiving responses from the connection which was rolled over to.
 
-                # wait for ping sender thread
-                if self._ping_sender_thread and self._ping_sender_thread.is_alive():
-                    self._ping_event.set()
-                    self._ping_sender_thread.join()
+        :return: a generator which yields responses from the new connection
+        """
+        self._logger.info('Finished draining rolled-over connection, continuing with the new connection')
+        self._start_rollover_timer(ws_url)
+        return self._response_generator(self._ws_client)
 
-                # wait for media thread, that still accesses the WebSocket to fail and stop
-                self._wait_for_thread(timeout_step=0.1, global_timeout=1.0)
+    def _start_rollover_timer(self, ws_url: str):
+        """Schedule a rollover of the current connection, see: rollover_seconds"""
 
-                # if media stream already finished
-                if self._media_stream_finished:
-                    self._logger.warning('Media stream already finished! '
-                                         'Will not attempt to reconnect to WebSocket as server will not return any responses.')
-                    return
+        # cancel previously scheduled rollover
+        self._stop_rollover_timer()
 
-                # try reconnecting and keep on yielding from the same generator
-                self._logger.debug('Trying to reconnect')
-                response_generator = super()._connect_and_start(ws_url, self._media_generator, self._media_config, self._response_types)
+        if self._rollover_seconds is None:
+            return
 
-            # catch all other exceptions and stop the generator
-            except Exception as ex:
-                self._log_exception('Exception while reconnecting', ex)
-                raise
+        self._rollover_event = Event()
+        self._rollover_thread = Thread(
+            target=self._rollover_worker,
+            args=(ws_url, self._rollover_event),
+            name='ws_rollover',
+            daemon=True)
+        self._rollover_thread.start()
+
+    def _stop_rollover_timer(self):
+        self._rollover_event.set()
+
+    def _rollover_worker(self, ws_url: str, cancel_event: Event):
+        """
+        Thread function for rolling over to a new connection (make-before-break):
+            1. wait until the connection reaches its rollover age
+            2. open and authenticate a new connection
+            3. switch media sending to the new connection, see: _switch_media_ws()
+        Responses remaining on the old connection are drained by _reconnect_generator().
+        """
 
-    def _wait_for_thread(self, timeout_step: float, global_timeout: float):
-        """Join thread, with logging on success status, and a timeout."""
+        # wait for rollover time (unless cancelled)
+        if cancel_event.wait(self._rollover_seconds):
+            return
 
-        # return immediately if media thread was never started
-        if self._media_sender_thread is None:
+        self._logger.info('Connection duration limit is approaching, rolling over to a new connection')
+
+        # open new connection
+        try:
+            headers = self._get_ws_connect_headers(ws_url)
+            new_ws_client = self._connect_websocket(ws_url, media_config=self._media_config, response_types=self._response_types, headers=headers)
+        except Exception as ex:
+            self._log_exception('Error while rolling over connection, will reconnect when disconnected', ex)
+            return
+
+        # cancelled while connecting
+        if cancel_event.is_set():
+            new_ws_client.close(STATUS_NORMAL)
             return
 
-        # request media thread to logically stop
-        self._stop_media_thread = True
+        # media is sent by the client, so the media sender thread switches connections
+        if self._media_sender_thread is not None and self._media_sender_thread.is_alive():
+            self._request_media_switch(new_ws_client)
 
-        # wait for media thread to finish (up to global_timeout seconds)
-        waiting_for = 0.0
-        while self._media_sender_thread.is_alive() and waiting_for < global_timeout:
+            # wait for the media sender to switch, as long as it's alive
+            waiting_for = 0.0
+            while not self._media_switched.wait(0.1) and self._media_sender_thread.is_alive():
+                waiting_for += 0.1
+                if waiting_for >= self.ROLLOVER_SWITCH_TIMEOUT_SECONDS:
+                    self._logger.warning(f'Media sender did not switch connection after {waiting_for=} seconds')
+                    break
 
-            # wait for media thread to finish (up to timeout_step seconds)
-            self._media_sender_thread.join(timeout=timeout_step)
+            # media sender did not switch (e.g. media stream finished in the meantime)
+            if not self._media_switched.is_set():
+                self._discard_media_switch()
 
-            # if media thread is still alive
-            if self._media_sender_thread.is_alive():
-                waiting_for += timeout_step
-                self._logger.debug(f'{self._media_sender_thread.name} not closing, {waiting_for=} seconds...')
-            else:
-                self._logger.debug(f'{self._media_sender_thread.name} closed, {waiting_for=} seconds...')
+        # media comes from an external source, so just switch and close the old connection
+        else:
+            old_ws_client, self._ws_client = self._ws_client, new_ws_client
+            old_ws_client.send_close(STATUS_NORMAL)
+
+    def _failover_to_standby(self, ws_url: str, failed_ws: WebSocket) -> typing.Optional[typing.Iterator[typing.Dict]]:
+        """
+        Switch media sending and response receiving from the failed connection to the standby connection.
+
+        :return: a generator which yields responses from the standby connection, or None if no standby is ready
+        """
+
+        # nothing to fail over to
+        if self._media_stream_finished:
+            return None
+        failover_start = time.monotonic()
+        standby_ws = self._take_standby()
+        if standby_ws is None:
+            return None
+
+        self._logger.warning('Failing over to standby connection')
+
+        # abort the failed connection, so a media send blocked on it fails instead of hanging
+        self._abort_ws(failed_ws)
+
+        # switch the media sender before it sends its next media chunk
+        switched = False
+        media_thread = self._media_sender_thread
+        if media_thread is not None and media_thread.is_alive():
+            self._request_media_switch(standby_ws, drain=False)
+
+            # wait for the media sender to switch, as long as it's alive
+            waiting_for = 0.0
+            while not self._media_switched.wait(0.01) and media_thread.is_alive():
+                waiting_for += 0.01
+                if waiting_for >= self.ROLLOVER_SWITCH_TIMEOUT_SECONDS:
+                    self._logger.warning(f'Media sender did not switch to standby connection after {waiting_for=:.2f} seconds')
+                    break
+            switched = self._withdraw_media_switch() is None
+
+        # media sender did not switch (e.g. it failed sending over the broken connection, or it is still blocked)
+        if not switched:
+            self._stop_media_sender_thread(timeout=self.MEDIA_SENDER_STOP_TIMEOUT_SECONDS)
+            self._ws_client = standby_ws
+            if self._media_generator is not None:
+                self._start_media_sender_thread(self._media_generator)
+
+        # update metrics
+        failover_seconds = time.monotonic() - failover_start
+        self._failover_metrics.failovers += 1
+        self._failover_metrics.last_failover_seconds = failover_seconds
+        self._failover_metrics.max_failover_seconds = max(self._failover_metrics.max_failover_seconds, failover_seconds)
+        self._logger.info(f'Failed over to standby connection, {failover_seconds=}')
+
+        # replace the standby connection in the background
+        self._start_rollover_timer(ws_url)
+        self._start_standby(ws_url)
+
+        return self._response_generator(standby_ws)
+
+    def _start_standby(self, ws_url: str):
+        """Start a thread which opens a standby connection and keeps it warm (unless one is already running)."""
+
+        if self._standby_thread is not None and self._standby_thread.is_alive() and not self._standby_stop_event.is_set():
+            return
+
+        # the wakeup socket pair interrupts the standby thread's wait for incoming frames
+        self._standby_stop_event = Event()
+        self._standby_wakeup, wakeup_reader = socket.socketpair()
+        self._standby_thread = Thread(
+            target=self._standby_worker,
+            args=(ws_url, self._standby_stop_event, wakeup_reader),
+            name='ws_standby',
+            daemon=True)
+        self._standby_thread.start()
+
+    def _stop_standby(self):
+        """Stop the standby thread, which closes its standby connection (unless taken)."""
+        self._standby_stop_event.set()
+        if self._standby_wakeup is not None:
+            self._standby_wakeup.close()
+            self._standby_wakeup = None
+
+    def _take_standby(self) -> typing.Optional[WebSocket]:
+        """
+        Take over the standby connection, stopping its standby thread.
+
+        :return: the standby WebSocket, or None if no standby connection is ready
+        """
+
+        with self._standby_lock:
+            standby_ws, self._standby_ws = self._standby_ws, None
+
+        if standby_ws is None:
+            return None
+
+        # the standby thread stops reading the standby connection, before it can be read elsewhere
+        standby_thread = self._standby_thread
+        self._stop_standby()
+        standby_thread.join()
+
+        if not standby_ws.connected:
+            return None
+
+        return standby_ws
+
+    def _standby_worker(self, ws_url: str, stop_event: Event, wakeup_reader: socket.socket):
+        """
+        Thread function for keeping a standby connection:
+            1. open and authenticate a standby connection
+            2. keep it warm until stopped (or taken), see: _keep_standby_warm()
+            3. rebuild it if it dropped
+        """
+
+        try:
+            while not stop_event.is_set():
+
+                # open standby connection
+                try:
+                    headers = self._get_ws_connect_headers(ws_url)
+                    standby_ws = self._connect_websocket(ws_url,
+                                                         media_config=self._media_config,
+                                                         response_types=self._response_types,
+                                                         headers=headers,
+                                                         address_factory=lambda: self._standby_address(ws_url))
+                except Exception as ex:
+                    self._failover_metrics.standby_build_failures += 1
+                    self._log_exception('Error while opening standby connection', ex)
+                    stop_event.wait(self.STANDBY_REBUILD_WAIT_SECONDS)
+                    continue
+
+                self._failover_metrics.standby_builds += 1
+                self._failover_metrics.standby_last_seen = time.monotonic()
+                with self._standby_lock:
+                    self._standby_ws = standby_ws
+                self._logger.info('Standby connection ready')
+
+                # keep it warm
+                try:
+                    self._keep_standby_warm(standby_ws, stop_event, wakeup_reader)
+                except Exception as ex:
+                    self._failover_metrics.standby_drops += 1
+                    self._log_exception('Standby connection dropped', ex)
+
+                # close standby connection, unless it was taken
+                with self._standby_lock:
+                    if self._standby_ws is standby_ws:
+                        self._standby_ws = None
+                        standby_ws.close(STATUS_NORMAL)
+
+                # wait before rebuilding a dropped standby connection
+                stop_event.wait(self.STANDBY_REBUILD_WAIT_SECONDS)
+
+        finally:
+            wakeup_reader.close()
+
+    def _keep_standby_warm(self, standby_ws: WebSocket, stop_event: Event, wakeup_reader: socket.socket):
+        """
+        Read incoming frames of the standby connection (so that the server's pings are ponged),
+        and ping it periodically, until stopped.
+        """
+
+        next_ping = time.monotonic() + self.AUTO_PING_INTERVAL_SECONDS
+        while not stop_event.is_set():
+
+            # wait for an incoming frame, a wakeup, or the next ping time
+            readers = [wakeup_reader] if standby_ws.sock is None else [wakeup_reader, standby_ws.sock]
+            timeout = max(0.0, next_ping - time.monotonic()) if self.AUTO_PING_INTERVAL_SECONDS > 0 else None
+            readable, _, _ = select.select(readers, [], [], timeout)
+
+            # stopped or taken
+            if wakeup_reader in readable:
+                return
+
+            if standby_ws.sock in readable:
+                opcode, data = standby_ws.recv_data(control_frame=True)
+                self._failover_metrics.standby_last_seen = time.monotonic()
+                if opcode == ABNF.OPCODE_CLOSE:
+                    raise WebSocketConnectionClosedException(f'Standby connection closed: {data}')
+
+            if self.AUTO_PING_INTERVAL_SECONDS > 0 and time.monotonic() >= next_ping:
+                standby_ws.ping()
+                next_ping = time.monotonic() + self.AUTO_PING_INTERVAL_SECONDS
+
+    def _standby_address(self, ws_url: str) -> typing.Optional[str]:
+        """
+        A resolved address of the WebSocket host other than the current connection's, for the standby connection.
+
+        :return: an IP address, or None if there is no other address
+        """
+
+        parsed_ws_url = urlparse(ws_url)
+        if parsed_ws_url.hostname is None or self._ws_client is None or self._ws_client.sock is None:
+            return None
+
+        # resolve all addresses of the WebSocket host
+        port = parsed_ws_url.port or (443 if parsed_ws_url.scheme == 'wss' else 80)
+        addresses = socket.getaddrinfo(parsed_ws_url.hostname, port, type=socket.SOCK_STREAM)
+
+        # pick an address other than the current connection's
+        current_address = self._ws_client.sock.getpeername()[0]
+        other_addresses = [sockaddr[0] for *_, sockaddr in addresses if sockaddr[0] != current_address]
+        return other_addresses[0] if other_addresses else None
+
+    @staticmethod
+    def _pin_address(parsed_ws_url, address: str) -> typing.Tuple[str, str, str]:
+        """
+        A WebSocket URL, with its host replaced by one of its addresses, and the Host and Origin headers of the original
+        URL's handshake (so that, but for the address connected to, the connection is opened as to the original URL).
+
+        :return: (URL, Host header, Origin header)
+        """
+
+        def with_port(host: str, default_ports: typing.Collection[int]) -> str:
+            host = f'[{host}]' if ':' in host else host
+            return host if parsed_ws_url.port in (None, *default_ports) else f'{host}:{parsed_ws_url.port}'
+
+        # Note: the Host header omits the HTTP(S) default ports (as websocket-client does)
+        host = with_port(parsed_ws_url.hostname, default_ports=(80, 443))
+        netloc = with_port(address, default_ports=())
+        origin = ('https://' if parsed_ws_url.scheme == 'wss' else 'http://') + host
+        return parsed_ws_url._replace(netloc=netloc).geturl(), host, origin
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+import time
+import random
+import typing
+
+from array import array
+from threading import Lock
+from dataclasses import dataclass
+
+try:
+    from opentelemetry import trace
+except ImportError:     # an optional dependency, see: extras_require in setup.py
+    trace = None
+
+
+def _require_opentelemetry():
+    if trace is None:
+        raise ImportError("OpenTelemetry is required for a default tracer: pip install 'verbit-streaming-sdk[tracing]'")
+
+
+class TraceHooks:
+    """
+    Hooks invoked by the streaming client at its I/O boundaries, for profiling and tracing a live session.
+    Subclass it and override the hooks of interest (all hooks do nothing by default), and set it on the client:
+        client.trace_hooks = MyHooks()
+
+    Hooks are passed the time.perf_counter() each operation started at, and its duration in seconds. They are invoked
+    from the client's threads (the media sender's, and the one consuming responses), so they must be thread-safe,
+    and fast: frame hooks are invoked per frame.
+    """
+
+    def on_connect_phase(self, phase: str, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        """
+        A phase of connecting ended (with `error`, if it failed):
+            'auth':         obtaining the connect headers (and an auth token, for existing sessions)
+            'admission':    waiting for the connect_governor to admit a connect attempt
+            'handshake':    a connect attempt: resolving, connecting and upgrading to WebSocket
+            'total':        connecting, including all attempts and the waits between them
+        """
+
+    def on_frame_sent(self, size: int, started_at: float, seconds: float):
+        """A media frame of `size` bytes was sent."""
+
+    def on_frame_received(self, opcode: int, size: int, started_at: float, seconds: float):
+        """A frame was received (see: websocket.ABNF opcodes). The duration includes waiting for the frame."""
+
+    def on_response_decoded(self, size: int, started_at: float, seconds: float):
+        """A text frame of `size` bytes was decoded into a response."""
+
+    def on_response_yielded(self, started_at: float, seconds: float):
+        """A response was yielded, and the consumer took `seconds` until it asked for the next one."""
+
+    def on_reconnect_start(self, error: BaseException):
+        """Reconnecting started, following a connection error."""
+
+    def on_reconnect_end(self, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        """Reconnecting ended: streaming resumed over a new connection, or failed with `error`."""
+
+
+class OpenTelemetryHooks(TraceHooks):
+    """
+    Records OpenTelemetry spans of connect phases and reconnections (and optionally, of each frame and response):
+    'verbit.connect.<phase>', 'verbit.reconnect', 'verbit.frame.send', 'verbit.frame.receive', 'verbit.response.decode'
+    and 'verbit.response.yield'. A reconnection's span is started when reconnecting starts, and ended when it ends.
+
+    Usage:
+        client.trace_hooks = OpenTelemetryHooks(trace.get_tracer(__name__))
+    """
+
+    def __init__(self, tracer=None, trace_frames: bool = False):
+        """
+        :param tracer:          an OpenTelemetry Tracer. if omitted, the global tracer provider's 'verbit' tracer.
+        :param trace_frames:    whether to record spans of each frame and response, which adds a span per frame
+        """
+        if tracer is None:
+            _require_opentelemetry()
+            tracer = trace.get_tracer('verbit')
+        self._tracer = tracer
+        self._trace_frames = trace_frames
+        self._reconnect_span = None
+
+        # for converting time.perf_counter() times to epoch times, in nanoseconds (as spans are timed)
+        self._epoch_offset_ns = time.time_ns() - int(time.perf_counter() * 1e9)
+
+    def on_connect_phase(self, phase: str, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        self._span(f'verbit.connect.{phase}', started_at, seconds, error=error)
+
+    def on_frame_sent(self, size: int, started_at: float, seconds: float):
+        if self._trace_frames:
+            self._span('verbit.frame.send', started_at, seconds, {'size': size})
+
+    def on_frame_received(self, opcode: int, size: int, started_at: float, seconds: float):
+        if self._trace_frames:
+            self._span('verbit.frame.receive', started_at, seconds, {'opcode': opcode, 'size': size})
+
+    def on_response_decoded(self, size: int, started_at: float, seconds: float):
+        if self._trace_frames:
+            self._span('verbit.response.decode', started_at, seconds, {'size': size})
+
+    def on_response_yielded(self, started_at: float, seconds: float):
+        if self._trace_frames:
+            self._span('verbit.response.yield', started_at, seconds)
+
+    def on_reconnect_start(self, error: BaseException):
+        self._reconnect_span = self._tracer.start_span('verbit.reconnect', attributes={'error': repr(error)})
+
+    def on_reconnect_end(self, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        span, self._reconnect_span = self._reconnect_span, None
+        if span is None:
+            span = self._tracer.start_span('verbit.reconnect', start_time=self._epoch_ns(started_at))
+        self._end(span, started_at + seconds, error)
+
+    def _span(self, name: str, started_at: float, seconds: float, attributes: typing.Optional[dict] = None,
+              error: typing.Optional[BaseException] = None):
+        span = self._tracer.start_span(name, start_time=self._epoch_ns(started_at), attributes=attributes)
+        self._end(span, started_at + seconds, error)
+
+    def _end(self, span, ended_at: float, error: typing.Optional[BaseException]):
+        if error is not None:
+            span.record_exception(error)
+            if trace is not None:
+                span.set_status(trace.Status(trace.StatusCode.ERROR, repr(error)))
+        span.end(end_time=self._epoch_ns(ended_at))
+
+    def _epoch_ns(self, perf_counter: float) -> int:
+        return self._epoch_offset_ns + int(perf_counter * 1e9)
+
+
+@dataclass
+class TimingStats:
+    count: int                  # operations
+    sampled: int                # operations timed (see: TimingSampler.sample_every)
+    mean_seconds: float         # of the sampled operations
+    p50_seconds: float          # percentiles, of a uniform sample of the sampled operations
+    p99_seconds: float
+    max_seconds: float
+    errors: int = 0
+
+
+class _Timings:
+
+    def __init__(self, reservoir_size: int):
+        self.count = 0
+        self.sampled = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.reservoir = array('d')
+        self._reservoir_size = reservoir_size
+
+    def add(self, seconds: float):
+        self.sampled += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+        # reservoir sampling: each sampled operation is kept with equal probability
+        if len(self.reservoir) < self._reservoir_size:
+            self.reservoir.append(seconds)
+        else:
+            index = random.randrange(self.sampled)
+            if index < self._reservoir_size:
+                self.reservoir[index] = seconds
+
+    def stats(self) -> TimingStats:
+        ordered = sorted(self.reservoir)
+
+        def percentile(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+        return TimingStats(count=self.count,
+                           sampled=self.sampled,
+                           mean_seconds=self.total / self.sampled if self.sampled else 0.0,
+                           p50_seconds=percentile(0.5),
+                           p99_seconds=percentile(0.99),
+                           max_seconds=self.max,
+                           errors=self.errors)
+
+
+class TimingSampler(TraceHooks):
+    """
+    A lightweight in-process profiler of a live session: aggregates the durations of each hooked operation
+    (connect phases, frame sends and receives, response decoding and yielding, reconnections), for stats().
+    Frame and response operations are timed for one in `sample_every`, connect phases and reconnections always.
+
+    Usage:
+        client.trace_hooks = sampler = TimingSampler(sample_every=10)
+        ...
+        print(sampler.stats()['frame_sent'].p99_seconds)
+    """
+
+    DEFAULT_RESERVOIR_SIZE = 1024
+
+    def __init__(self, sample_every: int = 1, reservoir_size: int = DEFAULT_RESERVOIR_SIZE):
+        """
+        :param sample_every:    time one in `sample_every` frame and response operations
+        :param reservoir_size:  durations kept per operation, for percentiles
+        """
+        self.sample_every = max(1, sample_every)
+        self._reservoir_size = max(1, reservoir_size)
+        self._lock = Lock()
+        self._timings = {}
+
+    def stats(self) -> typing.Dict[str, TimingStats]:
+        """
+        Stats per operation: 'connect.<phase>', 'frame_sent', 'frame_received', 'response_decoded',
+        'response_yielded' and 'reconnect'.
+        """
+        with self._lock:
+            return {name: timings.stats() for name, timings in self._timings.items()}
+
+    def on_connect_phase(self, phase: str, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        self._record(f'connect.{phase}', seconds, error, sample=False)
+
+    def on_frame_sent(self, size: int, started_at: float, seconds: float):
+        self._record('frame_sent', seconds)
+
+    def on_frame_received(self, opcode: int, size: int, started_at: float, seconds: float):
+        self._record('frame_received', seconds)
+
+    def on_response_decoded(self, size: int, started_at: float, seconds: float):
+        self._record('response_decoded', seconds)
+
+    def on_response_yielded(self, started_at: float, seconds: float):
+        self._record('response_yielded', seconds)
+
+    def on_reconnect_end(self, started_at: float, seconds: float, error: typing.Optional[BaseException] = None):
+        self._record('reconnect', seconds, error, sample=False)
+
+    def _record(self, name: str, seconds: float, error: typing.Optional[BaseException] = None, sample: bool = True):
+        with self._lock:
+            timings = self._timings.get(name)
+            if timings is None:
+                timings = self._timings[name] = _Timings(self._reservoir_size)
+            timings.count += 1
+            if error is not None:
+                timings.errors += 1
+            if not sample or (timings.count - 1) % self.sample_every == 0:
+                timings.add(seconds)
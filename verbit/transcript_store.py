@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+import math
+import heapq
+import bisect
+import typing
+
+from array import array
+
+
+class _Column:
+    """
+    An append-only column of item times, searchable by binary search.
+    Columns are appended in order (as final responses arrive), so they're usually sorted as they are.
+    Otherwise (e.g. a PTS discontinuity), values are kept in sorted runs: each discontinuity starts a new run, and
+    runs are merged as they pile up (as in a log-structured merge), so appends stay O(1) amortized (O(log n) at most)
+    and queries search O(log n) runs.
+    """
+
+    def __init__(self):
+        self.values = array('d')
+        self.is_sorted = True
+        self._runs = []             # sorted runs of (values, indices)
+        self._is_run_open = False   # whether the last run may be extended by the next value
+
+    def append(self, value: float):
+        index = len(self.values)
+        self.values.append(value)
+
+        if self.is_sorted:
+            if not math.isnan(value) and (index == 0 or value >= self.values[index - 1]):
+                return
+
+            # the first value out of order: the values before it are sorted
+            self.is_sorted = False
+            if index:
+                self._runs.append((self.values[:index], array('q', range(index))))
+
+        if math.isnan(value):
+            self._is_run_open = False
+            return
+
+        if self._is_run_open and value >= self._runs[-1][0][-1]:
+            self._runs[-1][0].append(value)
+            self._runs[-1][1].append(index)
+            return
+
+        # a discontinuity: merge the runs of up to the last run's size, and start a new run
+        while len(self._runs) > 1 and len(self._runs[-2][0]) <= len(self._runs[-1][0]):
+            self._runs[-2:] = [self._merge(self._runs[-2], self._runs[-1])]
+        self._runs.append((array('d', [value]), array('q', [index])))
+        self._is_run_open = True
+
+    def range(self, lo: float, hi: float) -> typing.Iterable[int]:
+        """Indices of the values in [lo, hi), in ascending order of the values."""
+
+        if self.is_sorted:
+            return range(bisect.bisect_left(self.values, lo), bisect.bisect_left(self.values, hi))
+
+        slices = []
+        for values, indices in self._runs:
+            start, end = bisect.bisect_left(values, lo), bisect.bisect_left(values, hi)
+            if start < end:
+                slices.append(indices[start:end])
+        if len(slices) < 2:
+            return list(slices[0]) if slices else []
+        return list(heapq.merge(*slices, key=self.values.__getitem__))
+
+    @staticmethod
+    def _merge(earlier: tuple, later: tuple) -> tuple:
+        # Note: equal values are kept in the order they were appended
+        merged = list(heapq.merge(zip(*earlier), zip(*later), key=lambda pair: pair[0]))
+        return array('d', (value for value, _ in merged)), array('q', (index for _, index in merged))
+
+
+class TranscriptStore:
+    """
+    An in-memory, append-optimized index over the word items of final responses, answering time range queries
+    in O(log n + k), e.g. "what was said between t1 and t2" of a running session.
+
+    Item times are kept in array-backed columns (see: FIELDS), searched by binary search. Item 'start_pts' and
+    'start_epoch' times are those of their response, shifted by the item's offset from the response's start.
+
+    A store indexes a single stream of responses (by default, the transcription service's). For translations,
+    use a store per language.
+
+    Usage:
+        store = TranscriptStore()
+        for response in store.tee(client.start_stream(...)):
+            ...
+        words = store.between(60.0, 90.0)
+    """
+
+    FIELDS = ('start', 'end', 'start_pts', 'start_epoch')
+
+    def __init__(self,
+                 response_types: typing.Collection[str] = ('transcript', ),
+                 service_type: typing.Optional[str] = 'transcription',
+                 language_code: typing.Optional[str] = None):
+        """
+        :param response_types:  the types of final responses to index
+        :param service_type:    the service type of responses to index. if None, responses of any service type
+        :param language_code:   the language of responses to index. if None, responses of any language
+        """
+        self._response_types = response_types
+        self._service_type = service_type
+        self._language_code = language_code
+
+        self._items = []
+        self._columns = {field: _Column() for field in self.FIELDS}
+        self._max_duration = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add_response(self, response: dict):
+        """Index the word items of a response (unless not final, or not of the indexed stream)."""
+
+        body = response.get('response', {})
+        if not body.get('is_final') or body.get('type') not in self._response_types or not body.get('alternatives'):
+            return
+        if self._service_type is not None and body.get('service_type', self._service_type) != self._service_type:
+            return
+        if self._language_code is not None and body.get('language_code') != self._language_code:
+            return
+
+        # Note: if the input media stream has no pts values, 'start_pts' is the same as 'start'
+        response_start = body.get('start', 0.0)
+        start_pts = body.get('start_pts', response_start)
+        start_epoch = body.get('start_epoch', math.nan)
+
+        for item in body['alternatives'][0].get('items', []):
+            offset = item['start'] - response_start
+            self._items.append(item)
+            self._columns['start'].append(item['start'])
+            self._columns['end'].append(item['end'])
+            self._columns['start_pts'].append(start_pts + offset)
+            self._columns['start_epoch'].append(start_epoch + offset)
+            self._max_duration = max(self._max_duration, item['end'] - item['start'])
+
+    def add_responses(self, responses: typing.Iterable[dict]):
+        for response in responses:
+            self.add_response(response)
+
+    def tee(self, responses: typing.Iterable[dict]) -> typing.Iterator[dict]:
+        """Generator function indexing each of `responses`, and yielding it on."""
+        for response in responses:
+            self.add_response(response)
+            yield response
+
+    def query(self, lo: float, hi: float, field: str = 'start') -> typing.List[dict]:
+        """
+        Items whose `field` time is in [lo, hi), in ascending order of it.
+
+        :param lo:      range start (inclusive)
+        :param hi:      range end (exclusive)
+        :param field:   one of FIELDS
+        """
+        return [self._items[i] for i in self._column(field).range(lo, hi)]
+
+    def between(self, t1: float, t2: float, time_base: str = 'start') -> typing.List[dict]:
+        """
+        Items overlapping [t1, t2), i.e. what was said between t1 and t2.
+
+        :param t1:          range start
+        :param t2:          range end
+        :param time_base:   'start' for media stream times, 'start_pts' for input media PTS, or 'start_epoch' for epoch times
+        """
+
+        if time_base not in ('start', 'start_pts', 'start_epoch'):
+            raise ValueError("Parameter 'time_base' must be one of 'start', 'start_pts' or 'start_epoch'")
+
+        # items starting up to the longest item's duration before t1 may overlap it
+        starts = self._column(time_base).values
+        return [self._items[i] for i in self._column(time_base).range(t1 - self._max_duration, t2)
+                if starts[i] + self._items[i]['end'] - self._items[i]['start'] > t1 or starts[i] >= t1]
+
+    def text(self, t1: float, t2: float, time_base: str = 'start') -> str:
+        """The text said between t1 and t2 (with punctuation attached to the preceding word)."""
+        text = ''
+        for item in self.between(t1, t2, time_base):
+            text += item['value'] if item.get('kind') == 'punct' or not text else ' ' + item['value']
+        return text
+
+    def _column(self, field: str) -> _Column:
+        column = self._columns.get(field)
+        if column is None:
+            raise ValueError(f'Unknown field: {field}, expected one of {self.FIELDS}')
+        return column
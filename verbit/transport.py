@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import socket
+import typing
+
+from dataclasses import dataclass
+
+
+# DSCP "Expedited Forwarding" (RFC 3246), as a TOS byte: for interactive voice-like traffic
+TOS_DSCP_EF = 0xB8
+
+
+@dataclass
+class TransportConfig:
+    """
+    TCP-level options of the WebSocket's socket. Options left as None keep the defaults of the websocket-client
+    library (TCP_NODELAY, and keepalive probes after 30 seconds idle, every 10 seconds, 3 times) or of the OS.
+    Options not supported by the platform are skipped.
+    """
+
+    tcp_nodelay: typing.Optional[bool] = None               # send small (media) frames immediately, instead of coalescing
+    send_buffer_bytes: typing.Optional[int] = None          # SO_SNDBUF, bounds the media queued in the kernel when congested
+    receive_buffer_bytes: typing.Optional[int] = None       # SO_RCVBUF, disables the OS's auto-tuning when set
+    keepalive: typing.Optional[bool] = None                 # SO_KEEPALIVE
+    keepalive_idle_seconds: typing.Optional[int] = None     # TCP_KEEPIDLE, idle time before the first keepalive probe
+    keepalive_interval_seconds: typing.Optional[int] = None     # TCP_KEEPINTVL, between keepalive probes
+    keepalive_count: typing.Optional[int] = None            # TCP_KEEPCNT, unanswered probes before the connection is dropped
+    user_timeout_seconds: typing.Optional[float] = None     # TCP_USER_TIMEOUT (Linux), for sent data left unacknowledged
+    ip_tos: typing.Optional[int] = None                     # IP_TOS (IPV6_TCLASS for IPv6), e.g. TOS_DSCP_EF
+
+    @classmethod
+    def low_latency(cls) -> 'TransportConfig':
+        """
+        A preset for live captions: no coalescing of media frames, a small send buffer so that little media is queued
+        behind a congested link, and dead peers detected within about 10 seconds (rather than the socket timeout).
+        """
+        return cls(tcp_nodelay=True,
+                   send_buffer_bytes=32 * 1024,
+                   keepalive=True,
+                   keepalive_idle_seconds=5,
+                   keepalive_interval_seconds=2,
+                   keepalive_count=3,
+                   user_timeout_seconds=10.0)
+
+    def socket_options(self) -> typing.List[typing.Tuple[int, int, int]]:
+        """The (level, option, value) socket options, for any address family (IP_TOS excluded, see: apply_tos())."""
+
+        options = []
+
+        def add(level_name: str, option_name: str, value):
+            if value is not None and hasattr(socket, option_name):
+                options.append((getattr(socket, level_name), getattr(socket, option_name), int(value)))
+
+        add('IPPROTO_TCP', 'TCP_NODELAY', self.tcp_nodelay)
+        add('SOL_SOCKET', 'SO_SNDBUF', self.send_buffer_bytes)
+        add('SOL_SOCKET', 'SO_RCVBUF', self.receive_buffer_bytes)
+        add('SOL_SOCKET', 'SO_KEEPALIVE', self.keepalive)
+        add('IPPROTO_TCP', 'TCP_KEEPIDLE', self.keepalive_idle_seconds)
+        add('IPPROTO_TCP', 'TCP_KEEPINTVL', self.keepalive_interval_seconds)
+        add('IPPROTO_TCP', 'TCP_KEEPCNT', self.keepalive_count)
+        if self.user_timeout_seconds is not None:
+            add('IPPROTO_TCP', 'TCP_USER_TIMEOUT', round(self.user_timeout_seconds * 1000))
+        return options
+
+    def apply(self, sock: socket.socket):
+        """Apply all options to a socket (which may already be connected)."""
+        for option in self.socket_options():
+            sock.setsockopt(*option)
+        self.apply_tos(sock)
+
+    def apply_tos(self, sock: socket.socket):
+        """Apply the IP TOS marking to a socket, by its address family. Platforms not supporting it are ignored."""
+        if self.ip_tos is None:
+            return
+        try:
+            if sock.family == socket.AF_INET6 and hasattr(socket, 'IPV6_TCLASS'):
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_TCLASS, self.ip_tos)
+            elif sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, self.ip_tos)
+        except OSError:
+            pass
+
+
+# transport presets, by name (see: the 'loadtest' command's --transport option)
+PRESETS = {
+    'default': TransportConfig(),
+    'low-latency': TransportConfig.low_latency(),
+    'coalescing': TransportConfig(tcp_nodelay=False),
+}
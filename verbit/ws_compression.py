@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+
+import re
+import json
+import time
+import zlib
+import struct
+import typing
+import argparse
+
+from threading import Lock
+from dataclasses import dataclass, asdict
+
+from websocket import WebSocket, ABNF, WebSocketProtocolException, WebSocketPayloadException, STATUS_MESSAGE_TOO_BIG
+
+
+EXTENSION_NAME = 'permessage-deflate'
+
+# see: https://datatracker.ietf.org/doc/html/rfc7692#section-7.2.1
+_DEFLATE_TAIL = b'\x00\x00\xff\xff'
+
+# Note: zlib doesn't support 8-bit windows for raw deflate streams, so they're neither offered nor accepted
+_MIN_WINDOW_BITS = 9
+_MAX_WINDOW_BITS = 15
+
+
+@dataclass
+class DeflateConfig:
+    client_no_context_takeover: bool = False    # compress each sent message separately (less memory, worse ratio)
+    server_no_context_takeover: bool = False    # request the server to compress each message separately
+    client_max_window_bits: typing.Optional[int] = None     # the sent messages' compression window (9-15), None for 15
+    server_max_window_bits: typing.Optional[int] = None     # request the server to limit its compression window (9-15)
+    compress_media: bool = False                # also compress media (binary) messages, which rarely pays off for audio
+    compress_level: int = 6                     # zlib compression level of sent messages
+    min_compress_bytes: int = 64                # smaller messages are sent uncompressed
+    max_message_bytes: int = 16 * 2 ** 20       # received messages decompressing beyond this fail the connection
+
+    def __post_init__(self):
+        for name in ('client_max_window_bits', 'server_max_window_bits'):
+            bits = getattr(self, name)
+            if bits is not None and not _MIN_WINDOW_BITS <= bits <= _MAX_WINDOW_BITS:
+                raise ValueError(f"Parameter '{name}' must be between {_MIN_WINDOW_BITS} and {_MAX_WINDOW_BITS}")
+
+    def offer(self) -> str:
+        """The extension offer, for the 'Sec-WebSocket-Extensions' header of the handshake request."""
+        params = [EXTENSION_NAME]
+        if self.client_no_context_takeover:
+            params.append('client_no_context_takeover')
+        if self.server_no_context_takeover:
+            params.append('server_no_context_takeover')
+        params.append('client_max_window_bits' + (f'={self.client_max_window_bits}' if self.client_max_window_bits else ''))
+        if self.server_max_window_bits:
+            params.append(f'server_max_window_bits={self.server_max_window_bits}')
+        return '; '.join(params)
+
+
+@dataclass
+class DeflateStats:
+    sent_messages: int = 0              # compressed messages sent
+    sent_bytes: int = 0                 # their size before compression
+    sent_wire_bytes: int = 0            # their compressed payload size
+    received_messages: int = 0          # compressed messages received
+    received_bytes: int = 0             # their size after decompression
+    received_wire_bytes: int = 0        # their compressed payload size
+    compress_seconds: float = 0.0       # CPU time spent compressing
+    decompress_seconds: float = 0.0     # CPU time spent decompressing
+
+
+class PerMessageDeflate:
+    """
+    The negotiated parameters and compression contexts of a permessage-deflate connection (RFC 7692).
+    Either side of a connection may use it: "compress" refers to the messages it sends, "decompress" to those it receives.
+    """
+
+    def __init__(self,
+                 compress_no_context_takeover: bool = False,
+                 compress_window_bits: int = _MAX_WINDOW_BITS,
+                 decompress_no_context_takeover: bool = False,
+                 compress_level: int = 6,
+                 max_message_bytes: int = DeflateConfig.max_message_bytes):
+        self.compress_no_context_takeover = compress_no_context_takeover
+        self.compress_window_bits = compress_window_bits
+        self.decompress_no_context_takeover = decompress_no_context_takeover
+        self.compress_level = compress_level
+        self.max_message_bytes = max_message_bytes
+        self.stats = DeflateStats()
+        self._compressor = None
+        self._decompressor = None
+        self._message_bytes = 0         # decompressed so far, of the message being received
+
+    def __repr__(self):
+        return (f'PerMessageDeflate(compress_no_context_takeover={self.compress_no_context_takeover}, '
+                f'compress_window_bits={self.compress_window_bits}, '
+                f'decompress_no_context_takeover={self.decompress_no_context_takeover})')
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a whole message's payload. Messages must be compressed in the order they are sent."""
+        started_at = time.thread_time()
+        if self._compressor is None or self.compress_no_context_takeover:
+            self._compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, -self.compress_window_bits)
+        compressed = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed.endswith(_DEFLATE_TAIL):
+            compressed = compressed[:-len(_DEFLATE_TAIL)]
+
+        self.stats.sent_messages += 1
+        self.stats.sent_bytes += len(data)
+        self.stats.sent_wire_bytes += len(compressed)
+        self.stats.compress_seconds += time.thread_time() - started_at
+        return compressed
+
+    def decompress(self, data: bytes, fin: bool = True) -> bytes:
+        """
+        Decompress a frame of a compressed message, in the order received. `fin` marks the message's last frame.
+
+        :raise WebSocketPayloadException: if the message decompresses beyond `max_message_bytes`, and the connection
+                                          must be failed (its decompression context is lost)
+        """
+        started_at = time.thread_time()
+        if self._decompressor is None:
+            self._decompressor = zlib.decompressobj(-_MAX_WINDOW_BITS)
+
+        # inflate no more than the limit allows (and a byte beyond it, to tell it was exceeded)
+        remaining = self.max_message_bytes - self._message_bytes
+        decompressed = self._decompressor.decompress(data + _DEFLATE_TAIL if fin else data, remaining + 1)
+        if len(decompressed) > remaining:
+            self._decompressor = None
+            self._message_bytes = 0
+            raise WebSocketPayloadException(f'Decompressed message exceeds {self.max_message_bytes} bytes')
+
+        self._message_bytes = 0 if fin else self._message_bytes + len(decompressed)
+        if fin and self.decompress_no_context_takeover:
+            self._decompressor = None
+
+        self.stats.received_wire_bytes += len(data)
+        self.stats.received_bytes += len(decompressed)
+        if fin:
+            self.stats.received_messages += 1
+        self.stats.decompress_seconds += time.thread_time() - started_at
+        return decompressed
+
+
+def parse_extensions(header: typing.Optional[str]) -> typing.List[typing.Tuple[str, typing.Dict[str, typing.Optional[str]]]]:
+    """
+    Parse a 'Sec-WebSocket-Extensions' header value into (extension name, parameters) pairs.
+    Raises a WebSocketProtocolException on duplicate parameters.
+    """
+    extensions = []
+    for extension in (header or '').split(','):
+        name, *params = [part.strip() for part in extension.split(';')]
+        if not name:
+            continue
+        parsed = {}
+        for param in params:
+            key, _, value = param.partition('=')
+            key = key.strip().lower()
+            if key in parsed:
+                raise WebSocketProtocolException(f'Duplicate extension parameter: {key}')
+            parsed[key] = value.strip().strip('"') or None
+        extensions.append((name.lower(), parsed))
+    return extensions
+
+
+def _window_bits(params: dict, name: str) -> typing.Optional[int]:
+    value = params.get(name)
+    if value is None:
+        return None
+    if not re.fullmatch(r'\d{1,2}', value) or not _MIN_WINDOW_BITS <= int(value) <= _MAX_WINDOW_BITS:
+        raise WebSocketProtocolException(f'Unsupported {name}: {value}')
+    return int(value)
+
+
+def negotiate(response_header: typing.Optional[str], config: DeflateConfig) -> typing.Optional[PerMessageDeflate]:
+    """
+    Client side: validate the server's response to a DeflateConfig offer.
+
+    :return: the negotiated PerMessageDeflate, or None if the server declined it
+    :raise WebSocketProtocolException: if the response is invalid, and the connection must be failed
+    """
+
+    extensions = parse_extensions(response_header)
+    if not extensions:
+        return None
+    if len(extensions) != 1 or extensions[0][0] != EXTENSION_NAME:
+        raise WebSocketProtocolException(f'Unexpected extensions in handshake response: {response_header}')
+
+    params = extensions[0][1]
+    unknown = set(params) - {'client_no_context_takeover', 'server_no_context_takeover', 'client_max_window_bits', 'server_max_window_bits'}
+    if unknown:
+        raise WebSocketProtocolException(f'Unexpected permessage-deflate parameters: {sorted(unknown)}')
+
+    server_window_bits = _window_bits(params, 'server_max_window_bits')
+    if server_window_bits is not None and config.server_max_window_bits is not None and server_window_bits > config.server_max_window_bits:
+        raise WebSocketProtocolException(f'Server window bits exceed the requested: {server_window_bits}')
+
+    compress_window_bits = config.client_max_window_bits or _MAX_WINDOW_BITS
+    if 'client_max_window_bits' in params:
+        client_window_bits = _window_bits(params, 'client_max_window_bits')
+        if client_window_bits is None:
+            raise WebSocketProtocolException('Missing client_max_window_bits value')
+        compress_window_bits = min(compress_window_bits, client_window_bits)
+
+    return PerMessageDeflate(
+        compress_no_context_takeover=config.client_no_context_takeover or 'client_no_context_takeover' in params,
+        compress_window_bits=compress_window_bits,
+        decompress_no_context_takeover='server_no_context_takeover' in params,
+        compress_level=config.compress_level,
+        max_message_bytes=config.max_message_bytes)
+
+
+def accept_offer(request_header: typing.Optional[str]) -> typing.Optional[typing.Tuple[str, PerMessageDeflate]]:
+    """
+    Server side: accept the first acceptable permessage-deflate offer of a handshake request, if any.
+
+    :return: the response's 'Sec-WebSocket-Extensions' header value and the negotiated PerMessageDeflate,
+             or None to decline
+    """
+
+    try:
+        offers = parse_extensions(request_header)
+    except WebSocketProtocolException:
+        return None
+
+    for name, params in offers:
+        if name != EXTENSION_NAME:
+            continue
+        try:
+            server_window_bits = _window_bits(params, 'server_max_window_bits')
+            _window_bits(params, 'client_max_window_bits')
+        except WebSocketProtocolException:
+            continue
+        if set(params) - {'client_no_context_takeover', 'server_no_context_takeover', 'client_max_window_bits', 'server_max_window_bits'}:
+            continue
+
+        response = [EXTENSION_NAME]
+        if 'server_no_context_takeover' in params:
+            response.append('server_no_context_takeover')
+        if 'client_no_context_takeover' in params:
+            response.append('client_no_context_takeover')
+        if server_window_bits is not None:
+            response.append(f'server_max_window_bits={server_window_bits}')
+        return '; '.join(response), PerMessageDeflate(
+            compress_no_context_takeover='server_no_context_takeover' in params,
+            compress_window_bits=server_window_bits or _MAX_WINDOW_BITS,
+            decompress_no_context_takeover='client_no_context_takeover' in params)
+
+    return None
+
+
+class DeflateFrameReader:
+    """
+    Reads frames with a `recv(bufsize)` function, accepting frames with the RSV1 bit set, which marks the first frame
+    of a compressed message (websocket-client's frame reader rejects them). Frames are otherwise validated as by
+    websocket-client (see: ABNF.validate()).
+    Received bytes are kept until a whole frame is read, so a frame may be read on after a timeout.
+    """
+
+    _RECV_SIZE = 16384
+
+    def __init__(self, recv: typing.Callable[[int], bytes], skip_utf8_validation: bool = False):
+        self._recv = recv
+        self._skip_utf8_validation = skip_utf8_validation
+        self._buffer = bytearray()
+        self._lock = Lock()
+
+    def recv_frame(self) -> ABNF:
+        with self._lock:
+            b1, b2 = self._peek(0, 2)
+            fin, rsv1, rsv2, rsv3, opcode = b1 >> 7 & 1, b1 >> 6 & 1, b1 >> 5 & 1, b1 >> 4 & 1, b1 & 0x0f
+            has_mask, length, offset = b2 >> 7 & 1, b2 & 0x7f, 2
+            if length == 126:
+                length, offset = struct.unpack('!H', self._peek(offset, 2))[0], offset + 2
+            elif length == 127:
+                length, offset = struct.unpack('!Q', self._peek(offset, 8))[0], offset + 8
+            mask_key = b''
+            if has_mask:
+                mask_key, offset = self._peek(offset, 4), offset + 4
+            payload = self._peek(offset, length)
+            del self._buffer[:offset + length]
+
+        if has_mask:
+            payload = ABNF.mask(mask_key, payload)
+
+        # validate as any other frame, except for RSV1 (see: DeflateWebSocket.recv_frame())
+        frame = ABNF(fin, 0, rsv2, rsv3, opcode, has_mask, payload)
+        frame.validate(self._skip_utf8_validation)
+        frame.rsv1 = rsv1
+        return frame
+
+    def _peek(self, offset: int, size: int) -> bytes:
+        while len(self._buffer) < offset + size:
+            self._buffer += self._recv(min(self._RECV_SIZE, offset + size - len(self._buffer)))
+        return bytes(self._buffer[offset:offset + size])
+
+
+class DeflateWebSocket(WebSocket):
+    """
+    A WebSocket offering the permessage-deflate extension (RFC 7692) when connecting.
+
+    If the server accepts the offer, text messages (and media, if configured) are compressed when sent, and compressed
+    messages are decompressed when received. If the server declines it, messages are sent and received as by a WebSocket.
+    """
+
+    def __init__(self, config: typing.Optional[DeflateConfig] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._config = config or DeflateConfig()
+        self._frame_reader = DeflateFrameReader(self._recv, kwargs.get('skip_utf8_validation', False))
+        self._deflate = None
+        self._compress_lock = Lock()
+        self._receiving_compressed = False
+
+    @property
+    def deflate(self) -> typing.Optional[PerMessageDeflate]:
+        """The negotiated compression of the current connection, or None if the server declined it."""
+        return self._deflate
+
+    def connect(self, url, **options):
+        offer = self._config.offer()
+        header = options.get('header')
+        if isinstance(header, dict):
+            options['header'] = {**header, 'Sec-WebSocket-Extensions': offer}
+        else:
+            options['header'] = list(header or []) + [f'Sec-WebSocket-Extensions: {offer}']
+
+        self._deflate = None
+        self._receiving_compressed = False
+        super().connect(url, **options)
+
+        try:
+            self._deflate = negotiate(self.handshake_response.headers.get('sec-websocket-extensions'), self._config)
+        except WebSocketProtocolException:
+            self.shutdown()
+            raise
+
+    def send_frame(self, frame: ABNF) -> int:
+        if self._deflate is None or not self._should_compress(frame):
+            return super().send_frame(frame)
+
+        # compressed messages are sent in the order they were compressed
+        with self._compress_lock:
+            frame.data = self._deflate.compress(frame.data)
+            frame.rsv1 = 1
+            return super().send_frame(frame)
+
+    def recv_frame(self) -> ABNF:
+        frame = self._frame_reader.recv_frame()
+
+        # RSV1 is only valid on the first frame of a data message, when compression was negotiated
+        if frame.rsv1 and (self._deflate is None or frame.opcode not in (ABNF.OPCODE_TEXT, ABNF.OPCODE_BINARY)):
+            raise WebSocketProtocolException('Unexpected RSV1 bit')
+
+        if frame.opcode in (ABNF.OPCODE_TEXT, ABNF.OPCODE_BINARY):
+            self._receiving_compressed = bool(frame.rsv1)
+        if self._receiving_compressed and frame.opcode in (ABNF.OPCODE_TEXT, ABNF.OPCODE_BINARY, ABNF.OPCODE_CONT):
+            try:
+                frame.data = self._deflate.decompress(frame.data, fin=bool(frame.fin))
+            except WebSocketPayloadException:
+                self.send_close(STATUS_MESSAGE_TOO_BIG)
+                raise
+            frame.rsv1 = 0
+        return frame
+
+    def _should_compress(self, frame: ABNF) -> bool:
+        if not frame.fin or len(frame.data) < self._config.min_compress_bytes:
+            return False
+        return frame.opcode == ABNF.OPCODE_TEXT or (frame.opcode == ABNF.OPCODE_BINARY and self._config.compress_media)
+
+
+@dataclass
+class CompressionBenchmarkResult:
+    name: str
+    messages: int
+    payload_bytes: int                  # before compression
+    wire_bytes: int                     # frames on the wire (headers included)
+    ratio: float                        # wire bytes per payload byte
+    compress_us_per_message: float      # CPU time, in microseconds
+    decompress_us_per_message: float
+
+
+# the compared configurations, as (name, server compressor arguments)
+BENCHMARK_VARIANTS = [
+    ('uncompressed', None),
+    ('context takeover', dict()),
+    ('no context takeover', dict(compress_no_context_takeover=True)),
+    ('context takeover, 10-bit window', dict(compress_window_bits=10)),
+]
+
+
+def _frame_header_size(payload_size: int) -> int:
+    # server frames are not masked
+    return 2 if payload_size < 126 else 4 if payload_size < 65536 else 10
+
+
+def benchmark(responses: typing.Sequence[dict]) -> typing.List[CompressionBenchmarkResult]:
+    """
+    Measure the bytes on the wire and CPU cost of receiving `responses` (in order) with each of BENCHMARK_VARIANTS.
+    """
+
+    payloads = [json.dumps(response).encode('utf-8') for response in responses]
+    payload_bytes = sum(len(payload) for payload in payloads)
+
+    results = []
+    for name, variant in BENCHMARK_VARIANTS:
+        if variant is None:
+            wire_bytes = sum(_frame_header_size(len(payload)) + len(payload) for payload in payloads)
+            results.append(CompressionBenchmarkResult(name, len(payloads), payload_bytes, wire_bytes, wire_bytes / payload_bytes, 0.0, 0.0))
+            continue
+
+        server = PerMessageDeflate(**variant)
+        client = PerMessageDeflate(decompress_no_context_takeover=server.compress_no_context_takeover)
+        wire_bytes = 0
+        for payload in payloads:
+            compressed = server.compress(payload)
+            wire_bytes += _frame_header_size(len(compressed)) + len(compressed)
+            if client.decompress(compressed) != payload:
+                raise AssertionError('Decompressed payload differs')
+
+        results.append(CompressionBenchmarkResult(name=name,
+                                                  messages=len(payloads),
+                                                  payload_bytes=payload_bytes,
+                                                  wire_bytes=wire_bytes,
+                                                  ratio=wire_bytes / payload_bytes,
+                                                  compress_us_per_message=server.stats.compress_seconds / len(payloads) * 1e6,
+                                                  decompress_us_per_message=client.stats.decompress_seconds / len(payloads) * 1e6))
+    return results
+
+
+def load_responses(path: str) -> typing.List[dict]:
+    """Load responses from a JSON file (a response, or a list of them), or from the ```json blocks of a markdown file."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith('.md'):
+        return [json.loads(block) for block in re.findall(r'```json\s*\n(.*?)```', text, re.DOTALL)]
+    loaded = json.loads(text)
+    return loaded if isinstance(loaded, list) else [loaded]
+
+
+def _synthetic_responses(seconds: float) -> typing.List[dict]:
+    """The responses of a TranscribingSession to `seconds` of media."""
+    from verbit.stand_in_server import TranscribingSession
+
+    class _Collector:
+        bytes_per_second = 1
+
+        def __init__(self):
+            self.responses = []
+
+        def send_response(self, response: dict):
+            self.responses.append(response)
+
+    collector = _Collector()
+    TranscribingSession().on_binary(collector, bytes(int(seconds)))
+    return collector.responses
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the 'compression-benchmark' command's arguments to `parser`."""
+    parser.add_argument('responses_paths', nargs='*', metavar='PATH',
+                        help='JSON files of responses, or markdown files with ```json blocks (default: synthetic responses)')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of times to repeat the responses, as a longer session')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    """The 'compression-benchmark' command."""
+
+    if args.responses_paths:
+        responses = [response for path in args.responses_paths for response in load_responses(path)]
+    else:
+        responses = _synthetic_responses(seconds=600)
+    results = benchmark(responses * max(1, args.repeat))
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(f'{results[0].messages} responses, {results[0].payload_bytes} bytes')
+        for result in results:
+            print(f'{result.name:>32}: {result.wire_bytes:>10} bytes on the wire ({result.ratio:6.1%}), '
+                  f'{result.compress_us_per_message:7.1f}us to compress, {result.decompress_us_per_message:7.1f}us to decompress per message')
+    return 0